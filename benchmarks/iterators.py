@@ -0,0 +1,56 @@
+"""
+Throughput of reading from iterables of chunks
+
+    python benchmarks/iterators.py [size in MB]
+
+Reads the same data through IterableStream, split into chunks of sizes from
+1 byte to 1 MB, both with plain reads of the default buffer size and through
+the block tokenizer, and prints the throughput of each.
+"""
+import io
+import sys
+import time
+from collections import deque
+
+from json_stream.block_tokenizer import BlockTokenizer
+from json_stream.iterators import IterableStream
+
+CHUNK_SIZES = (1, 16, 256, 4 * 1024, 64 * 1024, 1024 * 1024)
+
+
+def read_all(stream):
+    buffer = bytearray(io.DEFAULT_BUFFER_SIZE)
+    while stream.readinto(buffer):
+        pass
+
+
+def tokenize_all(stream):
+    deque(BlockTokenizer(stream, binary=True), maxlen=0)
+
+
+def measure(read, chunks, size, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        read(IterableStream(chunks))
+        best = min(best, time.perf_counter() - start)
+    return size / best / 1e6
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    size = int(megabytes * 1e6)
+    record = b'{"id": 1234, "name": "abcdefgh", "tags": ["x", "y"]}'
+    data = b'[' + b', '.join([record] * (size // (len(record) + 2))) + b']'
+    print(f"data: {len(data) / 1e6:.1f} MB")
+    for chunk_size in CHUNK_SIZES:
+        # tiny chunks are slow whatever reads them, so use less data for them
+        sample = data if chunk_size >= 256 else data[:len(data) // 16]
+        chunks = [sample[i:i + chunk_size] for i in range(0, len(sample), chunk_size)]
+        read = measure(read_all, chunks, len(sample))
+        tokenize = measure(tokenize_all, chunks, len(sample))
+        print(f"{chunk_size:>8} B chunks: {read:8.2f} MB/s (readinto) {tokenize:6.2f} MB/s (BlockTokenizer)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Throughput of the pure python tokenizers
+
+    python benchmarks/tokenizer.py [size in MB]
+
+Tokenizes a generated document with the original character-at-a-time
+tokenizer and with the block-reading tokenizer (in both its text and binary
+modes), from both text and binary streams, and prints the throughput of each.
+The block-reading tokenizer is also run on a file on disk, both read normally
+and memory-mapped.
+"""
+import json
+import random
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from io import BytesIO, StringIO
+
+from json_stream.block_tokenizer import BlockTokenizer
+from json_stream.iterators import map_file
+from json_stream.tokenizer import tokenize
+
+
+def make_document(size):
+    rnd = random.Random(0)
+    records = []
+    length = 0
+    while length < size:
+        record = {
+            "id": rnd.randrange(10 ** 9),
+            "name": "".join(rnd.choice("abcdefghij ") for _ in range(rnd.randrange(5, 30))),
+            "score": rnd.random() * 100,
+            "active": rnd.random() < 0.5,
+            "tags": ["tag%d" % rnd.randrange(100) for _ in range(rnd.randrange(4))],
+            "note": None if rnd.random() < 0.8 else "escaped \"quote\" é",
+        }
+        records.append(record)
+        length += len(json.dumps(record))
+    return json.dumps({"results": records})
+
+
+def measure(tokenizer, make_stream, size, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        deque(tokenizer(make_stream()), maxlen=0)
+        best = min(best, time.perf_counter() - start)
+    return size / best / 1e6
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    document = make_document(int(megabytes * 1e6))
+    data = document.encode()
+    print(f"document: {len(data) / 1e6:.1f} MB")
+    for name, tokenizer in (("tokenize", tokenize), ("BlockTokenizer", BlockTokenizer)):
+        text = measure(tokenizer, lambda: StringIO(document), len(data))
+        binary = measure(tokenizer, lambda: BytesIO(data), len(data))
+        print(f"{name:>30}: {text:6.2f} MB/s (text) {binary:6.2f} MB/s (binary)")
+    binary = measure(lambda f: BlockTokenizer(f, binary=True), lambda: BytesIO(data), len(data))
+    print(f"{'BlockTokenizer(binary=True)':>30}: {'':>18} {binary:6.2f} MB/s (binary)")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "document.json")
+        with open(path, "wb") as f:
+            f.write(data)
+        with open(path, "rb") as f:
+            def rewind():
+                f.seek(0)
+                return f
+            read = measure(lambda f: BlockTokenizer(f, binary=True), rewind, len(data))
+        mapped = measure(BlockTokenizer, lambda: map_file(path), len(data))
+        print(f"{'BlockTokenizer (file)':>30}: {read:6.2f} MB/s (binary=True) {mapped:6.2f} MB/s (mmap)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 from json_stream.loader import load, load_many  # noqa: F401
-from json_stream.visitor import visit, visit_many  # noqa: F401
+from json_stream.visitor import SKIP, visit, visit_batched, visit_many  # noqa: F401
+from json_stream.selector import select  # noqa: F401
 from json_stream.writer import streamable_list, streamable_dict  # noqa: F401
 from json_stream.util import to_standard_types
+from json_stream.transformer import transform  # noqa: F401
@@ -0,0 +1,74 @@
+"""
+asyncio versions of :func:`json_stream.load` and :func:`json_stream.visit`
+
+These read from async iterables of ``bytes`` or ``str`` chunks,
+:class:`asyncio.StreamReader` objects and ``httpx`` responses from
+``AsyncClient.stream()``, and produce objects and lists that are iterated with
+``async for`` and indexed with ``await obj.aget(key)``.
+"""
+import inspect
+
+from json_stream.aio.base import (
+    AsyncStreamingJSONBase, AsyncStreamingJSONList, AsyncStreamingJSONObject, AsyncTokenStream, CONTENT_CHUNK_SIZE,
+)
+from json_stream.tokenizer import TokenType
+
+
+async def load(source, persistent=False, chunk_size=CONTENT_CHUNK_SIZE, **tokenizer_kwargs):
+    async for data in load_many(source, persistent, chunk_size, **tokenizer_kwargs):
+        return data
+
+
+async def load_many(source, persistent=False, chunk_size=CONTENT_CHUNK_SIZE, **tokenizer_kwargs):
+    token_stream = AsyncTokenStream(source, chunk_size, **tokenizer_kwargs)
+    async for token_type, token in token_stream:
+        if token_type == TokenType.OPERATOR:
+            data = AsyncStreamingJSONBase.factory(token, token_stream, persistent)
+            yield data
+            await data.read_all()
+        else:
+            yield token
+
+
+async def _visit(obj, visitor, path):
+    k = None
+    if isinstance(obj, AsyncStreamingJSONObject):
+        async for k, v in obj.aitems():
+            await _visit(v, visitor, path + (k,))
+        if k is None:
+            await _call(visitor, {}, path)
+    elif isinstance(obj, AsyncStreamingJSONList):
+        k = -1
+        async for v in obj:
+            k += 1
+            await _visit(v, visitor, path + (k,))
+        if k == -1:
+            await _call(visitor, [], path)
+    else:
+        await _call(visitor, obj, path)
+
+
+async def _call(visitor, value, path):
+    result = visitor(value, path)
+    if inspect.isawaitable(result):
+        await result
+
+
+async def visit_many(source, visitor, chunk_size=CONTENT_CHUNK_SIZE, **tokenizer_kwargs):
+    """Visit each document in the stream, yielding after each. ``visitor`` may be a coroutine function."""
+    async for obj in load_many(source, False, chunk_size, **tokenizer_kwargs):
+        await _visit(obj, visitor, ())
+        yield
+
+
+async def visit(source, visitor, chunk_size=CONTENT_CHUNK_SIZE, **tokenizer_kwargs):
+    async for _ in visit_many(source, visitor, chunk_size, **tokenizer_kwargs):
+        return
+
+
+async def to_standard_types(x):
+    if isinstance(x, AsyncStreamingJSONList):
+        return [await to_standard_types(v) async for v in x]
+    if isinstance(x, AsyncStreamingJSONObject):
+        return {k: await to_standard_types(v) async for k, v in x.aitems()}
+    return x
@@ -0,0 +1,305 @@
+import inspect
+from abc import ABC
+from collections import OrderedDict
+from typing import Optional, Any
+
+from json_stream.base import TransientAccessException
+from json_stream.push import NeedData, PushTokenizer
+from json_stream.tokenizer import TokenType
+
+CONTENT_CHUNK_SIZE = 10 * 1024
+
+
+async def _iter_chunks(source, chunk_size):
+    if hasattr(source, 'aiter_bytes'):  # httpx.Response from AsyncClient.stream()
+        async for chunk in source.aiter_bytes(chunk_size):
+            yield chunk
+    elif inspect.iscoroutinefunction(getattr(source, 'read', None)):  # asyncio.StreamReader
+        while True:
+            chunk = await source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    elif hasattr(source, '__aiter__'):
+        async for chunk in source:
+            yield chunk
+    else:
+        raise TypeError(f"Cannot read JSON asynchronously from {type(source).__name__}")
+
+
+class AsyncTokenStream:
+    """Async iterator of the tokens of an async source of JSON data"""
+    def __init__(self, source, chunk_size=CONTENT_CHUNK_SIZE, encoding='utf-8'):
+        self._chunks = _iter_chunks(source, chunk_size)
+        self._tokens = PushTokenizer(encoding)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            try:
+                return next(self._tokens)
+            except NeedData:
+                pass
+            except StopIteration:
+                raise StopAsyncIteration() from None
+            try:
+                self._tokens.feed(await self._chunks.__anext__())
+            except StopAsyncIteration:
+                self._tokens.close()
+
+
+async def _keys(items):
+    async for k, v in items:
+        yield k
+
+
+async def _values(items):
+    async for k, v in items:
+        yield v
+
+
+class AsyncStreamingJSONBase(ABC):
+    INCOMPLETE_ERROR = "Unexpected end of file"
+
+    @classmethod
+    def factory(cls, token, token_stream, persistent):
+        if persistent:
+            if token == '{':
+                return AsyncPersistentStreamingJSONObject(token_stream)
+            if token == '[':
+                return AsyncPersistentStreamingJSONList(token_stream)
+        else:
+            if token == '{':
+                return AsyncTransientStreamingJSONObject(token_stream)
+            if token == '[':
+                return AsyncTransientStreamingJSONList(token_stream)
+        raise ValueError(f"Unknown operator {token}")
+
+    _persistent_children: bool
+
+    def __init__(self, token_stream):
+        self.streaming = True
+        self._stream = token_stream
+        self._child: Optional[AsyncStreamingJSONBase] = None
+
+    async def _clear_child(self):
+        if self._child is not None:
+            await self._child.read_all()
+            self._child = None
+
+    async def _iter_items(self):
+        while self.streaming:
+            await self._clear_child()
+            try:
+                item = await self._load_item()
+            except StopAsyncIteration:
+                if self.streaming:
+                    raise ValueError(self.INCOMPLETE_ERROR)
+                return
+            yield item
+
+    def _done(self):
+        self.streaming = False
+        raise StopAsyncIteration()
+
+    async def read_all(self):
+        async for _ in self._iter_items():
+            pass
+
+    async def _load_value(self):
+        token_type, v = await self._stream.__anext__()
+        if token_type == TokenType.OPERATOR:
+            self._child = v = self.factory(v, self._stream, self._persistent_children)
+        return v
+
+    async def _load_item(self):
+        raise NotImplementedError()  # pragma: no cover
+
+    async def aget(self, k) -> Any:
+        raise NotImplementedError()  # pragma: no cover
+
+
+class AsyncPersistentStreamingJSONBase(AsyncStreamingJSONBase, ABC):
+    def __init__(self, token_stream):
+        super().__init__(token_stream)
+        self._data = self._init_persistent_data()
+        self._persistent_children = True
+
+    def _init_persistent_data(self):
+        raise NotImplementedError()  # pragma: no cover
+
+    def transient(self):
+        self._persistent_children = False
+        return self
+
+    async def _iter_all(self, read):
+        # the data read so far, then the rest of the stream
+        for item in list(read()):
+            yield item
+        async for item in self._iter_items():
+            yield item
+
+    def __repr__(self):  # pragma: no cover
+        return f"<{type(self).__name__}: {repr(self._data)}, {'STREAMING' if self.streaming else 'DONE'}>"
+
+
+class AsyncTransientStreamingJSONBase(AsyncStreamingJSONBase, ABC):
+    def __init__(self, token_stream):
+        super().__init__(token_stream)
+        self._started = False
+        self._persistent_children = False
+
+    def _iter_items(self):
+        self._started = True
+        return super()._iter_items()
+
+    def persistent(self):
+        self._check_started()
+        self._persistent_children = True
+        return self
+
+    def _check_started(self):
+        if self._started:
+            raise TransientAccessException("Cannot restart iteration of transient JSON stream")
+
+    def __repr__(self):  # pragma: no cover
+        return f"<{type(self).__name__}: TRANSIENT, {'STREAMING' if self.streaming else 'DONE'}>"
+
+
+class AsyncStreamingJSONList(AsyncStreamingJSONBase, ABC):
+    INCOMPLETE_ERROR = "Unterminated list at end of file"
+
+    async def _load_item(self):
+        token_type, v = await self._stream.__anext__()
+        if token_type == TokenType.OPERATOR:
+            if v == ']':
+                self._done()
+            if v == ',':
+                return await self._load_value()
+            if v not in '{[':
+                raise ValueError(f"Expecting value, comma or ], got {v}")
+            self._child = v = self.factory(v, self._stream, self._persistent_children)
+        return v
+
+
+class AsyncPersistentStreamingJSONList(AsyncPersistentStreamingJSONBase, AsyncStreamingJSONList):
+    def _init_persistent_data(self):
+        return []
+
+    async def _load_item(self):
+        item = await super()._load_item()
+        self._data.append(item)
+        return item
+
+    def __aiter__(self):
+        return self._iter_all(lambda: self._data)
+
+    async def aget(self, i) -> Any:
+        if i < len(self._data):
+            return self._data[i]
+        async for v in self._iter_items():
+            if len(self._data) > i:
+                return v
+        raise IndexError(f"Index {i} out of range")
+
+
+class AsyncTransientStreamingJSONList(AsyncTransientStreamingJSONBase, AsyncStreamingJSONList):
+    def __init__(self, token_stream):
+        super().__init__(token_stream)
+        self._index = -1
+
+    async def _load_item(self):
+        item = await super()._load_item()
+        self._index += 1
+        return item
+
+    def __aiter__(self):
+        self._check_started()
+        return self._iter_items()
+
+    async def aget(self, i) -> Any:
+        if self._index > i:
+            raise TransientAccessException(f"Index {i} already passed in this stream")
+        async for v in self._iter_items():
+            if self._index == i:
+                return v
+        raise IndexError(f"Index {i} out of range")
+
+
+class AsyncStreamingJSONObject(AsyncStreamingJSONBase, ABC):
+    INCOMPLETE_ERROR = "Unterminated object at end of file"
+
+    async def _load_item(self):
+        token_type, k = await self._stream.__anext__()
+        if token_type == TokenType.OPERATOR:
+            if k == '}':
+                self._done()
+            if k == ',':
+                token_type, k = await self._stream.__anext__()
+        if token_type != TokenType.STRING:
+            raise ValueError(f"Expecting string, comma or }}, got {k} ({token_type})")
+
+        token_type, token = await self._stream.__anext__()
+        if token_type != TokenType.OPERATOR or token != ":":
+            raise ValueError("Expecting :")
+        return k, await self._load_value()
+
+    async def _find_item(self, k):
+        async for next_k, v in self._iter_items():
+            if next_k == k:
+                return v
+        raise KeyError(k)
+
+    async def aget(self, k) -> Any:
+        return await self._find_item(k)
+
+    def __aiter__(self):
+        return self.akeys()
+
+    def akeys(self):
+        return _keys(self.aitems())
+
+    def avalues(self):
+        return _values(self.aitems())
+
+    def aitems(self):
+        raise NotImplementedError()  # pragma: no cover
+
+
+class AsyncPersistentStreamingJSONObject(AsyncPersistentStreamingJSONBase, AsyncStreamingJSONObject):
+    def _init_persistent_data(self):
+        return OrderedDict()
+
+    async def _load_item(self):
+        k, v = await super()._load_item()
+        self._data[k] = v
+        return k, v
+
+    def aitems(self):
+        return self._iter_all(self._data.items)
+
+    async def aget(self, k) -> Any:
+        try:
+            return self._data[k]
+        except KeyError:
+            pass
+        return await self._find_item(k)
+
+
+class AsyncTransientStreamingJSONObject(AsyncTransientStreamingJSONBase, AsyncStreamingJSONObject):
+    async def aget(self, k) -> Any:
+        was_started = self._started
+        try:
+            return await self._find_item(k)
+        except KeyError:
+            if was_started:
+                raise TransientAccessException(
+                    f"{k} not found in transient JSON stream or already passed in this stream",
+                )
+            raise
+
+    def aitems(self):
+        self._check_started()
+        return self._iter_items()
@@ -0,0 +1,116 @@
+import asyncio
+import json
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import Mock
+
+from json_stream import aio
+from json_stream.aio.base import (
+    AsyncPersistentStreamingJSONList,
+    AsyncPersistentStreamingJSONObject,
+    AsyncTransientStreamingJSONList,
+    AsyncTransientStreamingJSONObject,
+)
+from json_stream.base import TransientAccessException
+
+
+class TestAio(IsolatedAsyncioTestCase):
+    DATA = {"count": 3, "results": ["a", {"b": [1, 2.5, None]}, "é中"], "empty": {}, "last": [[]]}
+
+    @staticmethod
+    async def chunks(data, size=3):
+        data = data.encode() if isinstance(data, str) else data
+        for i in range(0, len(data), size):
+            await asyncio.sleep(0)
+            yield data[i:i + size]
+
+    def source(self, data=DATA):
+        return self.chunks(json.dumps(data, ensure_ascii=False))
+
+    async def test_load_transient(self):
+        data = await aio.load(self.source())
+        self.assertIsInstance(data, AsyncTransientStreamingJSONObject)
+        results = await data.aget("results")
+        self.assertIsInstance(results, AsyncTransientStreamingJSONList)
+        self.assertEqual(await results.aget(0), "a")
+        item = await results.aget(1)
+        self.assertEqual(await aio.to_standard_types(item), {"b": [1, 2.5, None]})
+        self.assertEqual(await results.aget(2), "é中")
+        with self.assertRaises(TransientAccessException):
+            results.__aiter__()
+        with self.assertRaises(TransientAccessException):
+            await results.aget(0)
+        with self.assertRaises(TransientAccessException):
+            await data.aget("count")
+        with self.assertRaises(TransientAccessException):
+            iter_again = data.aitems()  # noqa: F841
+
+    async def test_load_persistent(self):
+        data = await aio.load(self.source(), persistent=True)
+        self.assertIsInstance(data, AsyncPersistentStreamingJSONObject)
+        results = await data.aget("results")
+        self.assertIsInstance(results, AsyncPersistentStreamingJSONList)
+        self.assertEqual(await results.aget(2), "é中")
+        self.assertEqual(await data.aget("last"), await data.aget("last"))
+        self.assertEqual(await data.aget("count"), 3)
+        self.assertEqual(await results.aget(0), "a")
+        self.assertEqual([k async for k in data], ["count", "results", "empty", "last"])
+        self.assertEqual(await aio.to_standard_types(data), self.DATA)
+        with self.assertRaises(KeyError):
+            await data.aget("missing")
+        with self.assertRaises(IndexError):
+            await results.aget(3)
+
+    async def test_load_many(self):
+        documents = [await aio.to_standard_types(d) async for d in aio.load_many(self.chunks('{"a": 1} [2] "x" 3'))]
+        self.assertEqual(documents, [{"a": 1}, [2], "x", 3])
+
+    async def test_visit(self):
+        visited = []
+        await aio.visit(self.source(), lambda value, path: visited.append((path, value)))
+        self.assertEqual(visited, [
+            (("count",), 3), (("results", 0), "a"), (("results", 1, "b", 0), 1), (("results", 1, "b", 1), 2.5),
+            (("results", 1, "b", 2), None), (("results", 2), "é中"), (("empty",), {}), (("last", 0), []),
+        ])
+
+    async def test_visit_many_async_visitor(self):
+        visited = []
+
+        async def visitor(value, path):
+            await asyncio.sleep(0)
+            visited.append((path, value))
+
+        count = 0
+        async for _ in aio.visit_many(self.chunks('{"a": 1} [2]'), visitor):
+            count += 1
+        self.assertEqual(count, 2)
+        self.assertEqual(visited, [(("a",), 1), ((0,), 2)])
+
+    async def test_stream_reader(self):
+        reader = asyncio.StreamReader()
+        reader.feed_data(json.dumps(self.DATA).encode())
+        reader.feed_eof()
+        data = await aio.load(reader, persistent=True, chunk_size=4)
+        self.assertEqual(await aio.to_standard_types(data), self.DATA)
+
+    async def test_httpx_response(self):
+        response = Mock()
+        response.aiter_bytes.return_value = self.source()
+        data = await aio.load(response, chunk_size=5)
+        self.assertEqual(await aio.to_standard_types(data), self.DATA)
+        response.aiter_bytes.assert_called_once_with(5)
+
+    async def test_concurrent(self):
+        async def parse(i):
+            return await aio.to_standard_types(await aio.load(self.source({"i": i, "data": self.DATA})))
+        results = await asyncio.gather(*(parse(i) for i in range(50)))
+        self.assertEqual(results, [{"i": i, "data": self.DATA} for i in range(50)])
+
+    async def test_errors(self):
+        with self.assertRaisesRegex(ValueError, "Unterminated list at end of file"):
+            await (await aio.load(self.chunks('[1, 2'))).read_all()
+        with self.assertRaisesRegex(ValueError, "Unterminated object at end of file"):
+            await (await aio.load(self.chunks('{"a": [1]'))).read_all()
+        with self.assertRaisesRegex(ValueError, "Invalid JSON character"):
+            await (await aio.load(self.chunks('[1, @]'))).read_all()
+        with self.assertRaises(TypeError):
+            await aio.load(["not", "async"])
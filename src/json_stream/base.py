@@ -1,40 +1,86 @@
 import collections
 import copy
+import json
+import re
 from abc import ABC
+from array import array
 from collections import OrderedDict
+from functools import partial
 from itertools import chain
 from typing import Optional, Iterator, Any, Mapping, Sequence
 
+from json_stream.paths import State, compile_paths, parse_path
 from json_stream.tokenizer import TokenType
 
 
+# typecodes of the arrays persistent lists keep their items in, while they are all ints or all floats
+_ARRAY_TYPECODES = {int: 'q', float: 'd'}
+
+# an escaped UTF-16 surrogate that isn't half of a pair, which json.loads accepts but the tokenizers reject
+_LONE_SURROGATE = (
+    r'\\u[dD][89abAB][0-9a-fA-F]{2}(?!\\u[dD][c-fC-F])'
+    r'|(?<!\\u[dD][89abAB][0-9a-fA-F]{2})\\u[dD][c-fC-F]'
+)
+_LONE_SURROGATES = {str: re.compile(_LONE_SURROGATE), bytes: re.compile(_LONE_SURROGATE.encode())}
+
+
+def has_lone_surrogate(raw):
+    """Whether raw JSON text (or bytes) has an escaped UTF-16 surrogate in it that isn't half of a pair"""
+    return _LONE_SURROGATES[str if isinstance(raw, str) else bytes].search(raw) is not None
+
+
 class TransientAccessException(Exception):
     pass
 
 
+def raw_reader(token_stream, name):
+    """The tokenizer's method for reading raw JSON, e.g. ``read_raw_value``, if it has one"""
+    method = getattr(token_stream, name, None)
+    if method is None:
+        raise ValueError("Reading raw JSON requires a tokenizer that supports it, such as BlockTokenizer")
+    return method
+
+
+def compile_fields(fields):
+    """Compile a ``fields=`` projection (paths, or an already compiled state) to a state, or ``None`` for all"""
+    if fields is None or isinstance(fields, State):
+        state = fields
+    else:
+        paths = [fields] if isinstance(fields, str) else list(fields)
+        for path in paths:
+            # leaving out some of a list's items would renumber the rest
+            if any(isinstance(segment, int) for segment in parse_path(path)):
+                raise ValueError(f"Invalid field {path!r}: list indices can't be used in fields, use [*] instead")
+        state = compile_paths(paths)
+    if state is not None and state.matches:
+        return None  # the whole value was requested
+    return state
+
+
 class StreamingJSONBase(ABC):
     INCOMPLETE_ERROR = "Unexpected end of file"
 
     @classmethod
-    def factory(cls, token, token_stream, persistent):
+    def factory(cls, token, token_stream, persistent, fields=None):
         if persistent:
             if token == '{':
-                return PersistentStreamingJSONObject(token_stream)
+                return PersistentStreamingJSONObject(token_stream, fields)
             if token == '[':
-                return PersistentStreamingJSONList(token_stream)
+                return PersistentStreamingJSONList(token_stream, fields)
         else:
             if token == '{':
-                return TransientStreamingJSONObject(token_stream)
+                return TransientStreamingJSONObject(token_stream, fields)
             if token == '[':
-                return TransientStreamingJSONList(token_stream)
+                return TransientStreamingJSONList(token_stream, fields)
         raise ValueError(f"Unknown operator {token}")  # pragma: no cover
 
     _persistent_children: bool
 
-    def __init__(self, token_stream):
+    def __init__(self, token_stream, fields=None):
         self.streaming = True
         self._stream = token_stream
         self._child: Optional[StreamingJSONBase] = None
+        self._fields: Optional[State] = fields
 
     @property
     def tokenizer(self):
@@ -42,16 +88,37 @@ class StreamingJSONBase(ABC):
 
     def _clear_child(self):
         if self._child is not None:
-            self._child.read_all()
+            self._child._discard()
             self._child = None
 
-    def _iter_items(self):
+    def _discard(self):
+        """
+        Consume the rest of this container without building its values where
+        nothing could read them later, i.e. when every open container from here
+        down is transient and the tokenizer can skip.
+        """
+        open_containers = []
+        node = self
+        while node is not None and node.streaming:
+            if not isinstance(node, TransientStreamingJSONBase):
+                self.read_all()
+                return
+            open_containers.append(node)
+            node = node._child
+        if not hasattr(self._stream, 'skip_to_end'):
+            self.read_all()
+            return
+        for node in reversed(open_containers):
+            node._skip_to_end()
+
+    def _iter_items(self, load_item=None):
+        load_item = load_item or self._load_item
         while True:
             if not self.streaming:
                 return
             self._clear_child()
             try:
-                item = self._load_item()
+                item = load_item()
             except StopIteration:
                 if self.streaming:
                     raise ValueError(self.INCOMPLETE_ERROR)
@@ -68,6 +135,71 @@ class StreamingJSONBase(ABC):
     def _load_item(self):
         raise NotImplementedError()  # pragma: no cover
 
+    def _unread(self):
+        """Whether the tokenizer is still just after this object or list's opening bracket"""
+        return False
+
+    def _decoded(self, value):
+        """Finish with this object or list, which has been decoded as ``value``, if that is possible"""
+        return False  # pragma: no cover
+
+    def _decode_whole(self, limit):
+        """
+        Decode this object or list with :func:`json.loads` in one go, if nothing
+        has been read from it yet and it is no longer than ``limit`` characters
+        (or bytes). Returns whether it was decoded, and its value.
+        """
+        raw_to_end = getattr(self._stream, 'raw_to_end', None)
+        if raw_to_end is None or not self._unread():
+            return False, None
+        raw = raw_to_end(limit)
+        if raw is None or has_lone_surrogate(raw):
+            return False, None
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return False, None  # left to the tokenizer, which reports errors properly
+        if not self._decoded(value):
+            return False, None
+        self._stream.skip_raw(raw)
+        return True, value
+
+    def _load_value(self, token=None, fields=None):
+        token_type, v = token or next(self._stream)
+        if token_type == TokenType.OPERATOR:
+            self._child = v = self.factory(v, self._stream, self._persistent_children, fields)
+        return v
+
+    def _skip_value(self, token=None):
+        if token is None:
+            skip_value = getattr(self._stream, 'skip_value', None)
+            if skip_value is not None and skip_value():
+                return
+            # either the tokenizer can't skip, or there's no value to skip, which factory reports
+            token = next(self._stream)
+        token_type, v = token
+        if token_type == TokenType.OPERATOR:
+            self.factory(v, self._stream, persistent=False)._discard()
+
+    def _load_field(self, key, token=None):
+        """
+        Load the value for ``key`` (whose first token may already have been
+        read), unless it can't contain any of the requested fields, in which
+        case it is skipped. Returns whether the value was kept, and the value.
+        """
+        if self._fields is None:
+            return True, self._load_value(token)
+        fields = self._fields.next(key)
+        if fields is None:
+            self._skip_value(token)
+            return False, None
+        if fields.matches:
+            return True, self._load_value(token)
+        v = self._load_value(token, fields)
+        # a scalar where the fields expect an object or list is left out of an object, but kept in a list, so the
+        # items after it keep their indices
+        return isinstance(v, StreamingJSONBase) or isinstance(key, int), v
+
     def _find_item(self, k):
         raise NotImplementedError()  # pragma: no cover
 
@@ -88,8 +220,8 @@ class StreamingJSONBase(ABC):
 
 
 class PersistentStreamingJSONBase(StreamingJSONBase, ABC):
-    def __init__(self, token_stream):
-        super().__init__(token_stream)
+    def __init__(self, token_stream, fields=None):
+        super().__init__(token_stream, fields)
         self._data = self._init_persistent_data()
         self._persistent_children = True
 
@@ -100,6 +232,9 @@ class PersistentStreamingJSONBase(StreamingJSONBase, ABC):
         self._persistent_children = False
         return self
 
+    def _unread(self):
+        return self.streaming and self._child is None and not self._data and self._fields is None
+
     def __iter__(self):
         return chain(self._data, self._get__iter__())
 
@@ -112,14 +247,14 @@ class PersistentStreamingJSONBase(StreamingJSONBase, ABC):
 
 
 class TransientStreamingJSONBase(StreamingJSONBase, ABC):
-    def __init__(self, token_stream):
-        super().__init__(token_stream)
+    def __init__(self, token_stream, fields=None):
+        super().__init__(token_stream, fields)
         self._started = False
         self._persistent_children = False
 
-    def _iter_items(self):
+    def _iter_items(self, load_item=None):
         self._started = True
-        return super()._iter_items()
+        return super()._iter_items(load_item)
 
     def __getitem__(self, k) -> Any:
         return self._find_item(k)
@@ -128,11 +263,44 @@ class TransientStreamingJSONBase(StreamingJSONBase, ABC):
         self._check_started()
         return self._get__iter__()
 
-    def persistent(self):
+    def persistent(self, fields=None):
+        """
+        Make the children of this object or list persistent. If ``fields`` is
+        given, only those paths (relative to this object or list) are kept.
+        """
         self._check_started()
         self._persistent_children = True
+        if fields is not None:
+            self._fields = compile_fields(fields)
         return self
 
+    def _skipped(self):
+        self._started = True
+        self.streaming = False
+
+    def _skip_to_end(self):
+        """Skip the rest of this object or list, once any open child has been skipped"""
+        self._stream.skip_to_end()
+        self._skipped()
+
+    def _unread(self):
+        return self.streaming and not self._started and self._fields is None
+
+    def _decoded(self, value):
+        self._skipped()
+        return True
+
+    def raw(self):
+        """
+        Read this object or list without parsing it, and return its raw JSON
+        text (a memoryview of the bytes, with a binary stream in binary mode).
+        Nothing can have been read from it yet.
+        """
+        self._check_started()
+        raw = raw_reader(self._stream, 'read_raw_to_end')()
+        self._skipped()
+        return raw
+
     def _check_started(self):
         if self._started:
             raise TransientAccessException("Cannot restart iteration of transient JSON stream")
@@ -144,20 +312,27 @@ class TransientStreamingJSONBase(StreamingJSONBase, ABC):
 class StreamingJSONList(StreamingJSONBase, ABC):
     INCOMPLETE_ERROR = "Unterminated list at end of file"
 
+    def __init__(self, token_stream, fields=None):
+        super().__init__(token_stream, fields)
+        self._index = -1  # index of the last item read from the stream
+
     def _load_item(self):
-        token_type, v = next(self._stream)
-        if token_type == TokenType.OPERATOR:
-            if v == ']':
-                self._done()
-            if v == ',':
-                token_type, v = next(self._stream)
-            elif v in '{[':
-                pass
-            else:  # pragma: no cover
-                raise ValueError(f"Expecting value, comma or ], got {v}")
-        if token_type == TokenType.OPERATOR:
-            self._child = v = self.factory(v, self._stream, self._persistent_children)
-        return v
+        while True:
+            self._clear_child()
+            token_type, v = next(self._stream)
+            if token_type == TokenType.OPERATOR:
+                if v == ']':
+                    self._done()
+                if v == ',':
+                    token_type, v = next(self._stream)
+                elif v in '{[':
+                    pass
+                else:  # pragma: no cover
+                    raise ValueError(f"Expecting value, comma or ], got {v}")
+            self._index += 1
+            kept, v = self._load_field(self._index, (token_type, v))
+            if kept:
+                return v
 
     def _get__iter__(self):
         return self._iter_items()
@@ -166,13 +341,80 @@ class StreamingJSONList(StreamingJSONBase, ABC):
 @Sequence.register
 class PersistentStreamingJSONList(PersistentStreamingJSONBase, StreamingJSONList):
     def _init_persistent_data(self):
+        # the type of the items while they are all ints, or all floats (and ints), and are kept in an array, or
+        # object once they are kept in a list
+        self._item_type = None
+        # for an array of floats, a 1 for each item that is an int kept as a float (up to the last such item)
+        self._ints = bytearray()
         return []
 
+    def _keep(self, item):
+        item_type = self._item_type
+        if item_type is not object:
+            try:
+                if type(item) is item_type:
+                    self._data.append(item)
+                    return
+                if item_type is float and type(item) is int and float(item) == item:
+                    # kept as a float, but read back as the int it was
+                    self._ints.extend(bytes(len(self._data) - len(self._ints)))
+                    self._ints.append(1)
+                    self._data.append(item)
+                    return
+                if item_type is int and type(item) is float and all(float(v) == v for v in self._data):
+                    # the ints so far are kept as floats too
+                    self._ints = bytearray(b'\x01') * len(self._data)
+                    self._data = array('d', self._data)
+                    self._data.append(item)
+                    self._item_type = float
+                    return
+                if item_type is None and type(item) in _ARRAY_TYPECODES:
+                    self._data = array(_ARRAY_TYPECODES[type(item)], (item,))
+                    self._item_type = type(item)
+                    return
+            except OverflowError:  # an int too big for an array
+                pass
+            data = list(self._data)
+            for i, is_int in enumerate(self._ints):
+                if is_int:
+                    data[i] = int(data[i])
+            self._data = data
+            self._ints = bytearray()
+            self._item_type = object
+        self._data.append(item)
+
+    def _decoded(self, value):
+        # the values of a persistent list are only plain python values if they aren't lists or objects
+        if any(isinstance(v, (dict, list)) for v in value):
+            return False
+        for v in value:
+            self._keep(v)
+        self._index = len(value) - 1
+        self.streaming = False
+        return True
+
     def _load_item(self):
         item = super()._load_item()
-        self._data.append(item)
+        self._keep(item)
         return item
 
+    def __iter__(self):
+        # self._data is replaced when its items stop fitting in an array, so it is looked up again for every item
+        i = 0
+        items = self._get__iter__()
+        while True:
+            if i < len(self._data):
+                yield int(self._data[i]) if self._is_int(i) else self._data[i]
+                i += 1
+            else:
+                try:
+                    next(items)  # kept in self._data
+                except StopIteration:
+                    return
+
+    def _is_int(self, i):
+        return i < len(self._ints) and self._ints[i]
+
     def _find_item(self, i):
         length = len(self._data)
         for v in iter(self._iter_items()):
@@ -183,26 +425,110 @@ class PersistentStreamingJSONList(PersistentStreamingJSONBase, StreamingJSONList
 
     def __getitem__(self, k) -> Any:
         try:
-            return self._data[k]
+            value = self._data[k]
         except IndexError:
             pass
+        else:
+            if self._ints:
+                if isinstance(k, slice):
+                    return [int(v) if self._is_int(i) else v for i, v in zip(range(len(self._data))[k], value)]
+                if self._is_int(k % len(self._data)):
+                    return int(value)
+            return value.tolist() if isinstance(value, array) else value
         return self._find_item(k)
 
+    def as_array(self):
+        """
+        Read the whole list, and return the :class:`array.array` of int64s or
+        float64s its items are kept in if they are all ints or all floats (and
+        fit), without copying it, or else None. A list of floats can have ints
+        in it too (that a float holds exactly), which are floats in the array.
+        """
+        self.read_all()
+        return self._data if isinstance(self._data, array) else None
+
+    def as_numpy(self):
+        """
+        Read the whole list, and return it as a numpy array, which shares its
+        memory with :meth:`as_array` if the items are all ints or all floats.
+        """
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover
+            raise ValueError("Cannot convert a list to a numpy array without the numpy package") from None
+        data = self.as_array()
+        if data is None:
+            return numpy.array(self._data)
+        return numpy.frombuffer(data, dtype=numpy.int64 if data.typecode == 'q' else numpy.float64)
+
 
 @Sequence.register
 class TransientStreamingJSONList(TransientStreamingJSONBase, StreamingJSONList):
-    def __init__(self, token_stream):
-        super().__init__(token_stream)
-        self._index = -1
+    def _skipped(self, count=None):
+        """Finish with this list, the rest of which was ``count`` items, or an unknown number if None"""
+        super()._skipped()
+        if count is None:
+            self._index = float('inf')  # the items weren't counted, so every index has been passed
+        else:
+            self._index += count
 
-    def _load_item(self):
-        item = super()._load_item()
+    def _skip_to_end(self):
+        skip_items = getattr(self._stream, 'skip_items', None)
+        if skip_items is None:
+            super()._skip_to_end()
+        else:
+            self._skipped(skip_items(self._index >= 0))
+
+    def _decoded(self, value):
+        self._skipped(len(value))
+        return True
+
+    def _skip_item(self):
+        skip_value = getattr(self._stream, 'skip_value', None)
+        if skip_value is None:
+            self._load_item()
+            return
+        if self._index < 0:
+            if not skip_value():
+                self._load_item()  # the list is empty
+                return
+        else:
+            token_type, v = next(self._stream)
+            if token_type == TokenType.OPERATOR and v == ']':
+                self._done()
+            if token_type != TokenType.OPERATOR or v != ',':  # pragma: no cover
+                raise ValueError(f"Expecting comma or ], got {v}")
+            self._skip_value()
         self._index += 1
-        return item
+
+    def _load_raw_item(self, read_raw_value):
+        if self._index >= 0:
+            token_type, v = next(self._stream)
+            if token_type == TokenType.OPERATOR and v == ']':
+                self._done()
+            if token_type != TokenType.OPERATOR or v != ',':
+                raise ValueError(f"Expecting comma or ], got {v}")
+        raw = read_raw_value()
+        if raw is None:
+            token_type, v = next(self._stream)
+            if self._index < 0 and token_type == TokenType.OPERATOR and v == ']':
+                self._done()
+            raise ValueError(f"Expecting value, got {v}")
+        self._index += 1
+        return raw
+
+    def iter_raw(self):
+        """Iterate over the raw JSON text of each item, read without parsing it (see :meth:`raw`)"""
+        self._check_started()
+        return self._iter_items(partial(self._load_raw_item, raw_reader(self._stream, 'read_raw_value')))
 
     def _find_item(self, i):
         if self._index > i:
             raise TransientAccessException(f"Index {i} already passed in this stream")
+        if self._index < i - 1:
+            for _ in self._iter_items(self._skip_item):
+                if self._index == i - 1:
+                    break
         for v in iter(self._iter_items()):
             if self._index == i:
                 return v
@@ -213,6 +539,14 @@ class StreamingJSONObject(StreamingJSONBase, ABC):
     INCOMPLETE_ERROR = "Unterminated object at end of file"
 
     def _load_item(self):
+        while True:
+            self._clear_child()
+            k = self._load_key()
+            kept, v = self._load_field(k)
+            if kept:
+                return k, v
+
+    def _load_key(self):
         token_type, k = next(self._stream)
         if token_type == TokenType.OPERATOR:
             if k == '}':
@@ -225,11 +559,7 @@ class StreamingJSONObject(StreamingJSONBase, ABC):
         token_type, token = next(self._stream)
         if token_type != TokenType.OPERATOR or token != ":":
             raise ValueError("Expecting :")  # pragma: no cover
-
-        token_type, v = next(self._stream)
-        if token_type == TokenType.OPERATOR:
-            self._child = v = self.factory(v, self._stream, self._persistent_children)
-        return k, v
+        return k
 
     def _get__iter__(self):
         return (k for k, v in self._iter_items())
@@ -261,6 +591,13 @@ class PersistentStreamingJSONObject(PersistentStreamingJSONBase, StreamingJSONOb
     def _init_persistent_data(self):
         return OrderedDict()
 
+    def _decoded(self, value):
+        if any(isinstance(v, (dict, list)) for v in value.values()):
+            return False
+        self._data.update(value)
+        self.streaming = False
+        return True
+
     def _load_item(self):
         k, v = super()._load_item()
         self._data[k] = v
@@ -285,16 +622,36 @@ class PersistentStreamingJSONObject(PersistentStreamingJSONBase, StreamingJSONOb
 
 @Mapping.register
 class TransientStreamingJSONObject(TransientStreamingJSONBase, StreamingJSONObject):
+    def _load_item_if(self, k):
+        # values of other keys can't be accessed later, so they are skipped rather than loaded
+        if self._load_key() != k:
+            self._skip_value()
+            return False, None
+        return self._load_field(k)
+
+    def _load_raw_item(self, read_raw_value):
+        k = self._load_key()
+        raw = read_raw_value()
+        if raw is None:
+            token_type, v = next(self._stream)
+            raise ValueError(f"Expecting value, got {v}")
+        return k, raw
+
+    def iter_raw(self):
+        """Iterate over ``(key, raw JSON text)`` pairs, reading the values without parsing them (see :meth:`raw`)"""
+        self._check_started()
+        return self._iter_items(partial(self._load_raw_item, raw_reader(self._stream, 'read_raw_value')))
+
     def _find_item(self, k):
         was_started = self._started
-        try:
-            return super()._find_item(k)
-        except KeyError:
-            if was_started:
-                raise TransientAccessException(
-                    f"{k} not found in transient JSON stream or already passed in this stream",
-                )
-            raise
+        for found, v in self._iter_items(partial(self._load_item_if, k)):
+            if found:
+                return v
+        if was_started:
+            raise TransientAccessException(
+                f"{k} not found in transient JSON stream or already passed in this stream",
+            )
+        raise KeyError(k)
 
     def items(self):
         self._check_started()
@@ -0,0 +1,550 @@
+"""
+Block-reading pure python tokenizer
+
+Produces exactly the same ``(TokenType, value)`` stream as
+:func:`json_stream.tokenizer.tokenize`, but reads its input in large blocks
+and scans whole tokens with compiled regular expressions instead of
+dispatching on every character.
+
+Well-formed input never leaves the fast path. Anything unusual (malformed
+tokens, lone UTF-16 surrogates, ...) is handed back to the reference state
+machine in :mod:`json_stream.tokenizer` so that errors and edge cases behave
+identically.
+
+In binary mode the input is scanned as bytes, without decoding the stream to
+text first. Only the contents of string tokens are decoded. Memory-mapped
+files are scanned in the same way, in place, without being read at all.
+
+Values that nobody is going to look at can be skipped with
+:meth:`BlockTokenizer.skip_value` and :meth:`BlockTokenizer.skip_to_end`,
+which only track strings and bracket depth and produce no tokens.
+"""
+import codecs
+import mmap
+import re
+from io import StringIO
+from json.decoder import scanstring
+
+from json_stream.iterators import MappedFile
+from json_stream.tokenizer import TokenType, tokenize, _guess_encoding
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+# characters for which str.isspace() is true are whitespace to the reference tokenizer
+_WHITESPACE = r'[\s\x1c-\x1f]'
+_DELIMITER = r'[\s\x1c-\x1f{}\[\]:,]'
+_STRING_BODY = r'[^"\\]*(?:\\.[^"\\]*)*'
+_NUMBER = r'(-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?)'
+_LITERAL = r'(true|false|null|NaN|Infinity|-Infinity)'
+# the characters a number or literal can be made of (and some it can't)
+_RUN = r'[^\s\x1c-\x1f{}\[\]:,"]*'
+# everything up to the next bracket that isn't inside a string
+_SKIP = rf'[^"{{}}\[\]]*(?:"{_STRING_BODY}"[^"{{}}\[\]]*)*'
+# the same, but also stopping at the next comma
+_SKIP_ITEM = rf'[^"{{}}\[\],]*(?:"{_STRING_BODY}"[^"{{}}\[\],]*)*'
+_INDEX = re.compile(r' at index (\d+)$')
+_SURROGATE = re.compile('[\ud800-\udfff]')
+
+
+def _token_pattern(at_eof):
+    # strings and numbers must be followed by a delimiter, which is only
+    # allowed to be the end of the buffer once the stream is exhausted
+    end = rf'(?={_DELIMITER}|\Z)' if at_eof else rf'(?={_DELIMITER})'
+    return (
+        rf'{_WHITESPACE}*(?:'
+        r'([{}\[\]:,])'  # 1: operator
+        rf'|"({_STRING_BODY})"{end}'  # 2: string
+        rf'|{_NUMBER}{end}'  # 3: number (4: fraction, 5: exponent)
+        rf'|{_LITERAL}'  # 6: literal
+        r')'
+    )
+
+
+class _Grammar:
+    """Compiled patterns and lookup tables for scanning either ``str`` or ``bytes``"""
+    def __init__(self, encode, decode):
+        def compile_(pattern, flags=0):
+            return re.compile(encode(pattern), flags)
+
+        self.decode = decode
+        self.empty = encode('')
+        self.quote = encode('"')
+        self.backslash = encode('\\')
+        self.comma = encode(',')
+        self.list_end = encode(']')
+        self.token = compile_(_token_pattern(at_eof=False), re.DOTALL)
+        self.token_at_eof = compile_(_token_pattern(at_eof=True), re.DOTALL)
+        self.whitespace = compile_(f'{_WHITESPACE}*')
+        self.delimiter = compile_(_DELIMITER)
+        self.string_body = compile_(_STRING_BODY, re.DOTALL)
+        self.run = compile_(_RUN)
+        self.skip = compile_(_SKIP, re.DOTALL)
+        self.skip_item = compile_(_SKIP_ITEM, re.DOTALL)
+        self.openers = {encode('{'), encode('[')}
+        self.operators = {encode(op): (TokenType.OPERATOR, op) for op in '{}[]:,'}
+        self.literals = {
+            encode('true'): (TokenType.BOOLEAN, True),
+            encode('false'): (TokenType.BOOLEAN, False),
+            encode('null'): (TokenType.NULL, None),
+            encode('NaN'): (TokenType.NUMBER, float('NaN')),
+            encode('Infinity'): (TokenType.NUMBER, float('Infinity')),
+            encode('-Infinity'): (TokenType.NUMBER, float('-Infinity')),
+        }
+
+
+_TEXT = _Grammar(str, str)
+_BINARY = _Grammar(str.encode, bytes.decode)  # UTF-8
+_ASCII_COMPATIBLE = {'utf-8', 'ascii'}
+
+
+class BlockTokenizer:
+    """
+    Tokenizer that reads ``buffer_size`` characters at a time.
+
+    Binary streams are read with ``read1()`` where available, so data is
+    tokenized as soon as it arrives rather than when a whole block has been
+    received.
+
+    With ``binary=True``, UTF-8 (or ASCII) binary streams are scanned as
+    bytes read with ``readinto()``, and only string tokens are decoded. Error
+    positions are then reported as byte offsets. Text streams, and binary
+    streams in other encodings, are always decoded.
+
+    An :class:`mmap.mmap` (or a :class:`~json_stream.iterators.MappedFile`)
+    is scanned in place as UTF-8, from its current position, and tokens are
+    sliced straight out of it. Its position is not updated.
+    """
+    def __init__(self, stream, buffer_size=DEFAULT_BUFFER_SIZE, binary=False):
+        self._stream = stream
+        self._buffer_size = buffer_size
+        self._offset = 0  # index of self._buf[0] in the stream
+        if isinstance(stream, MappedFile):
+            stream = stream.map
+        if isinstance(stream, mmap.mmap):
+            # the whole file is a single buffer that never needs filling
+            self._grammar = _BINARY
+            self._read = None
+            self._buf = stream
+            self._pos = stream.tell()
+            self._eof = True
+            self._token_re = self._grammar.token_at_eof
+        else:
+            self._read = self._reader(stream, binary)
+            self._buf = self._grammar.empty
+            self._pos = 0
+            self._eof = False
+            self._token_re = self._grammar.token
+        self._resume = None  # continuation of a token split across reads
+        self._parts = None  # pieces of a string split across reads
+        self._string_start = None
+        self._mark = None  # start of raw text being read, which filling the buffer must keep
+        self._sink = None  # called with the raw text from the mark, instead of keeping it, when filling the buffer
+
+    def _reader(self, stream, binary):
+        self._grammar = _TEXT
+        if not isinstance(stream.read(0), bytes):
+            size = self._buffer_size
+            return lambda: stream.read(size)
+        encoding = _guess_encoding(stream)
+        if binary and codecs.lookup(encoding).name in _ASCII_COMPATIBLE:
+            self._grammar = _BINARY
+            return self._bytes_reader(stream)
+        read = getattr(stream, 'read1', stream.read)
+        decoder = codecs.getincrementaldecoder(encoding)()
+
+        def read_text():
+            while True:
+                data = read(self._buffer_size)
+                if not data:
+                    return decoder.decode(b'', final=True)
+                text = decoder.decode(data)
+                if text:
+                    return text
+        return read_text
+
+    def _bytes_reader(self, stream):
+        readinto = getattr(stream, 'readinto1', None) or getattr(stream, 'readinto', None)
+        if readinto is None:
+            read = getattr(stream, 'read1', stream.read)
+            return lambda: read(self._buffer_size)
+        block = memoryview(bytearray(self._buffer_size))
+
+        def read_bytes():
+            # the block is copied onto the end of the buffer, so it can be reused
+            return block[:readinto(block)]
+        return read_bytes
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._resume is not None:
+            return self._resume()
+        while True:
+            match = self._token_re.match(self._buf, self._pos)
+            if match is None:
+                token = self._next_slow()
+                if token is None:
+                    continue
+                return token
+            self._pos = match.end()
+            kind = match.lastindex
+            if kind == 1:
+                return self._grammar.operators[match.group(1)]
+            if kind == 2:
+                value = match.group(2)
+                if self._grammar.backslash in value:
+                    return TokenType.STRING, self._unescape(value, self._offset + match.start(2) - 1)
+                return TokenType.STRING, self._grammar.decode(value)
+            if kind == 3:
+                if match.group(4) is None and match.group(5) is None:
+                    return TokenType.NUMBER, int(match.group(3))
+                return TokenType.NUMBER, float(match.group(3))
+            return self._grammar.literals[match.group(6)]
+
+    def skip_value(self):
+        """
+        Skip over the next value without tokenizing it.
+
+        Returns ``False``, consuming nothing, if the next token does not start
+        a value (e.g. it closes the enclosing container). Skipped input is not
+        validated.
+        """
+        return self._skip() is not None
+
+    def _skip_whitespace(self):
+        if self._resume is not None:
+            self._check_string_end()
+        whitespace = self._grammar.whitespace
+        while True:
+            self._pos = whitespace.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf) or self._eof:
+                return
+            self._fill()
+
+    def _skip(self):
+        # None if there is no value to skip, otherwise whether the value was terminated
+        self._skip_whitespace()
+        grammar = self._grammar
+        char = self._buf[self._pos:self._pos + 1]
+        if char == grammar.quote:
+            self._pos += 1
+            return self._skip_string()
+        elif char in grammar.openers:
+            self._pos += 1
+            return self.skip_to_end()
+        else:
+            # a number or literal
+            while True:
+                end = grammar.run.match(self._buf, self._pos).end()
+                if end < len(self._buf) or self._eof:
+                    break
+                self._fill()
+            if end == self._pos:
+                return None
+            self._pos = end
+        return True
+
+    def skip_to_end(self, depth=1):
+        """
+        Skip to just after the bracket that closes the ``depth`` innermost
+        containers whose opening brackets have already been read. Returns
+        ``False`` if the input ends first.
+        """
+        if self._resume is not None:
+            self._check_string_end()
+        grammar = self._grammar
+        while depth:
+            buf = self._buf
+            pos = self._pos = grammar.skip.match(buf, self._pos).end()
+            if pos == len(buf):
+                if self._eof:
+                    return False  # unterminated, which the caller finds out when it next reads a token
+                self._fill()
+                continue
+            char = buf[pos:pos + 1]
+            self._pos += 1
+            if char == grammar.quote:
+                # a string that continues into the next block
+                self._skip_string()
+            elif char in grammar.openers:
+                depth += 1
+            else:
+                depth -= 1
+        return True
+
+    def skip_items(self, started):
+        """
+        Skip to just after the bracket that closes the list whose items are
+        being read, where ``started`` is whether any of them have been read
+        already, and return how many items were skipped, or None if the input
+        ends first.
+        """
+        self._skip_whitespace()
+        grammar = self._grammar
+        char = self._buf[self._pos:self._pos + 1]
+        # every item after the first follows a comma
+        count = 0 if started or char in (grammar.empty, grammar.list_end) else 1
+        depth = 1
+        while depth:
+            buf = self._buf
+            pos = self._pos = (grammar.skip_item if depth == 1 else grammar.skip).match(buf, self._pos).end()
+            if pos == len(buf):
+                if self._eof:
+                    return None  # unterminated, which the caller finds out when it next reads a token
+                self._fill()
+                continue
+            char = buf[pos:pos + 1]
+            self._pos += 1
+            if char == grammar.quote:
+                # a string that continues into the next block
+                self._skip_string()
+            elif char == grammar.comma:
+                count += 1
+            elif char in grammar.openers:
+                depth += 1
+            else:
+                depth -= 1
+        return count
+
+    def raw_to_end(self, limit):
+        """
+        The text (or bytes, in binary mode) of the object or list whose opening
+        bracket was the last token read, from that bracket up to and including
+        its closing bracket, without consuming any of it. Returns None if it is
+        longer than ``limit``, or unterminated, or the last token read wasn't an
+        opening bracket.
+        """
+        grammar = self._grammar
+        if self._resume is not None or self._buf[self._pos - 1:self._pos] not in grammar.openers:
+            return None
+        start = self._pos - 1
+        pos = self._pos
+        depth = 1
+        while depth:
+            buf = self._buf
+            pos = grammar.skip.match(buf, pos).end()
+            char = buf[pos:pos + 1]
+            if not char or char == grammar.quote:
+                # the end of the buffer, possibly inside a string
+                if self._eof or len(buf) - start > limit:
+                    return None
+                offset = self._offset
+                self._mark = start
+                self._fill()
+                self._mark = None
+                shift = self._offset - offset
+                start -= shift
+                pos -= shift
+                continue
+            pos += 1
+            if char in grammar.openers:
+                depth += 1
+            else:
+                depth -= 1
+        if pos - start > limit:
+            return None
+        return self._buf[start:pos]
+
+    def skip_raw(self, raw):
+        """Skip to the end of ``raw``, which :meth:`raw_to_end` has just returned"""
+        self._pos += len(raw) - 1
+
+    def read_raw_value(self):
+        """
+        Read the next value without tokenizing it, and return its raw JSON text
+        (a memoryview of the bytes, in binary mode). Returns None, consuming
+        nothing, if the next token does not start a value. As with
+        :meth:`skip_value`, the value is not validated.
+        """
+        self._skip_whitespace()
+        return self._read_raw(self._pos, self._skip)
+
+    def read_raw_to_end(self):
+        """
+        Read the rest of the object or list whose opening bracket was the last
+        token read, and return its raw JSON text from that bracket up to and
+        including its closing bracket (a memoryview of the bytes, in binary
+        mode).
+        """
+        if self._resume is not None or self._buf[self._pos - 1:self._pos] not in self._grammar.openers:
+            raise ValueError("Expecting the opening bracket of an object or list to have just been read")
+        return self._read_raw(self._pos - 1, self.skip_to_end)
+
+    def copy_value(self, write):
+        """
+        Read the next value without tokenizing it, passing its raw JSON text
+        to ``write`` a block at a time (as memoryviews of the bytes, in binary
+        mode), so it is never held in memory as a whole. Returns ``False``,
+        consuming nothing, if the next token does not start a value. As with
+        :meth:`skip_value`, the value is not validated.
+        """
+        self._skip_whitespace()
+        return self._copy(self._pos, self._skip, write)
+
+    def _read_raw(self, start, skip):
+        pieces = []
+        if not self._copy(start, skip, pieces.append):
+            return None
+        if len(pieces) == 1:
+            return pieces[0]
+        raw = self._grammar.empty.join(pieces)
+        return memoryview(raw) if self._grammar is _BINARY else raw
+
+    def _copy(self, start, skip, write):
+        """
+        Call ``skip``, passing the text from ``start`` that it skips over to
+        ``write`` as it goes, rather than keeping it in the buffer every time
+        the buffer is filled. Returns ``False`` if there was nothing to skip.
+        """
+        first = self._buf[start:start + 1]
+        self._mark, self._sink = start, write
+        try:
+            terminated = skip()
+        finally:
+            start, self._mark, self._sink = self._mark, None, None
+        if terminated is None:
+            return False
+        if not terminated:
+            self._raise_unterminated(first)
+        write(self._raw(start))
+        return True
+
+    def _raw(self, start):
+        if self._grammar is _BINARY:
+            return memoryview(self._buf)[start:self._pos]
+        return self._buf[start:self._pos]
+
+    def _raise_unterminated(self, char):
+        kind = {'{': 'object', '[': 'list'}.get(self._grammar.decode(char), 'string')
+        raise ValueError(f"Unterminated {kind} at end of file")
+
+    def _skip_string(self):
+        while True:
+            buf = self._buf
+            end = self._pos = self._grammar.string_body.match(buf, self._pos).end()
+            if buf[end:end + 1] == self._grammar.quote:
+                self._pos += 1
+                return True
+            if self._eof:
+                self._pos = len(buf)
+                return False
+            self._fill()
+
+    @property
+    def position(self):
+        """Index of the next unread character (or byte, in binary mode)."""
+        return self._offset + self._pos
+
+    def _fill(self):
+        data = self._read()
+        if not data:
+            self._eof = True
+            self._token_re = self._grammar.token_at_eof
+            return
+        if self._sink is not None:
+            # the raw text read so far is passed on rather than kept, so it isn't copied again by every fill
+            if self._pos > self._mark:
+                self._sink(self._raw(self._mark))
+            keep = self._pos
+        else:
+            keep = self._pos if self._mark is None else self._mark
+        self._buf = self._buf[keep:] + data
+        self._offset += keep
+        self._pos -= keep
+        if self._mark is not None:
+            self._mark = 0
+
+    def _next_slow(self):
+        buf = self._buf
+        start = self._pos = self._grammar.whitespace.match(buf, self._pos).end()
+        if start == len(buf):
+            if self._eof:
+                raise StopIteration()
+            self._fill()
+            return None
+        if buf[start:start + 1] == self._grammar.quote:
+            return self._read_string()
+        end = self._grammar.run.match(buf, start).end()
+        if end == len(buf) and not self._eof:
+            self._fill()
+            return None
+        self._raise_error(buf[start:end + 1], self._offset + start)
+
+    def _read_string(self):
+        self._string_start = self._offset + self._pos
+        self._pos += 1
+        self._parts = []
+        return self._continue_string()
+
+    def _continue_string(self):
+        self._resume = self._continue_string
+        parts = self._parts
+        while True:
+            buf = self._buf
+            end = self._grammar.string_body.match(buf, self._pos).end()
+            parts.append(buf[self._pos:end])
+            self._pos = end
+            if buf[end:end + 1] == self._grammar.quote:
+                self._pos += 1
+                break
+            if self._eof:
+                self._resume = None
+                self._raise_error(self._grammar.quote + self._grammar.empty.join(parts) + buf[end:], self._string_start)
+            # end of block, or a backslash whose escaped character is in the next one
+            self._fill()
+        self._parts = None
+        self._resume = self._next_after_string
+        value = self._grammar.empty.join(parts)
+        if self._grammar.backslash in value:
+            return TokenType.STRING, self._unescape(value, self._string_start)
+        return TokenType.STRING, self._grammar.decode(value)
+
+    def _check_string_end(self):
+        while self._pos == len(self._buf) and not self._eof:
+            self._fill()
+        self._resume = None
+        if self._pos < len(self._buf) and not self._grammar.delimiter.match(self._buf, self._pos):
+            char = self._grammar.decode(self._buf[self._pos:self._pos + 1])
+            raise ValueError(
+                "Expected whitespace or an operator after string.  Got '{}' at index {}".format(char, self.position)
+            )
+
+    def _next_after_string(self):
+        self._check_string_end()
+        return next(self)
+
+    def _unescape(self, raw, start):
+        try:
+            value, _ = scanstring(self._grammar.decode(raw) + '"', 0, False)
+        except ValueError:
+            value = None
+        if value is None or _SURROGATE.search(value):
+            # invalid escapes and UTF-16 surrogates are left to the reference tokenizer
+            quote = self._grammar.quote
+            value = self._replay(quote + raw + quote + self._lookahead(), start)
+        return value
+
+    def _lookahead(self, size=16):
+        while len(self._buf) - self._pos < size and not self._eof:
+            self._fill()
+        return self._buf[self._pos:self._pos + size]
+
+    def _replay(self, text, start):
+        if isinstance(text, bytes):
+            text = text.decode('utf-8', 'replace')
+        try:
+            for token_type, value in tokenize(StringIO(text)):
+                return value
+        except ValueError as e:
+            message = _INDEX.sub(lambda m: f' at index {int(m.group(1)) + start}', e.args[0])
+            raise ValueError(message) from None
+        raise ValueError(f"Invalid JSON at index {start}")  # pragma: no cover
+
+    def _raise_error(self, text, start):
+        self._replay(text, start)
+        # only reachable in binary mode, which doesn't treat non-ASCII whitespace as whitespace
+        raise ValueError(f"Invalid JSON character at index {start}")
+
+
+__all__ = ['BlockTokenizer']
@@ -0,0 +1,239 @@
+"""
+Load a list of records into columns
+
+:func:`load_columns` reads the objects of a list (or of lists, see
+:mod:`json_stream.paths`) straight from the token stream, without building an
+object for each of them, and appends each of their fields to a
+:class:`Column`. Columns of ints, floats or booleans are stored in
+:class:`array.array` buffers, which can be used as numpy arrays without
+copying them, if numpy is available.
+"""
+from array import array
+
+from json_stream.base import StreamingJSONBase, StreamingJSONList, StreamingJSONObject
+from json_stream.iterators import ensure_file
+from json_stream.select_tokenizer import default_tokenizer
+from json_stream.selector import Selector, _skip_rest
+from json_stream.tokenizer import TokenType
+from json_stream.util import to_standard_types
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+_TYPES = {'b': bool, 'q': int, 'd': float}
+_TYPECODES = {bool: 'b', int: 'q', float: 'd'}
+
+
+def _exact_float(value):
+    """Whether an int can be held exactly by a float"""
+    try:
+        return float(value) == value
+    except OverflowError:
+        return False
+
+
+class Column:
+    """
+    The values of one field of a list of records, with ``None`` for records
+    that don't have it, or where it is null.
+
+    ``values`` is an :class:`array.array` of int64s (``'q'``), float64s
+    (``'d'``) or booleans (``'b'``) while every value is of the same type
+    (ints are promoted to floats alongside floats, if they can be held
+    exactly), or else a list. ``mask`` is
+    None if there are no nulls, or a bytearray with a 1 for every null, whose
+    place in ``values`` is taken by a 0.
+    """
+    def __init__(self):
+        self.values = []
+        self.mask = None
+        self._typecode = None
+        self._generic = False  # whether the values are a list because they aren't all of one type
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        if self.mask is not None and self.mask[i]:
+            return None
+        value = self.values[i]
+        return bool(value) if self._typecode == 'b' else value
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def append(self, value):
+        typecode = self._typecode
+        if value is None:
+            if self.mask is None:
+                self.mask = bytearray(len(self.values))
+            self.mask.append(1)
+            self.values.append(None if typecode is None else 0)
+            return
+        if self.mask is not None:
+            self.mask.append(0)
+        value_type = type(value)
+        if typecode is None:
+            if self._generic or value_type not in _TYPECODES:
+                self._generic = True
+            else:
+                # the first value that isn't null
+                self._typecode = typecode = _TYPECODES[value_type]
+                self.values = array(typecode, bytes(len(self.values) * array(typecode).itemsize))
+        elif value_type is not _TYPES[typecode]:
+            if typecode == 'd' and value_type is int and _exact_float(value):
+                value = float(value)
+            elif typecode == 'q' and value_type is float and all(_exact_float(v) for v in self.values):
+                self._typecode = 'd'
+                self.values = array('d', self.values)
+            else:
+                self._to_list()
+        try:
+            self.values.append(value)
+        except OverflowError:
+            # an int too big for int64
+            self._to_list()
+            self.values.append(value)
+
+    def _to_list(self):
+        self.values = self.to_list()
+        self._typecode = None
+        self._generic = True
+
+    def to_list(self):
+        """The values as a list, with None for nulls"""
+        if self._typecode is None:
+            return list(self.values)
+        values = list(map(bool, self.values)) if self._typecode == 'b' else self.values.tolist()
+        if self.mask is not None:
+            for i, null in enumerate(self.mask):
+                if null:
+                    values[i] = None
+        return values
+
+    def to_numpy(self):
+        """
+        The values as a numpy array (or a masked array, if there are nulls),
+        which shares its memory with the column's array, if it has one
+        """
+        if numpy is None:
+            raise ValueError("Cannot convert a column to a numpy array without the numpy package")
+        if self._typecode is None:
+            values = numpy.empty(len(self.values), dtype=object)
+            values[:] = self.values
+        else:
+            dtype = {'b': numpy.bool_, 'q': numpy.int64, 'd': numpy.float64}[self._typecode]
+            values = numpy.frombuffer(self.values, dtype=dtype)
+        if self.mask is None:
+            return values
+        return numpy.ma.MaskedArray(values, mask=numpy.frombuffer(self.mask, dtype=numpy.bool_))
+
+    def __repr__(self):  # pragma: no cover
+        return f"{type(self).__name__}({self.to_list()!r})"
+
+
+class _Columns:
+    """Columns being filled from the records of lists"""
+    def __init__(self, names):
+        self.fixed = names is not None
+        self.columns = {name: Column() for name in names or ()}
+        self.rows = 0
+
+    def read_list(self, token_stream):
+        """Read the records of a list whose ``[`` has been read"""
+        skip_value = getattr(token_stream, 'skip_value', None)
+        try:
+            token_type, token = next(token_stream)
+            if token_type == TokenType.OPERATOR and token == ']':
+                return
+            while True:
+                if token_type != TokenType.OPERATOR or token != '{':
+                    raise ValueError(f"Expecting an object, got {token}")
+                self._read_record(token_stream, skip_value)
+                token_type, token = next(token_stream)
+                if token_type == TokenType.OPERATOR and token == ']':
+                    return
+                if token_type != TokenType.OPERATOR or token != ',':
+                    raise ValueError(f"Expecting comma or ], got {token}")
+                token_type, token = next(token_stream)
+        except StopIteration:
+            raise ValueError(StreamingJSONList.INCOMPLETE_ERROR) from None
+
+    def _read_record(self, token_stream, skip_value):
+        columns, row = self.columns, self.rows
+        filled = 0
+        try:
+            token_type, k = next(token_stream)
+            if token_type != TokenType.OPERATOR or k != '}':
+                while True:
+                    if token_type != TokenType.STRING:
+                        raise ValueError(f"Expecting string, comma or }}, got {k} ({token_type})")
+                    token_type, token = next(token_stream)
+                    if token_type != TokenType.OPERATOR or token != ':':
+                        raise ValueError("Expecting :")
+                    column = columns.get(k)
+                    if column is None and not self.fixed:
+                        column = columns[k] = Column()
+                        for _ in range(row):
+                            column.append(None)
+                    if column is None:
+                        if skip_value is None or not skip_value():
+                            _skip_rest(token_stream, *next(token_stream))
+                    else:
+                        token_type, value = next(token_stream)
+                        if token_type == TokenType.OPERATOR:
+                            if value not in '{[':
+                                raise ValueError(f"Unknown operator {value}")
+                            value = to_standard_types(StreamingJSONBase.factory(value, token_stream, persistent=False))
+                        if len(column) == row:  # a repeated key keeps its first value
+                            column.append(value)
+                            filled += 1
+                    token_type, token = next(token_stream)
+                    if token_type == TokenType.OPERATOR and token == '}':
+                        break
+                    if token_type != TokenType.OPERATOR or token != ',':
+                        raise ValueError(f"Expecting comma or }}, got {token}")
+                    token_type, k = next(token_stream)
+        except StopIteration:
+            raise ValueError(StreamingJSONObject.INCOMPLETE_ERROR) from None
+        self.rows = row = row + 1
+        if filled < len(columns):
+            for column in columns.values():
+                if len(column) < row:
+                    column.append(None)
+
+
+class _RecordLists(Selector):
+    """Selector that reads the lists it matches into columns, rather than yielding them"""
+    def __init__(self, path, columns):
+        super().__init__(path)
+        self._columns = columns
+
+    def _select(self, token_stream, token_type, token, state, path, persistent, read_raw):
+        if not state.matches:
+            yield from super()._select(token_stream, token_type, token, state, path, persistent, read_raw)
+            return
+        if token_type != TokenType.OPERATOR or token != '[':
+            raise ValueError(f"Expecting a list of records at {path}, got {token}")
+        self._columns.read_list(token_stream)
+        yield path, None
+
+
+def load_columns(fp_or_iterable, path="", columns=None, tokenizer=default_tokenizer, **tokenizer_kwargs):
+    """
+    Read the objects in the list at ``path`` (as for :func:`json_stream.select`,
+    by default the document itself) into a dict of :class:`Column`, one for each
+    of the names in ``columns``, or for every key found if it is None. Other
+    keys are skipped. Objects and lists in a column are converted to standard
+    python types.
+
+    Every list the path matches, in every document of the stream, is read into
+    the same columns.
+    """
+    result = _Columns(columns)
+    fp = ensure_file(fp_or_iterable)
+    for _ in _RecordLists(path, result).select(fp, False, tokenizer, False, **tokenizer_kwargs):
+        pass
+    return result.columns
@@ -0,0 +1,120 @@
+"""
+Transparent decompression of compressed JSON streams
+
+Compressed data is recognised by its magic bytes, which can never start a JSON
+document, and is decompressed a chunk at a time as it is read. gzip, bz2 and xz
+are supported using the standard library, and zstd when either
+``compression.zstd`` (python 3.14+) or the ``zstandard`` package is available.
+"""
+import bz2
+import lzma
+import zlib
+
+try:
+    from compression import zstd
+except ImportError:  # pragma: no cover
+    zstd = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+DECOMPRESS_CHUNK_SIZE = 64 * 1024
+
+MAGIC_LENGTH = 6
+
+
+class _Gzip:
+    """zlib decompressor with the interface of the bz2 and lzma decompressors"""
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+    @property
+    def eof(self):
+        return self._decompressor.eof
+
+    @property
+    def needs_input(self):
+        return not self._decompressor.unconsumed_tail
+
+    @property
+    def unused_data(self):
+        return self._decompressor.unused_data
+
+    def decompress(self, data, max_length=-1):
+        decompressor = self._decompressor
+        return decompressor.decompress(decompressor.unconsumed_tail + data, max(max_length, 0))
+
+
+class _Zstandard:
+    """zstandard decompressor with the interface of the bz2 and lzma decompressors"""
+    needs_input = True  # all the output is produced at once
+
+    def __init__(self):
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    @property
+    def eof(self):
+        return self._decompressor.eof
+
+    @property
+    def unused_data(self):
+        return self._decompressor.unused_data
+
+    def decompress(self, data, max_length=-1):
+        return self._decompressor.decompress(data)
+
+
+def _zstd():
+    if zstd is not None:
+        return zstd.ZstdDecompressor()
+    if zstandard is not None:
+        return _Zstandard()
+    raise ValueError("Cannot read zstd compressed data without the zstandard package")
+
+
+_FORMATS = (
+    (b'\x1f\x8b', _Gzip),
+    (b'BZh', bz2.BZ2Decompressor),
+    (b'\xfd7zXZ\x00', lzma.LZMADecompressor),
+    (b'\x28\xb5\x2f\xfd', _zstd),
+)
+
+# the first byte of any compressed data
+MAGIC_FIRST_BYTES = frozenset(magic[0] for magic, _ in _FORMATS)
+
+
+def detect(head):
+    """
+    Return a factory of decompressors for data that starts with ``head`` (at
+    least :data:`MAGIC_LENGTH` bytes, unless the data is shorter), or None if
+    the data isn't compressed.
+    """
+    for magic, new_decompressor in _FORMATS:
+        if head.startswith(magic):
+            return new_decompressor
+    return None
+
+
+def decompressed(read, new_decompressor, chunk_size=DECOMPRESS_CHUNK_SIZE):
+    """
+    Iterate over the decompressed chunks of compressed data, which is read with
+    ``read(chunk_size)``. Each chunk is at most ``chunk_size`` bytes, where the
+    decompressor supports limiting its output. Concatenated compressed streams
+    (e.g. multi-member gzip files) are decompressed one after another.
+    """
+    decompressor = new_decompressor()
+    while True:
+        if decompressor.eof:
+            data = decompressor.unused_data or read(chunk_size)
+            if not data:
+                return
+            decompressor = new_decompressor()
+        elif decompressor.needs_input:
+            data = read(chunk_size)
+            if not data:
+                raise EOFError("Compressed data ended before the end-of-stream marker was reached")
+        else:
+            data = b''
+        yield decompressor.decompress(data, chunk_size)
@@ -1,15 +1,59 @@
+import copy
 import json
+import json.encoder
 
 from json_stream import to_standard_types
-from json_stream.base import StreamingJSONBase
+from json_stream.base import StreamingJSONBase, StreamingJSONObject
+from json_stream.writer import StreamableDict, StreamableList
 
 _original_default = json.JSONEncoder().default
 
 
+class _StreamingValue(Exception):
+    """Raised to stop the C encoder at the first json-stream object or list, to start again lazily"""
+
+
 class JSONStreamEncoder(json.JSONEncoder):
+    """
+    Encoder for json-stream objects and lists.
+
+    Used as the encoder (``cls=JSONStreamEncoder``), objects and lists are
+    encoded lazily as they are read, so transient data is written out with
+    memory proportional only to its depth. The pure python encoder is used
+    for this, as the C encoder can't encode lists and objects lazily, so data
+    with no json-stream objects in it is still encoded by the C encoder.
+    Elsewhere (``default=default``, or as a context manager), they are first
+    converted to standard python types.
+    """
+    # set on the copy of the encoder iterencode() makes for each call, so default() knows whether the C encoder or
+    # the lazy pure python one is calling it
+    _probing = False
+    _lazy = False
+
+    def iterencode(self, o, _one_shot=False):
+        if _one_shot and json.encoder.c_make_encoder is not None and self.indent is None:
+            # the C encoder is tried first, as the data may not contain any json-stream objects
+            encoder = copy.copy(self)
+            encoder._probing = True
+            try:
+                return json.JSONEncoder.iterencode(encoder, o, _one_shot)
+            except _StreamingValue:
+                pass
+        encoder = copy.copy(self)
+        encoder._lazy = True
+        return json.JSONEncoder.iterencode(encoder, o, _one_shot=False)
+
     def default(self, obj):
         if isinstance(obj, StreamingJSONBase):
-            return to_standard_types(obj)
+            if self._probing:
+                raise _StreamingValue()  # nothing has been read from it yet
+            if not self._lazy:
+                return to_standard_types(obj)
+            if isinstance(obj, StreamingJSONObject):
+                if self.sort_keys:
+                    return to_standard_types(obj)  # sorting needs all the items at once
+                return StreamableDict(obj.items())
+            return StreamableList(obj)
         return _original_default(obj)
 
     def __enter__(self):
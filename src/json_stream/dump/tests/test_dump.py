@@ -1,6 +1,7 @@
 import json
+import json.encoder
 from io import StringIO
-from unittest import TestCase
+from unittest import TestCase, mock, skipIf
 
 import json_stream
 from json_stream.dump import default, JSONStreamEncoder
@@ -43,3 +44,68 @@ class TestDump(TestCase):
 
     def _assert_json_okay(self, value):
         self.assertEqual('{"count": 3, "results": ["a", "b", "c"]}', value)
+
+
+class TestLazyDump(TestCase):
+    DATA = {"count": 3, "results": [{"id": 1, "tags": ["a", "b"]}, {"id": 2, "tags": []}, {}], "empty": []}
+
+    def load(self, persistent=False, chunk_size=4):
+        self.chunks_read = 0
+        data = json.dumps(self.DATA)
+
+        def chunks():
+            for i in range(0, len(data), chunk_size):
+                self.chunks_read += 1
+                yield data[i:i + chunk_size]
+        return json_stream.load(chunks(), persistent=persistent)
+
+    def test_dump_transient(self):
+        for kwargs in ({}, {"indent": 2}, {"separators": (",", ":")}, {"sort_keys": True}):
+            with self.subTest(**kwargs):
+                out = StringIO()
+                json.dump(self.load(), out, cls=JSONStreamEncoder, **kwargs)
+                self.assertEqual(out.getvalue(), json.dumps(self.DATA, **kwargs))
+                self.assertEqual(json.dumps(self.load(), cls=JSONStreamEncoder, **kwargs), out.getvalue())
+
+    def test_dump_persistent(self):
+        data = self.load(persistent=True)
+        self.assertEqual(json.dumps(data["count"]), "3")
+        self.assertEqual(json.dumps(data, cls=JSONStreamEncoder), json.dumps(self.DATA))
+        # the values are still there to be encoded again
+        self.assertEqual(json.dumps(data, cls=JSONStreamEncoder), json.dumps(self.DATA))
+
+    def test_encoded_as_read(self):
+        data = self.load()
+        chunks = JSONStreamEncoder().iterencode(data)
+        output = next(chunks)
+        while '"results"' not in output:
+            output += next(chunks)
+        # the output has started before the input has been read
+        self.assertLess(self.chunks_read, 10)
+        output += "".join(chunks)
+        self.assertEqual(output, json.dumps(self.DATA))
+
+    def test_transient_already_read(self):
+        data = self.load()
+        self.assertEqual(data["count"], 3)
+        with self.assertRaises(json_stream.base.TransientAccessException):
+            json.dumps(data, cls=JSONStreamEncoder)
+
+    def test_nested_in_plain_data(self):
+        data = {"before": [1, 2], "data": self.load(), "after": None}
+        expected = json.dumps(dict(data, data=self.DATA))
+        self.assertEqual(json.dumps(data, cls=JSONStreamEncoder), expected)
+
+    @skipIf(json.encoder.c_make_encoder is None, "the C encoder is not available")
+    def test_plain_data_uses_c_encoder(self):
+        encoder = JSONStreamEncoder()
+        self.assertEqual(json.dumps(self.load(), cls=JSONStreamEncoder), json.dumps(self.DATA))
+        self.assertEqual(encoder.encode(self.load()), json.dumps(self.DATA))
+        with mock.patch("json.encoder._make_iterencode", side_effect=AssertionError("pure python encoder used")):
+            for kwargs in ({}, {"sort_keys": True}, {"separators": (",", ":")}):
+                with self.subTest(**kwargs):
+                    output = json.dumps(self.DATA, cls=JSONStreamEncoder, **kwargs)
+                    self.assertEqual(output, json.dumps(self.DATA, **kwargs))
+            self.assertEqual(encoder.encode(self.DATA), json.dumps(self.DATA))
+        # encoding lazily doesn't change how the encoder's default() converts values later
+        self.assertEqual(encoder.default(self.load()), self.DATA)
@@ -1,3 +1,4 @@
+import gzip
 import io
 import json
 from itertools import zip_longest
@@ -61,6 +62,24 @@ class TestLoad(TestCase):
 
         self._assertDataOkay(data)
 
+    def test_load_prefetch(self):
+        response = self._create_mock_response()
+
+        # read ahead in the background
+        data = load(response, persistent=True, prefetch=4)
+
+        self._assertDataOkay(data)
+
+    def test_load_compressed(self):
+        # e.g. a .json.gz file, which is not decoded by the client
+        compressed = gzip.compress(json.dumps({"a": "a" * io.DEFAULT_BUFFER_SIZE, "b": "b"}).encode())
+        response = Mock()
+        response.iter_bytes.return_value = (compressed[i:i + 1024] for i in range(0, len(compressed), 1024))
+
+        data = load(response)
+
+        self._assertDataOkay(data)
+
     def test_visitor(self):
         response = self._create_mock_response()
 
@@ -72,6 +91,17 @@ class TestLoad(TestCase):
             ('b', ('b',)),
         ], visited)
 
+    def test_visitor_prefetch(self):
+        response = self._create_mock_response()
+
+        visited = []
+        visit(response, lambda item, path: visited.append((item, path)), prefetch=2)
+
+        self.assertListEqual([
+            ('a' * io.DEFAULT_BUFFER_SIZE, ('a',)),
+            ('b', ('b',)),
+        ], visited)
+
     def test_load_many(self):
         expected = [{
             "a": "a" * io.DEFAULT_BUFFER_SIZE,
@@ -0,0 +1,240 @@
+"""
+Sidecar indexes of the elements of large JSON files
+
+:func:`build` reads a file once, skipping over its values without parsing
+them, and writes the byte offsets at which they start to a sidecar file next
+to it: either the elements of a top-level list, or each document of a file
+of many documents (e.g. NDJSON). :func:`open` reads the index back, after
+which any element (or range of elements) can be loaded without reading the
+file up to it.
+
+With ``every=k``, only every ``k``-th offset is stored, and up to ``k - 1``
+elements are skipped over to reach the others.
+
+An index records the size and modification time of the file it was built
+from, and is refused once the file has changed.
+"""
+import io
+import os
+import struct
+import sys
+from array import array
+from itertools import islice
+
+from json_stream.base import StreamingJSONBase
+from json_stream.block_tokenizer import BlockTokenizer
+from json_stream.loader import load_many
+from json_stream.select_tokenizer import default_tokenizer
+from json_stream.tokenizer import TokenType
+
+INDEX_SUFFIX = '.jsidx'
+
+_MAGIC = b'JSIDX\x00\x00\x01'
+# magic, documents, every, size and mtime of the file, number of elements
+_HEADER = struct.Struct('<8sIIqqq')
+
+
+class StaleIndexError(Exception):
+    pass
+
+
+def _expect_end(tokens):
+    for token_type, token in tokens:
+        raise ValueError(f"Expecting end of file after list, got {token}; use documents=True to index many documents")
+
+
+def _element_starts(tokens):
+    # the offset of each element of a list whose opening bracket has been read
+    first = True
+    while True:
+        start = tokens.position
+        if not tokens.skip_value():
+            token_type, token = next(tokens)
+            if not first or token_type != TokenType.OPERATOR or token != ']':
+                raise ValueError(f"Expecting value, got {token}")
+            break
+        yield start
+        first = False
+        try:
+            token_type, token = next(tokens)
+        except StopIteration:
+            raise ValueError("Unterminated list at end of file") from None
+        if token_type == TokenType.OPERATOR and token == ']':
+            break
+        if token_type != TokenType.OPERATOR or token != ',':
+            raise ValueError(f"Expecting comma or ], got {token}")
+    _expect_end(tokens)
+
+
+def _document_starts(tokens, first):
+    # the offset of each document in a file whose first token has been read
+    if first is not None:
+        token_type, token = first
+        if token_type == TokenType.OPERATOR:
+            if token not in '{[':
+                raise ValueError(f"Unknown operator {token}")
+            tokens.skip_to_end()
+        yield 0
+    while True:
+        start = tokens.position
+        if not tokens.skip_value():
+            for token_type, token in tokens:
+                raise ValueError(f"Expecting value, got {token}")
+            return
+        yield start
+
+
+def _scan(f, documents=None, buffer_size=64 * 1024):
+    """Return whether ``f`` is indexed by documents, and the offsets of its elements or documents"""
+    tokens = BlockTokenizer(f, buffer_size, binary=True)
+    first = next(tokens, None)
+    is_list = first == (TokenType.OPERATOR, '[')
+    if documents is None:
+        documents = not is_list
+    if documents:
+        return True, _document_starts(tokens, first)
+    if is_list:
+        return False, _element_starts(tokens)
+    raise ValueError(f"Expecting a list, got {first and first[1]}")
+
+
+def _items_from(f, offset, documents, persistent=False, tokenizer=default_tokenizer, **tokenizer_kwargs):
+    """The elements (or documents) of ``f`` from the one at ``offset`` on"""
+    f.seek(offset)
+    if documents:
+        return load_many(f, persistent, tokenizer, **tokenizer_kwargs)
+    # the rest of the top-level list, from the element at the offset
+    items = StreamingJSONBase.factory('[', tokenizer(f, **tokenizer_kwargs), persistent=False)
+    if persistent:
+        items.persistent()
+    return iter(items)
+
+
+def _index_path(path, index_path):
+    return os.fspath(path) + INDEX_SUFFIX if index_path is None else index_path
+
+
+def build(path, index_path=None, every=1, documents=None, buffer_size=64 * 1024):
+    """
+    Index the file at ``path``, writing the index to ``index_path`` (by default
+    ``path`` + ``".jsidx"``), and return it opened.
+
+    A file that starts with a list is indexed by the elements of that list,
+    and any other file by its documents, unless ``documents`` says otherwise.
+    """
+    if every < 1:
+        raise ValueError("every must be at least 1")
+    offsets = array('q')
+    count = 0
+    with io.open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        documents, starts = _scan(f, documents, buffer_size)
+        for start in starts:
+            if count % every == 0:
+                offsets.append(start)
+            count += 1
+    index = Index(path, offsets, count, every, documents, stat.st_size, stat.st_mtime_ns)
+    index.save(index_path)
+    return index
+
+
+def open(path, index_path=None, rebuild=False):
+    """
+    Open the index of the file at ``path``, raising :exc:`StaleIndexError` if
+    the file has changed since it was built. With ``rebuild=True``, a missing
+    or stale index is (re)built instead.
+    """
+    try:
+        with io.open(_index_path(path, index_path), 'rb') as f:
+            magic, documents, every, size, mtime_ns, count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError("Not a json-stream index")
+            offsets = array('q')
+            offsets.frombytes(f.read())
+    except FileNotFoundError:
+        if not rebuild:
+            raise
+        return build(path, index_path)
+    if sys.byteorder == 'big':  # pragma: no cover
+        offsets.byteswap()
+    index = Index(path, offsets, count, every, bool(documents), size, mtime_ns)
+    try:
+        index.check()
+    except StaleIndexError:
+        if not rebuild:
+            raise
+        return build(path, index_path, index.every, index.documents)
+    return index
+
+
+class Index:
+    """
+    Offsets of the elements of a list (or of the documents) in a file, every
+    ``every`` elements, which can be used to load any element directly.
+
+    Elements are loaded from a file that is shared by everything loaded with
+    the index, so, as with :func:`json_stream.load_many`, each element must be
+    finished with before the next one is loaded.
+    """
+    def __init__(self, path, offsets, count, every, documents, size, mtime_ns):
+        self.path = path
+        self.offsets = offsets
+        self.count = count
+        self.every = every
+        self.documents = documents
+        self._size = size
+        self._mtime_ns = mtime_ns
+        self._file = None
+
+    def check(self):
+        """Raise :exc:`StaleIndexError` if the file has changed since the index was built"""
+        stat = os.stat(self.path)
+        if stat.st_size != self._size or stat.st_mtime_ns != self._mtime_ns:
+            raise StaleIndexError(f"{self.path} has changed since it was indexed")
+
+    def save(self, index_path=None):
+        offsets = self.offsets
+        if sys.byteorder == 'big':  # pragma: no cover
+            offsets = array('q', offsets)
+            offsets.byteswap()
+        with io.open(_index_path(self.path, index_path), 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, self.documents, self.every, self._size, self._mtime_ns, self.count))
+            f.write(offsets.tobytes())
+
+    def __len__(self):
+        return self.count
+
+    def load_many(self, start=0, stop=None, persistent=False, tokenizer=default_tokenizer, **tokenizer_kwargs):
+        """Yield the elements from ``start`` up to (not including) ``stop``, as :func:`json_stream.load` would"""
+        start, stop, _ = slice(start, stop).indices(self.count)
+        if start >= stop:
+            return
+        skip = start % self.every
+        if self._file is None:
+            self.check()
+            self._file = io.open(self.path, 'rb')
+        offset = self.offsets[start // self.every]
+        items = _items_from(self._file, offset, self.documents, persistent, tokenizer, **tokenizer_kwargs)
+        yield from islice(items, skip, skip + stop - start)
+
+    def load(self, n, persistent=False, tokenizer=default_tokenizer, **tokenizer_kwargs):
+        """Load the ``n``-th element"""
+        if not -self.count <= n < self.count:
+            raise IndexError(f"Index {n} out of range")
+        n %= self.count
+        return next(self.load_many(n, n + 1, persistent, tokenizer, **tokenizer_kwargs))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):  # pragma: no cover
+        kind = 'documents' if self.documents else 'elements'
+        return f"<{type(self).__name__}: {self.path}, {self.count} {kind}, every {self.every}>"
@@ -0,0 +1,215 @@
+"""
+Indexed mode: random access to seekable files without keeping values in memory
+
+Objects and lists loaded in indexed mode can be revisited like persistent
+ones, but instead of keeping the values they have read, they only record the
+byte offset at which each value starts. Revisiting a value seeks back to its
+offset and parses just that value again (lazily, if it is an object or list),
+so the memory used is proportional to the number of values rather than to
+their size.
+
+Offsets are byte offsets, so the input must be a seekable binary file (or a
+memory-mapped one), which is read with
+:class:`~json_stream.block_tokenizer.BlockTokenizer` in binary mode.
+"""
+import io
+from abc import ABC
+from array import array
+from typing import Any, Mapping, Sequence
+
+from json_stream.base import StreamingJSONBase, StreamingJSONList, StreamingJSONObject
+from json_stream.block_tokenizer import BlockTokenizer, DEFAULT_BUFFER_SIZE
+from json_stream.iterators import map_file
+from json_stream.tokenizer import TokenType
+
+
+class _Window(io.RawIOBase):
+    """
+    The bytes of ``file`` from ``start`` up to ``end`` (or the end of the
+    file), read without moving the position of ``file``.
+    """
+    def __init__(self, file, start, end=None):
+        self._file = file
+        self._pos = start
+        self._end = end
+
+    def readinto(self, buffer):
+        size = len(buffer) if self._end is None else min(len(buffer), self._end - self._pos)
+        if size <= 0:
+            return 0
+        file = self._file
+        position = file.tell()
+        file.seek(self._pos)
+        data = file.read(size)
+        file.seek(position)
+        length = len(data)
+        memoryview(buffer)[:length] = data
+        self._pos += length
+        return length
+
+    def readable(self):
+        return True
+
+
+def _container(token, token_stream, file, base):
+    if token == '{':
+        return IndexedStreamingJSONObject(token_stream, file, base)
+    if token == '[':
+        return IndexedStreamingJSONList(token_stream, file, base)
+    raise ValueError(f"Unknown operator {token}")
+
+
+class IndexedStreamingJSONBase(StreamingJSONBase, ABC):
+    def __init__(self, token_stream, file, base):
+        super().__init__(token_stream)
+        self._file = file
+        self._base = base  # offset in the file of the token stream's position 0
+        self._starts = array('q')  # offset of each value in the file
+        self._end = None  # offset just after this object or list, once it has been read
+        self._persistent_children = True
+
+    def factory(self, token, token_stream, persistent, fields=None):
+        return _container(token, token_stream, self._file, self._base)
+
+    def _position(self):
+        return self._base + self._stream.position
+
+    def _done(self):
+        self._end = self._position()
+        super()._done()
+
+    def _load_indexed(self, start, token=None):
+        self._starts.append(start)
+        return self._load_value(token)
+
+    def _revisit(self, i):
+        """Parse the ``i``-th value again from the file"""
+        if i == len(self._starts) - 1 and self._child is not None:
+            return self._child  # still being read from the stream
+        start = self._starts[i]
+        end = self._starts[i + 1] if i + 1 < len(self._starts) else self._end
+        token_stream = BlockTokenizer(_Window(self._file, start, end), binary=True)
+        token_type, v = next(token_stream)
+        if token_type == TokenType.OPERATOR:
+            return _container(v, token_stream, self._file, start)
+        return v
+
+    def _iter_all(self, revisit, items=None):
+        # values that have been indexed are revisited, then the rest are read from the stream
+        items = items or self._iter_items()
+        i = 0
+        while True:
+            if i < len(self._starts):
+                yield revisit(i)
+            else:
+                try:
+                    yield next(items)
+                except StopIteration:
+                    return
+            i += 1
+
+    def __len__(self) -> int:
+        self.read_all()
+        return len(self._starts)
+
+    def __repr__(self):  # pragma: no cover
+        return f"<{type(self).__name__}: {len(self._starts)} indexed, {'STREAMING' if self.streaming else 'DONE'}>"
+
+
+@Sequence.register
+class IndexedStreamingJSONList(IndexedStreamingJSONBase, StreamingJSONList):
+    def _load_item(self):
+        self._clear_child()
+        start = self._position()
+        token_type, v = next(self._stream)
+        if token_type == TokenType.OPERATOR:
+            if v == ']':
+                self._done()
+            if v == ',':
+                start = self._position()
+                token_type, v = next(self._stream)
+            elif v not in '{[':
+                raise ValueError(f"Expecting value, comma or ], got {v}")
+        self._index += 1
+        return self._load_indexed(start, (token_type, v))
+
+    def __iter__(self):
+        return self._iter_all(self._revisit)
+
+    def __getitem__(self, i) -> Any:
+        if i < 0:
+            self.read_all()
+            i += len(self._starts)
+            if i < 0:
+                raise IndexError(f"Index {i - len(self._starts)} out of range")
+        if i < len(self._starts):
+            return self._revisit(i)
+        for v in self._iter_items():
+            if self._index == i:
+                return v
+        raise IndexError(f"Index {i} out of range")
+
+
+@Mapping.register
+class IndexedStreamingJSONObject(IndexedStreamingJSONBase, StreamingJSONObject):
+    def __init__(self, token_stream, file, base):
+        super().__init__(token_stream, file, base)
+        self._names = []  # key of each value
+        self._keys = {}  # key: index of its value
+
+    def _load_item(self):
+        self._clear_child()
+        k = self._load_key()
+        self._keys[k] = len(self._starts)
+        self._names.append(k)
+        return k, self._load_indexed(self._position())
+
+    def items(self):
+        return self._iter_all(lambda i: (self._names[i], self._revisit(i)))
+
+    def keys(self):
+        return self._iter_all(self._names.__getitem__, (k for k, v in self._iter_items()))
+
+    def values(self):
+        return self._iter_all(self._revisit, (v for k, v in self._iter_items()))
+
+    def __iter__(self):
+        return self.keys()
+
+    def __contains__(self, k):
+        try:
+            self[k]
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, k) -> Any:
+        i = self._keys.get(k)
+        if i is not None:
+            return self._revisit(i)
+        return self._find_item(k)
+
+
+def load_many(fp, mmap=False, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Load each of the JSON documents in a seekable binary file (or the file at
+    the path, with ``mmap=True``) in indexed mode.
+    """
+    if mmap:
+        fp = map_file(fp)
+    if not isinstance(fp.read(0), bytes) or not fp.seekable():
+        raise ValueError("Indexed mode requires a seekable binary file")
+    token_stream = BlockTokenizer(fp, buffer_size, binary=True)
+    base = fp.tell() - token_stream.position
+    for token_type, token in token_stream:
+        if token_type == TokenType.OPERATOR:
+            data = _container(token, token_stream, fp, base)
+            yield data
+            data.read_all()
+        else:
+            yield token
+
+
+def load(fp, mmap=False, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Load the JSON document in a seekable binary file in indexed mode"""
+    return next(load_many(fp, mmap, buffer_size))
@@ -1,10 +1,28 @@
 import io
+import mmap
+import os
+import queue
+import threading
+
+from json_stream import compression
+
+PREFETCH_CHUNK_SIZE = 64 * 1024
 
 
 class IterableStream(io.RawIOBase):
+    """
+    Binary stream of the chunks produced by an iterable.
+
+    Reads never span more than one chunk, so a chunk is only requested from the
+    iterable once everything before it has been read. Chunks are read through a
+    memoryview, so partially reading one doesn't copy the rest of it.
+    """
     def __init__(self, iterable):
         self.iterator = iter(iterable)
-        self.remainder = None  # type: bytes | None
+        self._chunk = b''
+        self._view = memoryview(self._chunk)
+        self._offset = 0  # position in the current chunk
+        self._coalesced = bytearray()  # reused to join chunks for peek()
 
     def _normalize_chunk(self, chunk):
         # Ensure chunk is bytes for writing into a binary buffer
@@ -12,22 +30,238 @@ class IterableStream(io.RawIOBase):
             return chunk.encode()
         return chunk
 
-    def readinto(self, buffer):
+    def _set_chunk(self, chunk):
+        self._view.release()
+        self._chunk = chunk
+        self._view = memoryview(chunk).cast('B')
+        self._offset = 0
+
+    def _next_chunk(self):
         try:
-            # Wrap `buffer: WriteableBuffer` in memoryview to ensure len() and slicing
-            mv = memoryview(buffer)
-            chunk = self.remainder or self._normalize_chunk(next(self.iterator))
-            length = min(len(mv), len(chunk))
-            mv[:length], self.remainder = chunk[:length], chunk[length:]
-            return length
+            while True:
+                chunk = self._normalize_chunk(next(self.iterator))
+                if len(chunk):
+                    return chunk
         except StopIteration:
-            return 0    # indicate EOF
+            return None
+
+    def _available(self):
+        # number of unread bytes in the current chunk, moving on to the next chunk if it is used up
+        remaining = len(self._view) - self._offset
+        if not remaining:
+            chunk = self._next_chunk()
+            if chunk is None:
+                return 0
+            self._set_chunk(chunk)
+            remaining = len(self._view)
+        return remaining
+
+    def readinto(self, buffer):
+        # Wrap `buffer: WriteableBuffer` in memoryview to ensure len() and slicing
+        mv = memoryview(buffer)
+        view, offset = self._view, self._offset
+        if offset == len(view):
+            chunk = self._next_chunk()
+            if chunk is None:
+                return 0  # indicate EOF
+            length = len(chunk)
+            if length <= len(mv):
+                # the whole chunk fits, so it doesn't need to be kept
+                mv[:length] = chunk
+                return length
+            self._set_chunk(chunk)
+            view, offset = self._view, 0
+        length = min(len(mv), len(view) - offset)
+        mv[:length] = view[offset:offset + length]
+        self._offset = offset + length
+        return length
+
+    readinto1 = readinto
+
+    def read1(self, size=-1):
+        available = self._available()
+        if size < 0 or size > available:
+            size = available
+        offset = self._offset
+        if offset == 0 and size == len(self._view) and type(self._chunk) is bytes:
+            data = self._chunk  # the whole chunk, which can be returned without copying
+        else:
+            data = self._view[offset:offset + size].tobytes()
+        self._offset = offset + size
+        return data
+
+    def peek(self, size=1):
+        """
+        Return at least ``size`` bytes (fewer only at the end of the stream)
+        without consuming them. Chunks are joined together as necessary.
+        """
+        available = self._available()
+        while 0 < available < size:
+            chunk = self._next_chunk()
+            if chunk is None:
+                break
+            coalesced = self._coalesced
+            if self._chunk is coalesced:
+                self._view.release()
+                del coalesced[:self._offset]
+            else:
+                coalesced[:] = self._view[self._offset:]
+            coalesced += chunk
+            self._set_chunk(coalesced)
+            available = len(coalesced)
+        return self._view[self._offset:].tobytes()
 
     def readable(self):
         return True
 
 
-def ensure_file(fp_or_iterable):
+def _read_chunks(fp, chunk_size):
+    read = getattr(fp, 'read1', fp.read)
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _prefetch(chunks, size):
+    # the thread is only started once iteration starts, so that it is always stopped again by closing the generator
+    ready = queue.Queue(size)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run():
+        try:
+            for chunk in chunks:
+                if not put((chunk, None)):
+                    return
+        except Exception as e:
+            put((None, e))
+        else:
+            put((None, None))
+
+    threading.Thread(target=run, name="json-stream-prefetch", daemon=True).start()
+    try:
+        while True:
+            chunk, error = ready.get()
+            if error is not None:
+                raise error
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        stopped.set()
+
+
+def prefetched(fp_or_iterable, size, chunk_size=PREFETCH_CHUNK_SIZE):
+    """
+    Iterate over the chunks of a file or iterable, which are read ahead by a
+    background thread, with at most ``size`` chunks waiting to be consumed.
+    Files are read ``chunk_size`` bytes (or characters) at a time.
+
+    Errors raised while reading are raised when the chunk they prevented from
+    being read would have been consumed.
+    """
     if hasattr(fp_or_iterable, 'read'):
-        return fp_or_iterable
-    return IterableStream(fp_or_iterable)  # will raise TypeError if not iterable
+        chunks = _read_chunks(fp_or_iterable, chunk_size)
+    else:
+        chunks = iter(fp_or_iterable)  # will raise TypeError if not iterable
+    return _prefetch(chunks, size)
+
+
+class MappedFile(io.RawIOBase):
+    """
+    Binary file reading from a memory-mapped file, which tokenizers can also
+    scan directly through ``map``.
+    """
+    def __init__(self, mapped):
+        self.map = mapped
+
+    def readinto(self, buffer):
+        data = self.map.read(len(buffer))
+        length = len(data)
+        memoryview(buffer)[:length] = data
+        return length
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        self.map.seek(pos, whence)
+        return self.map.tell()
+
+    def tell(self):
+        return self.map.tell()
+
+
+def map_file(path_or_file):
+    """
+    Memory-map a file for reading, given its path, file descriptor or a file
+    object (which is mapped from its current position), as a :class:`MappedFile`.
+    """
+    if isinstance(path_or_file, int):
+        fileno, position = path_or_file, 0
+    elif hasattr(path_or_file, 'fileno'):
+        fileno, position = path_or_file.fileno(), path_or_file.tell()
+    else:
+        with open(path_or_file, 'rb') as f:
+            return map_file(f)
+    if not os.fstat(fileno).st_size:
+        return io.BytesIO()  # empty files can't be mapped
+    mapped = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    mapped.seek(position)
+    return MappedFile(mapped)
+
+
+def _peek(fp):
+    # the start of the data, without consuming it, if that is possible
+    if isinstance(fp, IterableStream) or hasattr(fp, 'peek'):
+        head = fp.peek(1)
+        if not isinstance(head, bytes) or head[:1] and head[0] not in compression.MAGIC_FIRST_BYTES:
+            return head
+        return fp.peek(compression.MAGIC_LENGTH)
+    if isinstance(fp, io.TextIOBase):
+        return None
+    try:
+        seekable = fp.seekable()
+    except (AttributeError, ValueError):
+        seekable = False
+    if not seekable:
+        return None
+    position = fp.tell()
+    head = fp.read(compression.MAGIC_LENGTH)
+    fp.seek(position)
+    return head
+
+
+def _decompress(fp):
+    # compressed streams are recognised by their first bytes, and decompressed as they are read
+    head = _peek(fp)
+    if not isinstance(head, bytes):
+        return fp
+    new_decompressor = compression.detect(head)
+    if new_decompressor is None:
+        return fp
+    read = getattr(fp, 'read1', fp.read)
+    return IterableStream(compression.decompressed(read, new_decompressor))
+
+
+def ensure_file(fp_or_iterable, prefetch=0):
+    if prefetch:
+        fp = IterableStream(prefetched(fp_or_iterable, prefetch))
+    elif hasattr(fp_or_iterable, 'read'):
+        fp = fp_or_iterable
+    else:
+        fp = IterableStream(fp_or_iterable)  # will raise TypeError if not iterable
+    return _decompress(fp)
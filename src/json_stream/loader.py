@@ -1,19 +1,104 @@
-from json_stream.base import StreamingJSONBase, TokenType
-from json_stream.iterators import ensure_file
+import json
+
+from json_stream.base import StreamingJSONBase, TokenType, compile_fields, has_lone_surrogate
+from json_stream.iterators import ensure_file, map_file
 from json_stream.select_tokenizer import default_tokenizer
 
+NDJSON_CHUNK_SIZE = 64 * 1024
+NDJSON_MAX_LINE_SIZE = 1024 * 1024
+
+
+def load(fp_or_iterable, persistent=False, tokenizer=default_tokenizer, fields=None, prefetch=0, mmap=False,
+         **tokenizer_kwargs):
+    return next(load_many(fp_or_iterable, persistent, tokenizer, fields, prefetch, mmap, **tokenizer_kwargs))
 
-def load(fp_or_iterable, persistent=False, tokenizer=default_tokenizer, **tokenizer_kwargs):
-    return next(load_many(fp_or_iterable, persistent, tokenizer, **tokenizer_kwargs))
 
+def load_many(fp_or_iterable, persistent=False, tokenizer=default_tokenizer, fields=None, prefetch=0, mmap=False,
+              ndjson=False, max_line_size=NDJSON_MAX_LINE_SIZE, **tokenizer_kwargs):
+    if mmap:
+        fp_or_iterable = map_file(fp_or_iterable)
+    fp = ensure_file(fp_or_iterable, prefetch)
+    if ndjson:
+        if fields is not None:
+            raise ValueError("fields cannot be used with ndjson=True")
+        yield from _load_ndjson(fp, max_line_size, persistent, tokenizer, **tokenizer_kwargs)
+    else:
+        yield from _load_many(fp, persistent, tokenizer, compile_fields(fields), **tokenizer_kwargs)
 
-def load_many(fp_or_iterable, persistent=False, tokenizer=default_tokenizer, **tokenizer_kwargs):
-    fp = ensure_file(fp_or_iterable)
+
+def _load_many(fp, persistent, tokenizer, fields, **tokenizer_kwargs):
     token_stream = tokenizer(fp, **tokenizer_kwargs)
     for token_type, token in token_stream:
         if token_type == TokenType.OPERATOR:
-            data = StreamingJSONBase.factory(token, token_stream, persistent)
+            data = StreamingJSONBase.factory(token, token_stream, persistent, fields)
             yield data
-            data.read_all()
+            data._discard()
         else:
             yield token
+
+
+def _rest_of_line(pieces, read, newline, rest):
+    # the chunks of a line from its start in pieces up to the next newline, leaving what follows it in rest
+    yield from pieces
+    while True:
+        chunk = read(NDJSON_CHUNK_SIZE)
+        if not chunk:
+            return
+        end = chunk.find(newline)
+        if end >= 0:
+            if end + 1 < len(chunk):
+                rest.append(chunk[end + 1:])
+            yield chunk[:end]
+            return
+        yield chunk
+
+
+def _load_ndjson(fp, max_line_size, persistent, tokenizer, **tokenizer_kwargs):
+    """
+    The documents on each line of ``fp``, decoded with :func:`json.loads`, or
+    streamed (as by :func:`load_many`) if they are longer than
+    ``max_line_size``, aren't a single valid document, or have escaped UTF-16
+    surrogates in them that :func:`json.loads` would accept unpaired.
+    """
+    read = getattr(fp, 'read1', fp.read)
+    empty = fp.read(0)
+    newline = b'\n' if isinstance(empty, bytes) else '\n'
+
+    def decode(line):
+        if len(line) <= max_line_size and not has_lone_surrogate(line):
+            try:
+                return [json.loads(line)]
+            except ValueError:
+                pass  # blank lines, several documents, or errors, handled exactly as by load_many()
+        return _load_many(ensure_file([line]), persistent, tokenizer, None, **tokenizer_kwargs)
+
+    pieces = []  # of a line that continues in the next chunk
+    size = 0
+    rest = []
+    while True:
+        chunk = rest.pop() if rest else read(NDJSON_CHUNK_SIZE)
+        if not chunk:
+            if pieces:
+                yield from decode(empty.join(pieces))
+            return
+        start = 0
+        end = chunk.find(newline)
+        while end >= 0:
+            if pieces:
+                pieces.append(chunk[start:end])
+                yield from decode(empty.join(pieces))
+                pieces = []
+                size = 0
+            else:
+                yield from decode(chunk[start:end])
+            start = end + 1
+            end = chunk.find(newline, start)
+        if start < len(chunk):
+            pieces.append(chunk[start:])
+            size += len(chunk) - start
+            if size > max_line_size:
+                # too long to hold in memory, so the rest of the line is streamed
+                line = _rest_of_line(pieces, read, newline, rest)
+                yield from _load_many(ensure_file(line), persistent, tokenizer, None, **tokenizer_kwargs)
+                pieces = []
+                size = 0
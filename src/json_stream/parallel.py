@@ -0,0 +1,216 @@
+"""
+Parallel processing of the elements of large JSON files
+
+:func:`map` splits a file into shards of consecutive elements of its top-level
+list (or of its documents), and runs a function on every element in worker
+processes, each of which tokenizes its shards from their start offsets.
+
+The shard boundaries come from the file's sidecar index (see
+:mod:`json_stream.index`) when it has an up-to-date one, or otherwise from a
+pre-scan of the file that skips over the elements without parsing them. Shards
+are handed out while the pre-scan is still going, so the workers don't wait for
+it to finish.
+
+:func:`map_ndjson` does the same for NDJSON files without any pre-scan: the
+file is cut into byte ranges that end at line breaks, and each record is
+decoded with :func:`json.loads` by the worker that reads its range.
+
+Workers are processes, or threads on free-threaded builds of python.
+"""
+import io
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import partial
+from itertools import islice
+
+from json_stream.index import StaleIndexError, _items_from, _scan, open as open_index
+from json_stream.select_tokenizer import default_tokenizer
+
+DEFAULT_SHARD_SIZE = 16 * 1024 * 1024
+
+
+class NDJSONDecodeError(ValueError):
+    """A line of an NDJSON file that isn't valid JSON"""
+    def __init__(self, msg, offset, line):
+        super().__init__(msg, offset, line)
+        self.msg = msg
+        self.offset = offset  # of the start of the line's range
+        self.line = line  # within the line's range, or in the file once re-raised by map_ndjson()
+
+    def __str__(self):
+        return f"Invalid JSON on line {self.line}: {self.msg}"
+
+
+def _new_executor(workers):
+    if not getattr(sys, '_is_gil_enabled', lambda: True)():  # pragma: no cover
+        return ThreadPoolExecutor(workers)
+    return ProcessPoolExecutor(workers)
+
+
+def _shards(points, shard_size):
+    """
+    Split elements into ``(offset, count)`` shards of at least ``shard_size``
+    bytes, given ``(element number, offset)`` points at which they can be
+    split. The last shard runs to the end of the file (with a count of None).
+    """
+    first = None
+    for n, offset in points:
+        if first is None:
+            first = n, offset
+        elif offset - first[1] >= shard_size:
+            yield first[1], n - first[0]
+            first = n, offset
+    if first is not None:
+        yield first[1], None
+
+
+def _map_shard(fn, path, documents, persistent, tokenizer, tokenizer_kwargs, offset, count):
+    with io.open(path, 'rb') as f:
+        items = _items_from(f, offset, documents, persistent, tokenizer, **tokenizer_kwargs)
+        return [fn(item) for item in islice(items, count)]
+
+
+def _line_ranges(f, chunk_size):
+    """Split a file into ``(start, end)`` byte ranges of at least ``chunk_size`` bytes that end at line breaks"""
+    size = os.fstat(f.fileno()).st_size
+    start = 0
+    while start < size:
+        f.seek(start + chunk_size - 1)
+        f.readline()
+        end = min(f.tell(), size)
+        yield start, end
+        start = end
+
+
+def _count_lines(f, end, chunk_size=1024 * 1024):
+    """The number of line breaks in the first ``end`` bytes of ``f``"""
+    f.seek(0)
+    lines = 0
+    while end > 0:
+        chunk = f.read(min(chunk_size, end))
+        if not chunk:
+            break
+        lines += chunk.count(b'\n')
+        end -= len(chunk)
+    return lines
+
+
+def _map_lines(fn, path, start, end):
+    with io.open(path, 'rb') as f:
+        f.seek(start)
+        lines = f.read(end - start).split(b'\n')
+    results = []
+    for n, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            raise NDJSONDecodeError(str(e), start, n) from None
+        results.append(item if fn is None else fn(item))
+    return results
+
+
+def _run(executor, shards, map_shard, max_pending, ordered):
+    pending = deque()
+
+    def submit():
+        for offset, count in islice(shards, max_pending - len(pending)):
+            pending.append(executor.submit(map_shard, offset, count))
+
+    try:
+        submit()
+        while pending:
+            if ordered:
+                future = pending.popleft()
+                future.result()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = done.pop()
+                pending.remove(future)
+            # keep the workers busy while the results are consumed
+            submit()
+            yield from future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def map(fn, path, workers=None, ordered=True, index=None, shard_size=DEFAULT_SHARD_SIZE, max_pending=None,
+        executor=None, persistent=False, tokenizer=default_tokenizer, **tokenizer_kwargs):
+    """
+    Yield ``fn(element)`` for every element of the top-level list in the file
+    at ``path`` (or for every document, if it is indexed by documents),
+    running ``fn`` in ``workers`` processes.
+
+    Elements are loaded as :func:`json_stream.load` would load them, with the
+    given ``persistent``, ``tokenizer`` and tokenizer arguments, so ``fn`` must
+    consume a transient element before it returns. ``fn``, and what it returns,
+    must be picklable.
+
+    Results are yielded in the order of the elements, or, with
+    ``ordered=False``, as soon as their shard is done. At most ``max_pending``
+    shards (by default, twice the number of workers) of roughly
+    ``shard_size`` bytes are being processed, or waiting to be consumed, at a
+    time. ``index`` is an :class:`~json_stream.index.Index` of the file (by
+    default its sidecar index is used if it is up to date), and ``executor``
+    can be given to use an existing pool instead of creating one.
+    """
+    if index is None:
+        try:
+            index = open_index(path)
+        except (FileNotFoundError, StaleIndexError):
+            pass
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    own_executor = executor is None
+    if own_executor:
+        executor = _new_executor(workers)
+    try:
+        if index is not None:
+            index.check()
+            points = ((i * index.every, offset) for i, offset in enumerate(index.offsets))
+            mapper = partial(_map_shard, fn, path, index.documents, persistent, tokenizer, tokenizer_kwargs)
+            yield from _run(executor, _shards(points, shard_size), mapper, max_pending, ordered)
+        else:
+            with io.open(path, 'rb') as f:
+                documents, starts = _scan(f)
+                mapper = partial(_map_shard, fn, path, documents, persistent, tokenizer, tokenizer_kwargs)
+                yield from _run(executor, _shards(enumerate(starts), shard_size), mapper, max_pending, ordered)
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+
+def map_ndjson(fn, path, workers=None, ordered=True, chunk_size=DEFAULT_SHARD_SIZE, max_pending=None, executor=None):
+    """
+    Yield ``fn(record)`` (or each record, if ``fn`` is None) for every record
+    of the NDJSON file at ``path``, decoding and running ``fn`` on the records
+    in ``workers`` processes, a range of about ``chunk_size`` bytes of whole
+    lines at a time. Blank lines are skipped.
+
+    ``ordered``, ``max_pending`` and ``executor`` are as for :func:`map`. A
+    line that isn't valid JSON raises :exc:`NDJSONDecodeError`, with the
+    number of the line in the file as its ``line``.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    own_executor = executor is None
+    if own_executor:
+        executor = _new_executor(workers)
+    try:
+        with io.open(path, 'rb') as f:
+            mapper = partial(_map_lines, fn, path)
+            try:
+                yield from _run(executor, _line_ranges(f, chunk_size), mapper, max_pending, ordered)
+            except NDJSONDecodeError as e:
+                # number the line from the start of the file rather than of its range
+                raise NDJSONDecodeError(e.msg, e.offset, _count_lines(f, e.offset) + e.line) from None
+    finally:
+        if own_executor:
+            executor.shutdown()
@@ -0,0 +1,112 @@
+"""
+Path expressions and the state machines they compile to
+
+Paths are written as dotted keys with optional indices and wildcards, e.g.
+``results[*].id``, ``meta.count`` or ``["key.with.dots"][0]``. A ``*`` (or
+``[*]``) matches any key or index.
+
+Any number of paths compile into a single deterministic state machine, which
+is stepped through one key or index at a time as a document is read.
+"""
+import re
+from itertools import chain
+
+
+class _Wildcard:
+    def __repr__(self):
+        return 'WILDCARD'
+
+
+WILDCARD = _Wildcard()
+
+_SEGMENT = re.compile(r"""
+    (?:^|\.)(?P<key>[^.\[\]]+)
+  | \[(?:(?P<index>[0-9]+)|(?P<wildcard>\*)|"(?P<dq>[^"]*)"|'(?P<sq>[^']*)')\]
+""", re.VERBOSE)
+
+
+def parse_path(path):
+    """
+    Split a path expression into a tuple of keys (``str``), indices (``int``)
+    and :data:`WILDCARD`.
+    """
+    segments = []
+    pos = 0
+    while pos < len(path):
+        match = _SEGMENT.match(path, pos)
+        if match is None:
+            raise ValueError(f"Invalid path {path!r} at index {pos}")
+        pos = match.end()
+        if match.group('index') is not None:
+            segments.append(int(match.group('index')))
+        elif match.group('wildcard') is not None or match.group('key') == '*':
+            segments.append(WILDCARD)
+        else:
+            segments.append(next(g for g in match.group('key', 'dq', 'sq') if g is not None))
+    return tuple(segments)
+
+
+class _Node:
+    """A node of the trie of paths being compiled"""
+    def __init__(self):
+        self.children = {}
+        self.wildcard = None
+        self.matches = []
+
+
+class State:
+    """
+    A state of a compiled set of paths.
+
+    ``matches`` holds the indices of the paths that end here. ``exact`` maps
+    keys and indices to following states, and ``default`` is the state for
+    any other key or index (or ``None`` if nothing can match beyond it).
+    """
+    __slots__ = ('matches', 'exact', 'default', 'keys', 'last_index')
+
+    def __init__(self, matches):
+        self.matches = matches
+        self.exact = {}
+        self.default = None
+        self.keys = None  # the only object keys that can lead to a match, if limited
+        self.last_index = None  # the last list index that can lead to a match, if limited
+
+    def next(self, key):
+        return self.exact.get(key, self.default)
+
+
+def compile_paths(paths):
+    """
+    Compile path expressions (or parsed paths) into a :class:`State` machine,
+    returning its initial state.
+    """
+    root = _Node()
+    for i, path in enumerate(paths):
+        node = root
+        for segment in parse_path(path) if isinstance(path, str) else path:
+            if segment is WILDCARD:
+                if node.wildcard is None:
+                    node.wildcard = _Node()
+                node = node.wildcard
+            else:
+                node = node.children.setdefault(segment, _Node())
+        node.matches.append(i)
+    return _determinize([root], {})
+
+
+def _determinize(nodes, states):
+    key = frozenset(nodes)
+    if not key:
+        return None
+    state = states.get(key)
+    if state is not None:
+        return state
+    state = states[key] = State(tuple(sorted(set(chain.from_iterable(node.matches for node in key)))))
+    wildcards = [node.wildcard for node in key if node.wildcard is not None]
+    state.default = _determinize(wildcards, states)
+    for k in set(chain.from_iterable(node.children for node in key)):
+        state.exact[k] = _determinize([node.children[k] for node in key if k in node.children] + wildcards, states)
+    if state.default is None:
+        state.keys = frozenset(k for k in state.exact if isinstance(k, str))
+        state.last_index = max((k for k in state.exact if isinstance(k, int)), default=-1)
+    return state
@@ -0,0 +1,228 @@
+"""
+Push-based incremental parser
+
+Instead of pulling data from a file-like object, data is pushed into a
+:class:`PushParser` as it arrives, and the values completed so far are drained
+from it. Parsing never waits for more input, so it can be used from event loop
+callbacks or with framed transports.
+
+Tokens are produced by :class:`~json_stream.block_tokenizer.BlockTokenizer`,
+so the grammar (and the errors) are the same as for :func:`json_stream.load_many`.
+"""
+import codecs
+from collections import deque
+
+from json_stream.base import StreamingJSONList, StreamingJSONObject
+from json_stream.block_tokenizer import BlockTokenizer
+from json_stream.paths import compile_paths
+from json_stream.tokenizer import TokenType
+
+# what a container expects next
+_FIRST, _VALUE, _KEY, _COLON, _NEXT = range(5)
+
+
+class NeedData(Exception):
+    """Raised by :class:`PushTokenizer` when the next token hasn't been fed yet"""
+
+
+class _Feed:
+    """Text stream of the chunks fed so far, which never blocks"""
+    def __init__(self):
+        self.chunks = deque()
+        self.closed = False
+
+    def read(self, size=-1):
+        if self.chunks:
+            return self.chunks.popleft()
+        if self.closed or size == 0:
+            return ''
+        raise NeedData()
+
+
+class PushTokenizer(BlockTokenizer):
+    """
+    Tokenizer that data is fed into.
+
+    Iterating raises :exc:`NeedData` when more data needs to be fed before the
+    next token is known, after which iteration can continue where it left off.
+    Binary data is decoded with ``encoding``.
+    """
+    def __init__(self, encoding='utf-8'):
+        self._feed = _Feed()
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        super().__init__(self._feed)
+
+    @property
+    def closed(self):
+        return self._feed.closed
+
+    def feed(self, data):
+        if self._feed.closed:
+            raise ValueError("Cannot feed a closed parser")
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = self._decoder.decode(data)
+        if data:
+            self._feed.chunks.append(data)
+
+    def close(self):
+        """Signal the end of the data"""
+        if not self._feed.closed:
+            self._feed.chunks.append(self._decoder.decode(b'', final=True))
+            self._feed.closed = True
+
+    def _lookahead(self, size=16):
+        # only used to report errors, which shouldn't wait for more data
+        try:
+            return super()._lookahead(size)
+        except NeedData:
+            return self._buf[self._pos:self._pos + size]
+
+
+class _Frame:
+    """An object or list that is being parsed"""
+    __slots__ = ('is_object', 'value', 'state', 'path', 'emit', 'key', 'index', 'expect')
+
+    def __init__(self, is_object, value, state, path, emit):
+        self.is_object = is_object
+        self.value = value  # the object or list being built, if it is part of a result
+        self.state = state  # the paths state, while looking for matches
+        self.path = path
+        self.emit = emit  # whether this is a result
+        self.key = None
+        self.index = -1
+        self.expect = _FIRST
+
+
+class PushParser:
+    """
+    Incremental parser that data is fed into.
+
+    Without ``paths``, :meth:`drain` produces each top-level document once it
+    is complete. With ``paths`` (as for :func:`json_stream.select`), it produces
+    ``(path, value)`` for each matching value once it is complete, e.g. each
+    item of a top-level list with ``"[*]"``. Values are standard python types.
+
+    Binary data is decoded with ``encoding``.
+    """
+    def __init__(self, *paths, encoding='utf-8'):
+        self._documents = not paths
+        self._root = compile_paths(paths or [''])
+        self._tokens = PushTokenizer(encoding)
+        self._stack = []
+        self._results = deque()
+
+    def feed(self, data):
+        """Parse ``data`` (``bytes`` or ``str``), as far as possible"""
+        self._tokens.feed(data)
+        self._parse()
+
+    def close(self):
+        """Signal the end of the input, and finish parsing it"""
+        if self._tokens.closed:
+            return
+        self._tokens.close()
+        self._parse()
+        if self._stack:
+            container = StreamingJSONObject if self._stack[-1].is_object else StreamingJSONList
+            raise ValueError(container.INCOMPLETE_ERROR)
+
+    def drain(self):
+        """Yield (and forget) the documents or matches completed so far"""
+        results = self._results
+        while results:
+            path, value = results.popleft()
+            yield value if self._documents else (path, value)
+
+    def _parse(self):
+        while True:
+            try:
+                token_type, token = next(self._tokens)
+            except (NeedData, StopIteration):
+                return
+            self._token(token_type, token)
+
+    def _token(self, token_type, token):
+        if not self._stack:
+            self._start(token_type, token, None, None)
+            return
+        frame = self._stack[-1]
+        expect = frame.expect
+        operator = token if token_type == TokenType.OPERATOR else None
+        if frame.is_object:
+            if expect == _FIRST or expect == _KEY:
+                if token_type == TokenType.STRING:
+                    frame.key = token
+                    frame.expect = _COLON
+                elif expect == _FIRST and operator == '}':
+                    self._end()
+                else:
+                    raise ValueError(f"Expecting string, comma or }}, got {token} ({token_type})")
+            elif expect == _COLON:
+                if operator != ':':
+                    raise ValueError("Expecting :")
+                frame.expect = _VALUE
+            elif expect == _VALUE:
+                frame.expect = _NEXT
+                self._start(token_type, token, frame, frame.key)
+            elif operator == ',':
+                frame.expect = _KEY
+            elif operator == '}':
+                self._end()
+            else:
+                raise ValueError(f"Expecting comma or }}, got {token}")
+        else:
+            if expect == _NEXT:
+                if operator == ',':
+                    frame.expect = _VALUE
+                elif operator == ']':
+                    self._end()
+                else:
+                    raise ValueError(f"Expecting comma or ], got {token}")
+            elif expect == _FIRST and operator == ']':
+                self._end()
+            else:
+                frame.expect = _NEXT
+                frame.index += 1
+                self._start(token_type, token, frame, frame.index)
+
+    def _start(self, token_type, token, parent, key):
+        # the start of a value, which is the whole of it for a scalar
+        if parent is not None and parent.value is not None:
+            capture, emit, state, path = True, False, None, None
+        else:
+            if parent is None:
+                state, path = self._root, ()
+            elif parent.state is not None:
+                state = parent.state.next(key)
+                path = parent.path + (key,)
+            else:
+                state = path = None
+            capture = emit = state is not None and bool(state.matches)
+            if capture:
+                state = None
+        if token_type == TokenType.OPERATOR:
+            if token not in '{[':
+                raise ValueError(f"Unknown operator {token}")
+            is_object = token == '{'
+            value = ({} if is_object else []) if capture else None
+            self._stack.append(_Frame(is_object, value, state, path, emit))
+        else:
+            self._complete(token, parent, key, emit, path)
+
+    def _end(self):
+        frame = self._stack.pop()
+        parent = self._stack[-1] if self._stack else None
+        if parent is None:
+            key = None
+        else:
+            key = parent.key if parent.is_object else parent.index
+        self._complete(frame.value, parent, key, frame.emit, frame.path)
+
+    def _complete(self, value, parent, key, emit, path):
+        if emit:
+            self._results.append((path, value))
+        elif parent is not None and parent.value is not None:
+            if parent.is_object:
+                parent.value[key] = value
+            else:
+                parent.value.append(value)
@@ -9,17 +9,31 @@ def _to_iterable(response, chunk_size):
     return response.iter_content(chunk_size=chunk_size)
 
 
-def load(response, persistent=False, tokenizer=default_tokenizer, chunk_size=CONTENT_CHUNK_SIZE):
-    return json_stream.load(_to_iterable(response, chunk_size), persistent=persistent, tokenizer=tokenizer)
-
-
-def load_many(response, persistent=False, tokenizer=default_tokenizer, chunk_size=CONTENT_CHUNK_SIZE):
-    return json_stream.load_many(_to_iterable(response, chunk_size), persistent=persistent, tokenizer=tokenizer)
-
-
-def visit(response, visitor, tokenizer=default_tokenizer, chunk_size=CONTENT_CHUNK_SIZE):
-    return json_stream.visit(_to_iterable(response, chunk_size), visitor, tokenizer=tokenizer)
-
-
-def visit_many(response, visitor, tokenizer=default_tokenizer, chunk_size=CONTENT_CHUNK_SIZE):
-    return json_stream.visit_many(_to_iterable(response, chunk_size), visitor, tokenizer=tokenizer)
+def load(response, persistent=False, tokenizer=default_tokenizer, chunk_size=CONTENT_CHUNK_SIZE, prefetch=0,
+         **tokenizer_kwargs):
+    return json_stream.load(
+        _to_iterable(response, chunk_size), persistent=persistent, tokenizer=tokenizer, prefetch=prefetch,
+        **tokenizer_kwargs,
+    )
+
+
+def load_many(response, persistent=False, tokenizer=default_tokenizer, chunk_size=CONTENT_CHUNK_SIZE, prefetch=0,
+              **tokenizer_kwargs):
+    return json_stream.load_many(
+        _to_iterable(response, chunk_size), persistent=persistent, tokenizer=tokenizer, prefetch=prefetch,
+        **tokenizer_kwargs,
+    )
+
+
+def visit(response, visitor, tokenizer=default_tokenizer, chunk_size=CONTENT_CHUNK_SIZE, prefetch=0,
+          **tokenizer_kwargs):
+    return json_stream.visit(
+        _to_iterable(response, chunk_size), visitor, tokenizer=tokenizer, prefetch=prefetch, **tokenizer_kwargs,
+    )
+
+
+def visit_many(response, visitor, tokenizer=default_tokenizer, chunk_size=CONTENT_CHUNK_SIZE, prefetch=0,
+               **tokenizer_kwargs):
+    return json_stream.visit_many(
+        _to_iterable(response, chunk_size), visitor, tokenizer=tokenizer, prefetch=prefetch, **tokenizer_kwargs,
+    )
@@ -0,0 +1,182 @@
+"""
+Select values from a JSON stream by path
+
+A :class:`Selector` compiles any number of paths (see :mod:`json_stream.paths`)
+into a single state machine once, and can then be run against many streams. It
+works directly on the token stream: subtrees that cannot contain a match are
+skipped without building :class:`~json_stream.base.StreamingJSONBase` objects
+for them.
+"""
+from json_stream.base import StreamingJSONBase, StreamingJSONList, StreamingJSONObject, raw_reader
+from json_stream.iterators import ensure_file
+from json_stream.paths import compile_paths
+from json_stream.select_tokenizer import default_tokenizer
+from json_stream.tokenizer import TokenType
+
+
+def _skip_to_end(token_stream):
+    skip_to_end = getattr(token_stream, 'skip_to_end', None)
+    if skip_to_end is not None:
+        skip_to_end(1)
+        return
+    depth = 1
+    while depth:
+        token_type, token = next(token_stream)
+        if token_type == TokenType.OPERATOR:
+            if token in '{[':
+                depth += 1
+            elif token in '}]':
+                depth -= 1
+
+
+def _skip_rest(token_stream, token_type, token):
+    # skip a value whose first token has already been read
+    if token_type == TokenType.OPERATOR:
+        if token not in '{[':
+            raise ValueError(f"Unknown operator {token}")
+        _skip_to_end(token_stream)
+
+
+class Selector:
+    """
+    Compiled set of paths, which can be used to select values from any number
+    of streams.
+    """
+    def __init__(self, *paths):
+        self.paths = paths
+        self._root = compile_paths(paths)
+
+    def select(self, fp_or_iterable, persistent=False, tokenizer=default_tokenizer, raw=False, **tokenizer_kwargs):
+        """
+        Yield ``(path, value)`` for every value in the stream that matches any of
+        the paths, with ``path`` being a tuple of keys and indices as for
+        :func:`json_stream.visit`.
+
+        Matching objects and lists are yielded as streaming objects, in the same
+        way as :func:`json_stream.load` returns them, and are not searched for
+        further matches. Every document in the stream is searched, as for
+        :func:`json_stream.load_many`.
+
+        With ``raw=True``, matching values are yielded as their raw JSON text
+        (memoryviews of the bytes, with a binary stream in binary mode), which
+        is read without parsing it. This requires a tokenizer that supports it,
+        such as :class:`~json_stream.block_tokenizer.BlockTokenizer`.
+        """
+        fp = ensure_file(fp_or_iterable)
+        token_stream = tokenizer(fp, **tokenizer_kwargs)
+        read_raw = raw_reader(token_stream, 'read_raw_value') if raw else None
+        if read_raw is not None and self._root.matches:
+            for value in iter(read_raw, None):
+                yield (), value
+        for token_type, token in token_stream:
+            yield from self._select(token_stream, token_type, token, self._root, (), persistent, read_raw)
+
+    def _select(self, token_stream, token_type, token, state, path, persistent, read_raw):
+        if state.matches:
+            if token_type == TokenType.OPERATOR:
+                value = StreamingJSONBase.factory(token, token_stream, persistent)
+                yield path, value
+                value._discard()
+            else:
+                yield path, token
+        elif token_type == TokenType.OPERATOR:
+            if token == '{':
+                yield from self._select_object(token_stream, state, path, persistent, read_raw)
+            elif token == '[':
+                yield from self._select_list(token_stream, state, path, persistent, read_raw)
+            else:
+                raise ValueError(f"Unknown operator {token}")
+
+    def _select_object(self, token_stream, state, path, persistent, read_raw):
+        skip_value = getattr(token_stream, 'skip_value', None)
+        exact, default = state.exact, state.default
+        # once all the keys that can match have been seen, the rest of the object is skipped
+        pending = None if state.keys is None else set(state.keys)
+        try:
+            while True:
+                if pending is not None and not pending:
+                    _skip_to_end(token_stream)
+                    return
+                token_type, k = next(token_stream)
+                if token_type == TokenType.OPERATOR:
+                    if k == '}':
+                        return
+                    if k == ',':
+                        token_type, k = next(token_stream)
+                if token_type != TokenType.STRING:
+                    raise ValueError(f"Expecting string, comma or }}, got {k} ({token_type})")
+                token_type, token = next(token_stream)
+                if token_type != TokenType.OPERATOR or token != ":":
+                    raise ValueError("Expecting :")
+
+                child = exact.get(k, default)
+                if pending is not None:
+                    pending.discard(k)
+                if child is None and skip_value is not None and skip_value():
+                    continue
+                if read_raw is not None and child is not None and child.matches:
+                    value = read_raw()
+                    if value is not None:
+                        yield path + (k,), value
+                        continue
+                token_type, token = next(token_stream)
+                if child is None:
+                    _skip_rest(token_stream, token_type, token)
+                else:
+                    yield from self._select(token_stream, token_type, token, child, path + (k,), persistent, read_raw)
+        except StopIteration:
+            raise ValueError(StreamingJSONObject.INCOMPLETE_ERROR) from None
+
+    def _select_list(self, token_stream, state, path, persistent, read_raw):
+        skip_value = getattr(token_stream, 'skip_value', None)
+        exact, default, last_index = state.exact, state.default, state.last_index
+        index = 0
+        try:
+            while True:
+                if last_index is not None and index > last_index:
+                    _skip_to_end(token_stream)
+                    return
+                if index:
+                    token_type, token = next(token_stream)
+                    if token_type == TokenType.OPERATOR and token == ']':
+                        return
+                    if token_type != TokenType.OPERATOR or token != ',':
+                        raise ValueError(f"Expecting comma or ], got {token}")
+
+                child = exact.get(index, default)
+                if child is None and skip_value is not None and skip_value():
+                    index += 1
+                    continue
+                if read_raw is not None and child is not None and child.matches:
+                    value = read_raw()
+                    if value is not None:
+                        yield path + (index,), value
+                        index += 1
+                        continue
+                token_type, token = next(token_stream)
+                if not index and token_type == TokenType.OPERATOR and token == ']':
+                    return
+                if child is None:
+                    _skip_rest(token_stream, token_type, token)
+                else:
+                    yield from self._select(
+                        token_stream, token_type, token, child, path + (index,), persistent, read_raw,
+                    )
+                index += 1
+        except StopIteration:
+            raise ValueError(StreamingJSONList.INCOMPLETE_ERROR) from None
+
+    def __repr__(self):  # pragma: no cover
+        return f"{type(self).__name__}({', '.join(map(repr, self.paths))})"
+
+
+def select(fp_or_iterable, *paths, persistent=False, tokenizer=default_tokenizer, raw=False, **tokenizer_kwargs):
+    """
+    Yield ``(path, value)`` for values in the stream that match any of the given
+    paths, which are either path expressions or a single compiled :class:`Selector`.
+    """
+    if len(paths) == 1 and isinstance(paths[0], Selector):
+        selector = paths[0]
+    else:
+        selector = Selector(*paths)
+    return selector.select(fp_or_iterable, persistent, tokenizer, raw, **tokenizer_kwargs)
@@ -0,0 +1,278 @@
+import json
+import math
+import mmap
+import re
+import tempfile
+from io import StringIO, BytesIO
+from unittest import TestCase
+
+import json_stream
+from json_stream.block_tokenizer import BlockTokenizer
+from json_stream.iterators import IterableStream
+from json_stream.tokenizer import tokenize
+
+
+class TestBlockTokenizer(TestCase):
+    DOCUMENTS = [
+        '{"a": [1, -2.5, 3e10, 0, -0, true, false, null], "b": {"c": "d"}}',
+        '["with \\"escapes\\" \\n and \\u00c4 and \\ud834\\udd1e", "", "plain"]',
+        '[NaN, Infinity, -Infinity, 12345678901234567890]',
+        'truefalse null[]{}',
+        '  "a" 1 2.5e-3  ',
+        '{"non-ascii": "é中\U0001d11e"}',
+    ]
+    INVALID = [
+        '01', '1.', '2a', '-a', '3.e10', '67.8e+a', 'Na', 'Infinityx', '-Infinit',
+        '"\\uay76"', '"\\h"', '"\\u!"', '"unterminated', '"test"56', '123"text"',
+        '"\\ud834"', '"\\ud834\\u00c4"', '[1, @]',
+    ]
+
+    def assertTokensEqual(self, expected, actual):
+        self.assertEqual(len(expected), len(actual))
+        for (expected_type, expected_value), (actual_type, actual_value) in zip(expected, actual):
+            self.assertEqual(expected_type, actual_type)
+            if isinstance(expected_value, float) and math.isnan(expected_value):
+                self.assertTrue(math.isnan(actual_value))
+            else:
+                self.assertEqual(expected_value, actual_value)
+
+    def test_tokens_across_block_boundaries(self):
+        for document in self.DOCUMENTS:
+            expected = list(tokenize(StringIO(document)))
+            for buffer_size in (1, 2, 3, 7, 64):
+                with self.subTest(document=document, buffer_size=buffer_size):
+                    actual = list(BlockTokenizer(StringIO(document), buffer_size=buffer_size))
+                    self.assertTokensEqual(expected, actual)
+
+    def test_binary_chunks(self):
+        for document in self.DOCUMENTS:
+            data = document.encode()
+            chunks = [data[i:i + 3] for i in range(0, len(data), 3)]
+            with self.subTest(document=document):
+                expected = list(tokenize(BytesIO(data)))
+                actual = list(BlockTokenizer(IterableStream(chunks), buffer_size=5))
+                self.assertTokensEqual(expected, actual)
+
+    def test_errors_match_reference(self):
+        for document in self.INVALID:
+            with self.assertRaises(ValueError) as expected:
+                list(tokenize(StringIO(document)))
+            for buffer_size in (1, 4, 64):
+                with self.subTest(document=document, buffer_size=buffer_size):
+                    with self.assertRaisesRegex(ValueError, '^' + re.escape(str(expected.exception)) + '$'):
+                        list(BlockTokenizer(StringIO(document), buffer_size=buffer_size))
+
+    def test_does_not_read_ahead(self):
+        chunks = iter([b'[1, "a', b'b", ', b'2', b']'])
+        tokens = BlockTokenizer(IterableStream(chunks))
+        self.assertEqual(next(tokens), (0, '['))
+        self.assertEqual(next(tokens), (2, 1))
+        self.assertEqual(next(tokens), (0, ','))
+        self.assertEqual(next(tokens), (1, 'ab'))
+        self.assertEqual(next(chunks), b'2')  # the next chunk was not consumed
+
+    def test_skip_items(self):
+        for document, started, count in (
+            ('[1, [2, ","], {"a": ",]"}, "b,c"] 3', False, 4),
+            ('[1, [2, ","], {"a": ",]"}, "b,c"] 3', True, 3),
+            ('[ ] 3', False, 0),
+            ('[{}] 3', False, 1),
+        ):
+            for buffer_size in (1, 3, 64):
+                with self.subTest(document=document, started=started, buffer_size=buffer_size):
+                    tokens = BlockTokenizer(StringIO(document), buffer_size=buffer_size)
+                    next(tokens)
+                    if started:
+                        next(tokens)
+                    self.assertEqual(tokens.skip_items(started), count)
+                    self.assertEqual(list(tokens), [(2, 3)])
+        self.assertIsNone(BlockTokenizer(StringIO('[1, [2]')).skip_items(False))
+
+
+class TestBinaryBlockTokenizer(TestCase):
+    DOCUMENT = '{"plain": "text", "escaped": "a\\"b\\u00c4", "non-ascii": "é中", "numbers": [1, -2.5e3, null]}'
+
+    def test_binary_mode(self):
+        expected = list(tokenize(StringIO(self.DOCUMENT)))
+        data = self.DOCUMENT.encode()
+        for buffer_size in (1, 2, 3, 64):
+            with self.subTest(buffer_size=buffer_size):
+                tokens = BlockTokenizer(BytesIO(data), buffer_size=buffer_size, binary=True)
+                self.assertEqual(expected, list(tokens))
+                self.assertIsInstance(tokens._buf, bytes)
+
+    def test_binary_mode_text_stream(self):
+        tokens = BlockTokenizer(StringIO(self.DOCUMENT), binary=True)
+        self.assertEqual(list(tokenize(StringIO(self.DOCUMENT))), list(tokens))
+
+    def test_binary_mode_byte_positions(self):
+        with self.assertRaisesRegex(ValueError, "Invalid JSON character: '@' at index 13"):
+            list(BlockTokenizer(BytesIO('["é中", 1, @]'.encode()), binary=True))
+
+    def test_load_and_visit(self):
+        data = self.DOCUMENT.encode()
+        loaded = json_stream.load(BytesIO(data), tokenizer=BlockTokenizer, binary=True)
+        self.assertEqual(json.loads(self.DOCUMENT), json_stream.to_standard_types(loaded))
+        visited = []
+        json_stream.visit(BytesIO(data), lambda v, p: visited.append((p, v)), tokenizer=BlockTokenizer, binary=True)
+        self.assertIn((('non-ascii',), 'é中'), visited)
+
+
+class TestMappedBlockTokenizer(TestCase):
+    def _map(self, data):
+        f = tempfile.TemporaryFile()
+        self.addCleanup(f.close)
+        f.write(data)
+        f.flush()
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.addCleanup(mapped.close)
+        return mapped
+
+    def test_tokens(self):
+        for document in TestBlockTokenizer.DOCUMENTS:
+            with self.subTest(document=document):
+                expected = list(tokenize(StringIO(document)))
+                actual = list(BlockTokenizer(self._map(document.encode())))
+                TestBlockTokenizer.assertTokensEqual(self, expected, actual)
+
+    def test_errors_match_reference(self):
+        for document in TestBlockTokenizer.INVALID:
+            with self.assertRaises(ValueError) as expected:
+                list(tokenize(StringIO(document)))
+            with self.subTest(document=document):
+                with self.assertRaisesRegex(ValueError, '^' + re.escape(str(expected.exception)) + '$'):
+                    list(BlockTokenizer(self._map(document.encode())))
+
+    def test_from_position(self):
+        mapped = self._map(b'garbage [1, "a"] {}')
+        mapped.seek(8)
+        tokens = BlockTokenizer(mapped)
+        self.assertEqual(next(tokens), (0, '['))
+        self.assertEqual(tokens.position, 9)
+        self.assertEqual(list(tokens), [(2, 1), (0, ','), (1, 'a'), (0, ']'), (0, '{'), (0, '}')])
+
+    def test_skipping(self):
+        mapped = self._map(b'{"a": {"b": [1, "]"]}, "c": 2}')
+        data = json_stream.load(mapped, tokenizer=BlockTokenizer)
+        self.assertEqual(data["c"], 2)
+
+
+class TestRawToEnd(TestCase):
+    DATA = '{"a": [1, "]}\\"", {"b": "x"}], "c": 2} 3'
+
+    def test_raw_to_end(self):
+        for buffer_size in (1, 3, 16, 1024):
+            for binary in (False, True):
+                with self.subTest(buffer_size=buffer_size, binary=binary):
+                    tokens = BlockTokenizer(BytesIO(self.DATA.encode()), buffer_size, binary=binary)
+                    self.assertEqual(next(tokens), (0, '{'))
+                    raw = tokens.raw_to_end(100)
+                    self.assertEqual(raw, self.DATA[:-2].encode() if binary else self.DATA[:-2])
+                    # nothing was consumed
+                    self.assertEqual(tokens.position, 1)
+                    tokens.skip_raw(raw)
+                    self.assertEqual(list(tokens), [(2, 3)])
+
+    def test_nested(self):
+        tokens = BlockTokenizer(StringIO(self.DATA), 4)
+        self.assertEqual([next(tokens) for _ in range(3)], [(0, '{'), (1, 'a'), (0, ':')])
+        self.assertEqual(next(tokens), (0, '['))
+        self.assertEqual(tokens.raw_to_end(100), '[1, "]}\\"", {"b": "x"}]')
+
+    def test_too_long(self):
+        tokens = BlockTokenizer(StringIO(self.DATA), 4)
+        next(tokens)
+        self.assertIsNone(tokens.raw_to_end(10))
+        self.assertEqual(tokens.raw_to_end(len(self.DATA) - 2), self.DATA[:-2])
+        self.assertIsNone(tokens.raw_to_end(len(self.DATA) - 3))
+
+    def test_unterminated(self):
+        tokens = BlockTokenizer(StringIO('{"a": [1, 2}'), 4)
+        next(tokens)
+        self.assertIsNone(tokens.raw_to_end(100))
+
+    def test_not_after_opening_bracket(self):
+        tokens = BlockTokenizer(StringIO('{"a": 1}'))
+        self.assertIsNone(tokens.raw_to_end(100))
+        next(tokens)
+        next(tokens)
+        self.assertIsNone(tokens.raw_to_end(100))
+
+    def test_mmap(self):
+        mapped = TestMappedBlockTokenizer._map(self, self.DATA.encode())
+        tokens = BlockTokenizer(mapped)
+        next(tokens)
+        self.assertEqual(tokens.raw_to_end(100), self.DATA[:-2].encode())
+
+
+class TestReadRaw(TestCase):
+    DATA = ' {"a": [1, "]}\\"", {"b": "x"}], "c": -2.5e3}  "s\\"" true [] '
+
+    def test_read_raw_value(self):
+        for buffer_size in (1, 3, 1024):
+            for binary in (False, True):
+                with self.subTest(buffer_size=buffer_size, binary=binary):
+                    tokens = BlockTokenizer(BytesIO(self.DATA.encode()), buffer_size, binary=binary)
+                    values = list(iter(tokens.read_raw_value, None))
+                    if binary:
+                        self.assertIsInstance(values[0], memoryview)
+                        values = [bytes(v).decode() for v in values]
+                    self.assertEqual(values, ['{"a": [1, "]}\\"", {"b": "x"}], "c": -2.5e3}', '"s\\""', 'true', '[]'])
+                    self.assertEqual(list(tokens), [])
+
+    def test_read_raw_to_end(self):
+        tokens = BlockTokenizer(StringIO(self.DATA), 2)
+        self.assertEqual([next(tokens) for _ in range(4)], [(0, '{'), (1, 'a'), (0, ':'), (0, '[')])
+        self.assertEqual(tokens.read_raw_to_end(), '[1, "]}\\"", {"b": "x"}]')
+        self.assertEqual([next(tokens) for _ in range(3)], [(0, ','), (1, 'c'), (0, ':')])
+        self.assertEqual(tokens.read_raw_value(), '-2.5e3')
+        self.assertEqual(tokens.read_raw_value(), None)
+        self.assertEqual(next(tokens), (0, '}'))
+        with self.assertRaisesRegex(ValueError, "opening bracket"):
+            tokens.read_raw_to_end()
+
+    def test_unterminated(self):
+        for data, kind in (('[1, [2]', 'list'), ('{"a": "}', 'object'), ('"abc\\"', 'string')):
+            with self.subTest(data=data):
+                with self.assertRaisesRegex(ValueError, f"^Unterminated {kind} at end of file$"):
+                    BlockTokenizer(StringIO(data), 2).read_raw_value()
+
+    def test_buffer_bounded(self):
+        # the raw text read so far isn't kept in the buffer, which would be copied again by every fill
+        sizes = []
+
+        class Tokenizer(BlockTokenizer):
+            def _fill(self):
+                super()._fill()
+                sizes.append(len(self._buf))
+
+        value = json.dumps([{"a": i, "b": "x" * 10} for i in range(10000)])
+        for binary in (False, True):
+            for read in ('read_raw_value', 'read_raw_to_end'):
+                with self.subTest(binary=binary, read=read):
+                    sizes.clear()
+                    tokens = Tokenizer(BytesIO(f'[{value}, 1]'.encode()), 1024, binary=binary)
+                    self.assertEqual(next(tokens), (0, '['))
+                    if read == 'read_raw_to_end':
+                        self.assertEqual(next(tokens), (0, '['))
+                    raw = getattr(tokens, read)()
+                    self.assertEqual(bytes(raw).decode() if binary else raw, value)
+                    self.assertGreater(len(sizes), 100)
+                    self.assertLessEqual(max(sizes), 2 * 1024)
+                    self.assertEqual(list(tokens), [(0, ','), (2, 1), (0, ']')])
+
+    def test_copy_value(self):
+        for binary in (False, True):
+            with self.subTest(binary=binary):
+                pieces = []
+                tokens = BlockTokenizer(BytesIO(self.DATA.encode()), 4, binary=binary)
+                self.assertTrue(tokens.copy_value(pieces.append))
+                self.assertGreater(len(pieces), 1)
+                self.assertEqual(''.join(bytes(p).decode() if binary else p for p in pieces), (
+                    '{"a": [1, "]}\\"", {"b": "x"}], "c": -2.5e3}'
+                ))
+                self.assertEqual(next(tokens), (1, 's"'))
+                self.assertTrue(tokens.copy_value(pieces.append))
+                self.assertTrue(tokens.copy_value(pieces.append))
+                self.assertFalse(tokens.copy_value(pieces.append))
+                self.assertEqual(list(tokens), [])
@@ -0,0 +1,132 @@
+from array import array
+from io import StringIO
+from unittest import TestCase, skipIf
+
+from json_stream import columnar
+from json_stream.block_tokenizer import BlockTokenizer
+from json_stream.columnar import Column, load_columns
+from json_stream.tokenizer import tokenize
+
+
+class TestColumn(TestCase):
+    def column(self, *values):
+        column = Column()
+        for value in values:
+            column.append(value)
+        return column
+
+    def test_typed(self):
+        for values, typecode in (([1, 2, 3], 'q'), ([1.5, 2.5], 'd'), ([True, False], 'b')):
+            with self.subTest(values=values):
+                column = self.column(*values)
+                self.assertEqual(column.values, array(typecode, values))
+                self.assertIsNone(column.mask)
+                self.assertEqual(column.to_list(), values)
+                self.assertEqual(list(column), values)
+
+    def test_nulls(self):
+        column = self.column(None, 1, None, 2)
+        self.assertEqual(column.values, array('q', [0, 1, 0, 2]))
+        self.assertEqual(column.mask, bytearray([1, 0, 1, 0]))
+        self.assertEqual(column.to_list(), [None, 1, None, 2])
+        self.assertEqual([column[i] for i in range(len(column))], [None, 1, None, 2])
+        self.assertEqual(self.column(None, None).to_list(), [None, None])
+
+    def test_promotion(self):
+        column = self.column(1, None, 2.5, 3)
+        self.assertEqual(column.values, array('d', [1, 0, 2.5, 3]))
+        self.assertEqual(column.to_list(), [1.0, None, 2.5, 3.0])
+
+    def test_inexact_promotion(self):
+        # ints a float can't hold exactly keep the values in a list
+        for values in ([1.5, 10 ** 400], [1.5, 2 ** 53 + 1], [2 ** 53 + 1, 1.5]):
+            with self.subTest(values=values):
+                column = self.column(*values)
+                self.assertIsInstance(column.values, list)
+                self.assertEqual(column.to_list(), values)
+        data = '[{"a": 1.5}, {"a": 1' + '0' * 400 + '}, {"a": 9007199254740993}]'
+        self.assertEqual(load_columns(StringIO(data))["a"].to_list(), [1.5, 10 ** 400, 2 ** 53 + 1])
+
+    def test_mixed(self):
+        for values in ([1, "a", None], ["a", 1], [True, 1], [1, 2 ** 64], [2 ** 64, 1], [1.5, True], [[1], 1]):
+            with self.subTest(values=values):
+                column = self.column(*values)
+                self.assertIsInstance(column.values, list)
+                self.assertEqual(column.to_list(), values)
+                self.assertEqual([type(v) for v in column], [type(v) for v in values])
+
+    @skipIf(columnar.numpy is None, "numpy is not available")
+    def test_to_numpy(self):  # pragma: no cover
+        values = self.column(1, 2, 3).to_numpy()
+        self.assertEqual(values.dtype, columnar.numpy.int64)
+        self.assertEqual(values.tolist(), [1, 2, 3])
+        values = self.column(1.5, None).to_numpy()
+        self.assertEqual(values.tolist(), [1.5, None])
+        self.assertEqual(self.column("a", None).to_numpy().tolist(), ["a", None])
+
+    @skipIf(columnar.numpy is not None, "numpy is available")
+    def test_to_numpy_unavailable(self):
+        with self.assertRaisesRegex(ValueError, "numpy"):
+            self.column(1).to_numpy()
+
+
+class TestLoadColumns(TestCase):
+    JSON = (
+        '{"count": 3, "results": ['
+        '{"id": 1, "name": "a", "score": 1.5, "tags": ["x"]}, '
+        '{"name": "b", "id": 2, "score": null, "extra": {"a": {}}}, '
+        '{"id": 3, "score": 2, "name": "c", "name": "d"}'
+        ']}'
+    )
+
+    def load(self, data, *args, **kwargs):
+        for tokenizer in (tokenize, BlockTokenizer):
+            with self.subTest(tokenizer=tokenizer):
+                columns = load_columns(StringIO(data), *args, tokenizer=tokenizer, **kwargs)
+                yield {name: column.to_list() for name, column in columns.items()}
+
+    def test_load_columns(self):
+        for columns in self.load(self.JSON, "results"):
+            self.assertEqual(columns, {
+                "id": [1, 2, 3],
+                "name": ["a", "b", "c"],
+                "score": [1.5, None, 2.0],
+                "tags": [["x"], None, None],
+                "extra": [None, {"a": {}}, None],
+            })
+
+    def test_columns(self):
+        for columns in self.load(self.JSON, "results", columns=["score", "id", "missing"]):
+            self.assertEqual(columns, {"score": [1.5, None, 2.0], "id": [1, 2, 3], "missing": [None, None, None]})
+
+    def test_typed(self):
+        columns = load_columns(StringIO(self.JSON), "results", columns=["id", "score"])
+        self.assertEqual(columns["id"].values, array('q', [1, 2, 3]))
+        self.assertEqual(columns["score"].values, array('d', [1.5, 0, 2]))
+        self.assertEqual(columns["score"].mask, bytearray([0, 1, 0]))
+
+    def test_document(self):
+        for columns in self.load('[{"a": 1}, {}, {"b": 2}]'):
+            self.assertEqual(columns, {"a": [1, None, None], "b": [None, None, 2]})
+        for columns in self.load('[]', columns=["a"]):
+            self.assertEqual(columns, {"a": []})
+
+    def test_many_lists(self):
+        data = '{"pages": [{"results": [{"a": 1}]}, {"results": []}, {"results": [{"a": 2}]}]} {"pages": [{}]}'
+        for columns in self.load(data, "pages[*].results"):
+            self.assertEqual(columns, {"a": [1, 2]})
+
+    def test_invalid(self):
+        for data, error in (
+            ('{"results": {}}', "Expecting a list of records at ('results',), got {"),
+            ('{"results": [1]}', "Expecting an object, got 1"),
+            ('{"results": [{"a": 1} {"a": 2}]}', "Expecting comma or ], got {"),
+            ('{"results": [{"a": 1 "b": 2}]}', "Expecting comma or }, got b"),
+            ('{"results": [{"a" 1}]}', "Expecting :"),
+            ('{"results": [{"a": 1}', "Unterminated list at end of file"),
+            ('{"results": [{"a": 1', "Unterminated object at end of file"),
+        ):
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError) as context:
+                    load_columns(StringIO(data), "results", tokenizer=tokenize)
+                self.assertEqual(str(context.exception), error)
@@ -0,0 +1,116 @@
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+import tempfile
+from unittest import TestCase, skipIf
+
+from json_stream import compression, load, load_many, to_standard_types, visit
+
+DATA = {"results": [{"id": i, "name": "item %d" % i} for i in range(1000)]}
+ENCODED = json.dumps(DATA).encode()
+
+FORMATS = {
+    "gzip": gzip.compress,
+    "bz2": bz2.compress,
+    "xz": lzma.compress,
+}
+
+
+class NonSeekable(io.RawIOBase):
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readinto(self, buffer):
+        return self._data.readinto(buffer)
+
+    def readable(self):
+        return True
+
+
+class TestDecompression(TestCase):
+    def _chunks(self, data, size):
+        return [data[i:i + size] for i in range(0, len(data), size)]
+
+    def test_file(self):
+        for name, compress in FORMATS.items():
+            with self.subTest(name):
+                data = load(io.BytesIO(compress(ENCODED)))
+                self.assertEqual(to_standard_types(data), DATA)
+
+    def test_buffered_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "data.json.gz")
+            with gzip.open(path, "wb") as f:
+                f.write(ENCODED)
+            with open(path, "rb") as f:
+                self.assertEqual(to_standard_types(load(f)), DATA)
+
+    def test_iterable(self):
+        for name, compress in FORMATS.items():
+            for size in (1, 7, 1024):
+                with self.subTest(name, size=size):
+                    data = load(self._chunks(compress(ENCODED), size))
+                    self.assertEqual(to_standard_types(data), DATA)
+
+    def test_prefetch(self):
+        data = load(io.BytesIO(gzip.compress(ENCODED)), prefetch=2)
+        self.assertEqual(to_standard_types(data), DATA)
+
+    def test_visit(self):
+        visited = []
+        visit(self._chunks(lzma.compress(b'{"a": [1, 2]}'), 3), lambda v, p: visited.append((v, p)))
+        self.assertListEqual(visited, [(1, ("a", 0)), (2, ("a", 1))])
+
+    def test_concatenated_streams(self):
+        for name, compress in FORMATS.items():
+            with self.subTest(name):
+                data = compress(b'{"a": 1}') + compress(b' {"b": 2}')
+                self.assertListEqual(list(map(to_standard_types, load_many(io.BytesIO(data)))), [{"a": 1}, {"b": 2}])
+
+    def test_truncated(self):
+        for name, compress in FORMATS.items():
+            with self.subTest(name):
+                data = compress(ENCODED)
+                with self.assertRaises(EOFError):
+                    to_standard_types(load(io.BytesIO(data[:len(data) // 2])))
+
+    def test_uncompressed_file_untouched(self):
+        f = io.BytesIO(b'{"a": 1} trailing')
+        self.assertEqual(to_standard_types(load(f, persistent=True)), {"a": 1})
+
+    def test_non_seekable_file_not_detected(self):
+        # the start of the data can't be checked without consuming it
+        with self.assertRaises(ValueError):
+            to_standard_types(load(NonSeekable(gzip.compress(ENCODED))))
+
+    def test_text(self):
+        self.assertEqual(to_standard_types(load(io.StringIO('{"a": 1}'))), {"a": 1})
+        self.assertEqual(to_standard_types(load(['{"a"', ': 1}'])), {"a": 1})
+
+    def test_decompressed_chunk_size(self):
+        fp = io.BytesIO(gzip.compress(b"x" * 100000))
+        chunks = compression.decompressed(fp.read, compression.detect(b"\x1f\x8b"), chunk_size=1000)
+        sizes = [len(chunk) for chunk in chunks if chunk]
+        self.assertEqual(sum(sizes), 100000)
+        self.assertLessEqual(max(sizes), 1000)
+
+    def test_detect(self):
+        self.assertIsNone(compression.detect(b'{"a"'))
+        self.assertIsNone(compression.detect(b''))
+        self.assertIsNotNone(compression.detect(gzip.compress(b"")))
+
+    @skipIf(compression.zstd is None and compression.zstandard is None, "zstd is not available")
+    def test_zstd(self):  # pragma: no cover
+        if compression.zstd is not None:
+            data = compression.zstd.compress(ENCODED)
+        else:
+            data = compression.zstandard.ZstdCompressor().compress(ENCODED)
+        self.assertEqual(to_standard_types(load(self._chunks(data, 100))), DATA)
+
+    @skipIf(compression.zstd is not None or compression.zstandard is not None, "zstd is available")
+    def test_zstd_unavailable(self):
+        with self.assertRaisesRegex(ValueError, "zstandard"):
+            load([b"\x28\xb5\x2f\xfd\x00\x00"])
@@ -0,0 +1,137 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from json_stream import index, to_standard_types
+from json_stream.block_tokenizer import BlockTokenizer
+
+ITEMS = [{"id": i, "name": "item [%d]" % i, "tags": ["x"] * (i % 3)} for i in range(25)] + [1, "two", None, []]
+
+
+class TestIndex(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "data.json")
+        self.write(json.dumps(ITEMS, indent=1))
+
+    def write(self, text):
+        with open(self.path, "w") as f:
+            f.write(text)
+
+    def open(self, **kwargs):
+        idx = index.open(self.path, **kwargs)
+        self.addCleanup(idx.close)
+        return idx
+
+    def assertElements(self, idx, expected, **kwargs):
+        for n in range(len(expected)):
+            self.assertEqual(to_standard_types(idx.load(n, **kwargs)), expected[n])
+        self.assertEqual([to_standard_types(v) for v in idx.load_many(**kwargs)], expected)
+        self.assertEqual([to_standard_types(v) for v in idx.load_many(3, 11, **kwargs)], expected[3:11])
+
+    def test_elements(self):
+        index.build(self.path)
+        idx = self.open()
+        self.assertFalse(idx.documents)
+        self.assertEqual(len(idx), len(ITEMS))
+        self.assertEqual(len(idx.offsets), len(ITEMS))
+        self.assertElements(idx, ITEMS)
+        self.assertElements(idx, ITEMS, tokenizer=BlockTokenizer)
+
+    def test_sampled(self):
+        index.build(self.path, every=4)
+        idx = self.open()
+        self.assertEqual(idx.every, 4)
+        self.assertEqual(len(idx.offsets), 8)
+        self.assertElements(idx, ITEMS)
+
+    def test_negative_and_out_of_range(self):
+        idx = index.build(self.path)
+        self.addCleanup(idx.close)
+        self.assertEqual(to_standard_types(idx.load(-1)), [])
+        with self.assertRaises(IndexError):
+            idx.load(len(ITEMS))
+        self.assertEqual(list(idx.load_many(10, 5)), [])
+
+    def test_persistent(self):
+        idx = index.build(self.path)
+        self.addCleanup(idx.close)
+        item = idx.load(2, persistent=True)
+        self.assertEqual(item["tags"], item["tags"])
+        self.assertEqual(to_standard_types(item), ITEMS[2])
+
+    def test_documents(self):
+        self.write("\n".join(json.dumps(item) for item in ITEMS) + "\n")
+        for every in (1, 3):
+            with self.subTest(every=every):
+                index.build(self.path, every=every)
+                idx = self.open()
+                self.assertTrue(idx.documents)
+                self.assertEqual(len(idx), len(ITEMS))
+                self.assertElements(idx, ITEMS)
+
+    def test_documents_starting_with_a_list(self):
+        self.write('[1] [2, 3] "a" {"b": []}')
+        with self.assertRaisesRegex(ValueError, "documents=True"):
+            index.build(self.path)
+        idx = index.build(self.path, documents=True)
+        self.addCleanup(idx.close)
+        self.assertElements(idx, [[1], [2, 3], "a", {"b": []}])
+
+    def test_empty(self):
+        self.write("[]")
+        idx = index.build(self.path)
+        self.assertEqual(len(idx), 0)
+        self.assertEqual(list(idx.load_many()), [])
+        self.write("  ")
+        self.assertEqual(len(index.build(self.path)), 0)
+
+    def test_not_a_list(self):
+        self.write('{"a": 1}')
+        with self.assertRaisesRegex(ValueError, "Expecting a list"):
+            index.build(self.path, documents=False)
+
+    def test_invalid(self):
+        for text in ('[1, 2', '[1 2]', '[1,]', '[1] 2', '}'):
+            with self.subTest(text=text):
+                self.write(text)
+                with self.assertRaises(ValueError):
+                    index.build(self.path)
+
+    def test_index_path(self):
+        index_path = self.path + ".custom"
+        index.build(self.path, index_path=index_path)
+        self.assertFalse(os.path.exists(self.path + index.INDEX_SUFFIX))
+        self.assertEqual(len(self.open(index_path=index_path)), len(ITEMS))
+
+    def test_missing(self):
+        with self.assertRaises(FileNotFoundError):
+            index.open(self.path)
+        idx = self.open(rebuild=True)
+        self.assertEqual(len(idx), len(ITEMS))
+        self.assertTrue(os.path.exists(self.path + index.INDEX_SUFFIX))
+
+    def test_stale(self):
+        index.build(self.path, every=2)
+        self.write(json.dumps(ITEMS[:5]))
+        with self.assertRaises(index.StaleIndexError):
+            index.open(self.path)
+        idx = self.open(rebuild=True)
+        self.assertEqual(idx.every, 2)
+        self.assertElements(idx, ITEMS[:5])
+
+    def test_stale_after_open(self):
+        idx = index.build(self.path)
+        self.addCleanup(idx.close)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        with self.assertRaises(index.StaleIndexError):
+            idx.load(0)
+
+    def test_not_an_index(self):
+        with open(self.path + index.INDEX_SUFFIX, "wb") as f:
+            f.write(b"x" * 64)
+        with self.assertRaisesRegex(ValueError, "Not a json-stream index"):
+            index.open(self.path)
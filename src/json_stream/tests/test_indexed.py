@@ -0,0 +1,147 @@
+import io
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from json_stream import to_standard_types
+from json_stream.indexed import load, load_many, IndexedStreamingJSONList, IndexedStreamingJSONObject
+
+DATA = {
+    "count": 3,
+    "results": [
+        {"id": 1, "name": "é中", "tags": ["a", "b"]},
+        {"id": 2, "name": "two", "tags": []},
+        {"id": 3, "name": "three \"quoted\"", "tags": [{"x": None}]},
+    ],
+    "done": True,
+}
+
+
+class CountingFile(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, buffer):
+        length = super().readinto(buffer)
+        self.bytes_read += length
+        return length
+
+
+class TestIndexed(TestCase):
+    def setUp(self):
+        self.encoded = json.dumps(DATA, indent=2).encode()
+
+    def test_load(self):
+        data = load(io.BytesIO(self.encoded))
+        self.assertIsInstance(data, IndexedStreamingJSONObject)
+        self.assertEqual(to_standard_types(data), DATA)
+        # and again, from the index
+        self.assertEqual(to_standard_types(data), DATA)
+
+    def test_revisit(self):
+        data = load(io.BytesIO(self.encoded))
+        results = data["results"]
+        self.assertIsInstance(results, IndexedStreamingJSONList)
+        self.assertEqual(results[2]["name"], 'three "quoted"')
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(results[0]["tags"][1], "b")
+        self.assertEqual(to_standard_types(results[1]), DATA["results"][1])
+        self.assertEqual(data["done"], True)
+        self.assertEqual(to_standard_types(data["results"][-1]["tags"][0]), {"x": None})
+
+    def test_values_not_kept(self):
+        data = load(io.BytesIO(self.encoded))
+        data.read_all()
+        self.assertFalse(hasattr(data, "_data"))
+        self.assertEqual(len(data._starts), 3)
+        self.assertEqual(len(data["results"]._starts), 0)  # revisited values are indexed when they are read
+
+    def test_only_value_reread(self):
+        items = [{"id": i, "padding": "x" * 1000} for i in range(100)]
+        f = CountingFile(json.dumps(items).encode())
+        data = load(f)
+        self.assertEqual(len(data), 100)
+        read = f.bytes_read
+        self.assertEqual(data[50]["id"], 50)
+        self.assertLess(f.bytes_read - read, 1100)
+
+    def test_iteration(self):
+        data = load(io.BytesIO(self.encoded))
+        self.assertListEqual(list(data), ["count", "results", "done"])
+        self.assertListEqual(list(data.keys()), ["count", "results", "done"])
+        self.assertListEqual(list(data), ["count", "results", "done"])
+        self.assertEqual([v for k, v in data.items() if k != "results"], [3, True])
+        self.assertIn("done", data)
+        self.assertNotIn("missing", data)
+        self.assertEqual(len(data), 3)
+
+    def test_iteration_while_streaming(self):
+        data = load(io.BytesIO(b'{"a": 1, "b": [2], "c": 3}'))
+        keys = iter(data)
+        self.assertEqual(next(keys), "a")
+        self.assertEqual(data["b"][0], 2)
+        self.assertListEqual(list(keys), ["b", "c"])
+        self.assertListEqual([to_standard_types(v) for v in data.values()], [1, [2], 3])
+
+    def test_partial_iteration(self):
+        data = load(io.BytesIO(b'[1, [2, 3], "4", 5]'))
+        self.assertEqual(data[1][1], 3)
+        self.assertListEqual([to_standard_types(v) for v in data], [1, [2, 3], "4", 5])
+
+    def test_current_child(self):
+        data = load(io.BytesIO(b'{"a": [1, 2, 3], "b": 4}'))
+        a = data["a"]
+        self.assertEqual(a[0], 1)
+        self.assertIs(data["a"], a)
+        self.assertListEqual(list(a), [1, 2, 3])
+        self.assertEqual(data["b"], 4)
+
+    def test_missing(self):
+        data = load(io.BytesIO(b'{"a": [1]}'))
+        with self.assertRaises(KeyError):
+            data["b"]
+        with self.assertRaises(IndexError):
+            data["a"][1]
+        with self.assertRaises(IndexError):
+            data["a"][-2]
+        self.assertEqual(data["a"][-1], 1)
+
+    def test_file_position(self):
+        f = io.BytesIO(b'header [1, {"a": 2}, 3]')
+        f.seek(7)
+        data = load(f)
+        self.assertEqual(data[2], 3)
+        self.assertEqual(data[1]["a"], 2)
+
+    def test_mmap(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "data.json")
+            with open(path, "wb") as f:
+                f.write(self.encoded)
+            data = load(path, mmap=True)
+            data.read_all()
+            self.assertEqual(data["results"][1]["name"], "two")
+            self.assertEqual(to_standard_types(data), DATA)
+            del data
+
+    def test_many(self):
+        documents = list(load_many(io.BytesIO(b'{"a": 1} [2, 3] 4')))
+        self.assertEqual(documents[2], 4)
+        self.assertEqual(documents[1][1], 3)
+        self.assertEqual(documents[0]["a"], 1)
+
+    def test_not_seekable_binary(self):
+        with self.assertRaisesRegex(ValueError, "seekable binary"):
+            load(io.StringIO('{}'))
+
+    def test_unterminated(self):
+        data = load(io.BytesIO(b'{"a": [1, 2'))
+        with self.assertRaisesRegex(ValueError, "Unterminated list"):
+            data.read_all()
@@ -1,6 +1,10 @@
 import io
+import threading
+import time
 from unittest import TestCase
-from json_stream.iterators import IterableStream
+
+from json_stream import load, to_standard_types
+from json_stream.iterators import IterableStream, prefetched
 
 
 class TestIterableStream(TestCase):
@@ -28,3 +32,126 @@ class TestIterableStream(TestCase):
         # stream it and check the result
         stream = IterableStream(data_str)
         self.assertEqual(stream.read(), expected)
+
+    def test_read_partial_chunks(self):
+        stream = IterableStream([b"abcdef", b"gh"])
+        self.assertEqual(stream.read(4), b"abcd")
+        self.assertEqual(stream.read(4), b"ef")
+        self.assertEqual(stream.read(4), b"gh")
+        self.assertEqual(stream.read(4), b"")
+
+    def test_empty_chunks(self):
+        # an empty chunk isn't the end of the stream
+        stream = IterableStream([b"ab", b"", "", b"cd", b""])
+        self.assertEqual(stream.read(), b"abcd")
+
+    def test_readinto1(self):
+        stream = IterableStream([b"abcdef", bytearray(b"gh")])
+        buffer = bytearray(4)
+        self.assertEqual(stream.readinto1(buffer), 4)
+        self.assertEqual(buffer, b"abcd")
+        self.assertEqual(stream.readinto1(buffer), 2)
+        self.assertEqual(buffer[:2], b"ef")
+        self.assertEqual(stream.readinto1(memoryview(buffer)[1:]), 2)
+        self.assertEqual(buffer, b"eghd")
+        self.assertEqual(stream.readinto1(buffer), 0)
+
+    def test_read1(self):
+        chunk = b"abcdef"
+        stream = IterableStream([chunk, b"gh"])
+        self.assertIs(stream.read1(), chunk)
+        self.assertEqual(stream.read1(1), b"g")
+        self.assertEqual(stream.read1(5), b"h")
+        self.assertEqual(stream.read1(), b"")
+
+    def test_read1_only_reads_one_chunk(self):
+        requested = []
+
+        def chunks():
+            for chunk in (b"ab", b"cd"):
+                requested.append(chunk)
+                yield chunk
+
+        stream = IterableStream(chunks())
+        self.assertEqual(stream.read1(10), b"ab")
+        self.assertEqual(requested, [b"ab"])
+
+    def test_peek(self):
+        stream = IterableStream([b"abc", b"d", b"e", b"fgh"])
+        self.assertEqual(stream.peek(), b"abc")
+        self.assertEqual(stream.read(2), b"ab")
+        self.assertEqual(stream.peek(3), b"cde")
+        self.assertEqual(stream.peek(4), b"cdefgh")
+        self.assertEqual(stream.read(2), b"cd")
+        self.assertEqual(stream.peek(10), b"efgh")
+        self.assertEqual(stream.read(), b"efgh")
+        self.assertEqual(stream.peek(), b"")
+
+    def test_read_after_peek_reuses_buffer(self):
+        stream = IterableStream([b"a", b"b", b"c", b"d", b"e"])
+        self.assertEqual(stream.peek(2), b"ab")
+        self.assertEqual(stream.read(1), b"a")
+        self.assertEqual(stream.peek(3), b"bcd")
+        self.assertEqual(stream.read(), b"bcde")
+
+
+class TestPrefetched(TestCase):
+    def test_iterable(self):
+        chunks = [b"a", b"b", b"c"]
+        self.assertListEqual(list(prefetched(chunks, 2)), chunks)
+
+    def test_file(self):
+        self.assertEqual(b"".join(prefetched(io.BytesIO(b"abcdefg"), 2, chunk_size=3)), b"abcdefg")
+        self.assertEqual("".join(prefetched(io.StringIO("abcdefg"), 2, chunk_size=3)), "abcdefg")
+
+    def test_not_iterable(self):
+        with self.assertRaises(TypeError):
+            prefetched(1, 2)
+
+    def test_bounded(self):
+        requested = []
+        resume = threading.Event()
+
+        def chunks():
+            for i in range(10):
+                requested.append(i)
+                yield b"x"
+                if i == 3:
+                    resume.wait(1)
+
+        it = prefetched(chunks(), 2)
+        self.assertEqual(next(it), b"x")
+        time.sleep(0.2)
+        # the consumed chunk, two waiting, and one waiting to be added
+        self.assertListEqual(requested, [0, 1, 2, 3])
+        resume.set()
+        self.assertEqual(len(list(it)), 9)
+
+    def test_error(self):
+        def chunks():
+            yield b"a"
+            raise OSError("connection reset")
+
+        it = prefetched(chunks(), 2)
+        self.assertEqual(next(it), b"a")
+        with self.assertRaisesRegex(OSError, "connection reset"):
+            next(it)
+
+    def test_stops_reading_when_closed(self):
+        requested = []
+
+        def chunks():
+            for i in range(100):
+                requested.append(i)
+                yield b"x"
+
+        it = prefetched(chunks(), 1)
+        next(it)
+        it.close()
+        time.sleep(0.3)
+        self.assertLess(len(requested), 5)
+
+    def test_load(self):
+        chunks = [b'{"a": [1, 2', b', 3], "b": ', b'"c"}']
+        data = load(chunks, prefetch=2)
+        self.assertEqual(to_standard_types(data), {"a": [1, 2, 3], "b": "c"})
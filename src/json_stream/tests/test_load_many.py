@@ -1,3 +1,5 @@
+import json
+import re
 import unittest
 from io import StringIO, BytesIO
 from unittest import TestCase
@@ -100,3 +102,69 @@ class TestLoadMany(TestCase):
 
         with self.assertRaises(StopIteration):
             next(gen)
+
+
+class TestLoadManyNDJSON(TestCase):
+    LINES = ['{"a": 1}', '[1, 2]', '3', 'true', 'null', '"x"', '{}', '[]', '{"b": "é\\n"}']
+    EXPECTED = [{"a": 1}, [1, 2], 3, True, None, "x", {}, [], {"b": "é\n"}]
+
+    def load(self, data, **kwargs):
+        return [to_standard_types(v) for v in json_stream.load_many(data, ndjson=True, **kwargs)]
+
+    def test_text_and_binary(self):
+        payload = "\n".join(self.LINES)
+        self.assertListEqual(self.load(StringIO(payload)), self.EXPECTED)
+        self.assertListEqual(self.load(BytesIO(payload.encode())), self.EXPECTED)
+        self.assertListEqual(self.load(BytesIO((payload + "\n").encode())), self.EXPECTED)
+
+    def test_lines_split_across_chunks(self):
+        payload = "\r\n".join(self.LINES).encode()
+        chunks = [payload[i:i + 3] for i in range(0, len(payload), 3)]
+        self.assertListEqual(self.load(chunks), self.EXPECTED)
+
+    def test_small_lines_decoded_as_standard_types(self):
+        items = list(json_stream.load_many(BytesIO(b'{"a": [1]}\n[2]'), ndjson=True))
+        self.assertEqual(items, [{"a": [1]}, [2]])
+        self.assertIs(type(items[0]), dict)
+
+    def test_long_lines_streamed(self):
+        long = {"a": ["x" * 100] * 100}
+        payload = "\n".join(['{"a": 1}', json.dumps(long), '[2]', json.dumps(long)]).encode()
+        for chunks in ([payload], [payload[i:i + 7] for i in range(0, len(payload), 7)]):
+            with self.subTest(chunk_size=len(chunks[0])):
+                items = json_stream.load_many(chunks, ndjson=True, max_line_size=50, persistent=True)
+                first, second, third, fourth = items
+                self.assertEqual(first, {"a": 1})
+                self.assertIsInstance(second, json_stream.base.PersistentStreamingJSONObject)
+                self.assertEqual(to_standard_types(second), long)
+                self.assertEqual(third, [2])
+                self.assertEqual(to_standard_types(fourth), long)
+
+    def test_long_line_skipped_unread(self):
+        payload = "\n".join(['[' + '1, ' * 100 + '1]', '[2]']).encode()
+        items = json_stream.load_many(BytesIO(payload), ndjson=True, max_line_size=10)
+        self.assertEqual(next(iter(next(items))), 1)
+        self.assertEqual(next(items), [2])
+
+    def test_blank_lines_and_several_documents(self):
+        payload = b'\n1 2\n\n  \n[3]\n'
+        self.assertListEqual(self.load(BytesIO(payload)), [1, 2, [3]])
+
+    def test_invalid_line(self):
+        with self.assertRaises(ValueError):
+            self.load(BytesIO(b'1\n{"a": \n2'))
+
+    def test_lone_surrogates(self):
+        # json.loads accepts escaped UTF-16 surrogates that aren't paired, which the tokenizer rejects
+        for line in ('{"b": "\\ud800"}', '"\\udc00"', '["\\ud834\\u00e9"]'):
+            with self.assertRaises(ValueError) as expected:
+                [to_standard_types(v) for v in json_stream.load_many(StringIO(line))]
+            for data in (StringIO(line + "\n"), BytesIO(line.encode())):
+                with self.subTest(line=line, binary=isinstance(data, BytesIO)):
+                    with self.assertRaisesRegex(ValueError, "^" + re.escape(str(expected.exception)) + "$"):
+                        self.load(data)
+        self.assertListEqual(self.load(StringIO('"\\ud834\\udd1e"\n"\\\\ud800"')), ["\U0001d11e", "\\ud800"])
+
+    def test_fields(self):
+        with self.assertRaises(ValueError):
+            list(json_stream.load_many(BytesIO(b'1'), ndjson=True, fields=["a"]))
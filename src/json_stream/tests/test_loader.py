@@ -1,8 +1,16 @@
 import copy
+import gzip
 import json
+import os
+import tempfile
+from array import array
 from io import StringIO
+from unittest import TestCase
 
-from json_stream import load
+from json_stream import load, load_many, to_standard_types, visit
+from json_stream.block_tokenizer import BlockTokenizer
+from json_stream.select_tokenizer import default_tokenizer
+from json_stream.tokenizer import tokenize
 from json_stream.base import (
     TransientAccessException,
     PersistentStreamingJSONObject,
@@ -257,3 +265,363 @@ class TestLoader(JSONLoadTestCase):
         data = json.dumps('𝄞')
         result = load(StringIO(data))
         self.assertEqual(result, '𝄞')
+
+
+class RecordingTokenizer(BlockTokenizer):
+    def __init__(self, stream, **kwargs):
+        super().__init__(stream, **kwargs)
+        self.tokens = []
+
+    def __next__(self):
+        token = super().__next__()
+        self.tokens.append(token[1])
+        return token
+
+
+class TestSkipping(TestCase):
+    DOCUMENT = json.dumps({
+        "blob": {"nested": ["with ] and } in strings", {"deep": [[1, 2], "\\\""]}], "more": 1.5},
+        "scalar": "skipped",
+        "results": [{"id": 1, "junk": [["a"]]}, "x", [["b"]], {"id": 2}],
+        "after": True,
+    })
+
+    def test_find_item_skips_values(self):
+        for buffer_size in (1, 3, 64):
+            with self.subTest(buffer_size=buffer_size):
+                data = load(StringIO(self.DOCUMENT), tokenizer=RecordingTokenizer, buffer_size=buffer_size)
+                results = data["results"]
+                self.assertEqual(results[3]["id"], 2)
+                self.assertEqual(data["after"], True)
+                tokens = data.tokenizer.tokens
+                self.assertNotIn("nested", tokens)
+                self.assertNotIn("skipped", tokens)
+                self.assertNotIn("x", tokens)
+                self.assertNotIn("junk", tokens)
+
+    def test_abandoned_children_skipped(self):
+        data = load(StringIO(self.DOCUMENT), tokenizer=RecordingTokenizer)
+        self.assertEqual(next(iter(data["blob"]["nested"])), "with ] and } in strings")
+        ids = [item["id"] for item in data["results"] if isinstance(item, TransientStreamingJSONObject)]
+        self.assertEqual(ids, [1, 2])
+        self.assertEqual(data["after"], True)
+        tokens = data.tokenizer.tokens
+        self.assertNotIn("deep", tokens)
+        self.assertNotIn("more", tokens)
+        self.assertNotIn("junk", tokens)
+
+    def test_persistent_children_not_skipped(self):
+        data = load(StringIO(self.DOCUMENT)).persistent()
+        blob = data["blob"]
+        self.assertEqual(data["after"], True)
+        self.assertEqual(blob["more"], 1.5)
+        self.assertEqual(blob["nested"][1]["deep"][1], '\\"')
+
+    def test_skipped_containers_are_passed(self):
+        data = load(StringIO(self.DOCUMENT))
+        results = data["results"]
+        _ = data["after"]
+        with self.assertRaisesRegex(TransientAccessException, "Index 0 already passed in this stream"):
+            _ = results[0]
+        with self.assertRaises(TransientAccessException):
+            _ = data["blob"]
+
+    def test_skipped_lists_are_counted(self):
+        # indices past the end of a skipped list are out of range, as if it had been read
+        for tokenizer in (tokenize, BlockTokenizer):
+            with self.subTest(tokenizer=tokenizer):
+                data = load(StringIO('{"a": [1, [2, "]", {"b": [3]}], 4, "c,d"], "e": 5}'), tokenizer=tokenizer)
+                a = data["a"]
+                self.assertEqual(a[1][0], 2)
+                self.assertEqual(data["e"], 5)
+                with self.assertRaisesRegex(TransientAccessException, "Index 2 already passed in this stream"):
+                    _ = a[2]
+                with self.assertRaisesRegex(IndexError, "Index 4 out of range"):
+                    _ = a[4]
+                data = load(StringIO('{"a": [1], "b": 2}'), tokenizer=tokenizer)
+                a = data["a"]
+                self.assertEqual(data["b"], 2)
+                with self.assertRaisesRegex(IndexError, "Index 5 out of range"):
+                    _ = a[5]
+                data = load(StringIO('[[]]'), tokenizer=tokenizer)
+                self.assertEqual(to_standard_types(data), [[]])
+                with self.assertRaisesRegex(IndexError, "Index 1 out of range"):
+                    _ = data[1]
+
+    def test_same_results_without_skipping(self):
+        for tokenizer in (tokenize, BlockTokenizer):
+            with self.subTest(tokenizer=tokenizer):
+                data = load(StringIO(self.DOCUMENT), tokenizer=tokenizer)
+                self.assertEqual(data["results"][2][0][0], "b")
+                self.assertEqual(data["after"], True)
+                data = load(StringIO('[["a"], 1, "b"]'), tokenizer=tokenizer)
+                self.assertEqual(data[2], "b")
+                with self.assertRaises(IndexError):
+                    _ = load(StringIO('[["a"], 1, "b"]'), tokenizer=tokenizer)[3]
+                with self.assertRaises(IndexError):
+                    _ = load(StringIO('[]'), tokenizer=tokenizer)[1]
+
+    def test_unterminated_skipped_value(self):
+        for document in ('{"a": [1, {"b": "c"', '{"a": "unterminated', '[[1, [2', '[1, 2'):
+            with self.subTest(document=document):
+                with self.assertRaisesRegex(ValueError, "Unterminated (list|object) at end of file"):
+                    _ = load(StringIO(document))["z" if document[0] == "{" else 5]
+
+
+class TestFields(TestCase):
+    DOCUMENT = json.dumps({
+        "count": 2,
+        "results": [
+            {"id": 1, "name": "a", "meta": {"created": "today", "tags": ["x"]}, "junk": [["skipped"]]},
+            {"id": 2, "name": "b", "meta": "not an object", "junk": {"skipped": 1}},
+        ],
+    })
+
+    def test_load_fields(self):
+        for tokenizer in (BlockTokenizer, tokenize):
+            with self.subTest(tokenizer=tokenizer):
+                data = load(
+                    StringIO(self.DOCUMENT), persistent=True, tokenizer=tokenizer,
+                    fields=["results[*].id", "results.*.meta.created"],
+                )
+                results = data["results"]
+                self.assertEqual(results[1]["id"], 2)
+                self.assertEqual(results[0]["id"], 1)
+                self.assertEqual(to_standard_types(data), {
+                    "results": [{"id": 1, "meta": {"created": "today"}}, {"id": 2}],
+                })
+                with self.assertRaises(KeyError):
+                    _ = data["count"]
+                with self.assertRaises(KeyError):
+                    _ = results[0]["name"]
+
+    def test_whole_values(self):
+        data = load(StringIO(self.DOCUMENT), persistent=True, fields=["results[*].meta", "count"])
+        self.assertEqual(to_standard_types(data), {
+            "count": 2,
+            "results": [{"meta": {"created": "today", "tags": ["x"]}}, {"meta": "not an object"}],
+        })
+        data = load(StringIO(self.DOCUMENT), persistent=True, fields=[""])
+        self.assertEqual(to_standard_types(data), json.loads(self.DOCUMENT))
+
+    def test_list_indices(self):
+        for fields in (["results[1].id"], "results[0]", ["count", "*[*][0]"]):
+            with self.subTest(fields=fields):
+                with self.assertRaisesRegex(ValueError, "list indices can't be used in fields"):
+                    load(StringIO(self.DOCUMENT), persistent=True, fields=fields)
+
+    def test_items_keep_indices(self):
+        document = '{"r": [{"id": 1, "x": 1}, 5, [{"id": 2}], null, {"x": 3, "id": 4}]}'
+        for tokenizer in (BlockTokenizer, tokenize):
+            with self.subTest(tokenizer=tokenizer):
+                data = load(StringIO(document), persistent=True, tokenizer=tokenizer, fields=["r[*].id"])
+                self.assertEqual(data["r"][4]["id"], 4)
+                self.assertEqual(data["r"][1], 5)
+                self.assertEqual(to_standard_types(data), {"r": [{"id": 1}, 5, [], None, {"id": 4}]})
+
+    def test_transient_fields(self):
+        data = load(StringIO(self.DOCUMENT), fields="results")
+        self.assertEqual(list(data), ["results"])
+        data = load(StringIO(self.DOCUMENT), fields=["results.*.name"])
+        self.assertEqual([item["name"] for item in data["results"]], ["a", "b"])
+
+    def test_persistent_fields(self):
+        data = load(StringIO(self.DOCUMENT), tokenizer=RecordingTokenizer)
+        results = data["results"].persistent(fields=["*.id", "*.name"])
+        items = list(results)
+        self.assertIsInstance(items[0], PersistentStreamingJSONObject)
+        self.assertEqual([dict(item) for item in items], [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}])
+        self.assertEqual(items[0]["id"], 1)
+        tokens = data.tokenizer.tokens
+        self.assertNotIn("skipped", tokens)
+        self.assertNotIn("today", tokens)
+
+
+class TestMmap(TestCase):
+    DATA = {"a": [1, 2.5, "é中"], "b": {"c": None}}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "data.json")
+        with open(self.path, "wb") as f:
+            f.write(json.dumps(self.DATA).encode())
+
+    def test_path(self):
+        data = load(self.path, mmap=True, tokenizer=BlockTokenizer)
+        self.assertEqual(to_standard_types(data), self.DATA)
+
+    def test_file_and_fd(self):
+        with open(self.path, "rb") as f:
+            self.assertEqual(to_standard_types(load(f, mmap=True, tokenizer=BlockTokenizer)), self.DATA)
+            fd = os.open(self.path, os.O_RDONLY)
+            self.addCleanup(os.close, fd)
+            self.assertEqual(to_standard_types(load(fd, mmap=True, tokenizer=BlockTokenizer)), self.DATA)
+
+    def test_file_position(self):
+        with open(self.path, "wb") as f:
+            f.write(b'header {"a": 1}')
+        with open(self.path, "rb") as f:
+            f.seek(7)
+            self.assertEqual(to_standard_types(load(f, mmap=True, tokenizer=BlockTokenizer)), {"a": 1})
+
+    def test_other_tokenizers(self):
+        # which read the mapped file like any other file
+        for tokenizer in (tokenize, default_tokenizer):
+            with self.subTest(tokenizer=tokenizer):
+                self.assertEqual(to_standard_types(load(self.path, mmap=True, tokenizer=tokenizer)), self.DATA)
+
+    def test_many(self):
+        with open(self.path, "wb") as f:
+            f.write(b'{"a": 1} [2] 3')
+        self.assertListEqual(
+            [to_standard_types(item) for item in load_many(self.path, mmap=True, tokenizer=BlockTokenizer)],
+            [{"a": 1}, [2], 3],
+        )
+
+    def test_empty_file(self):
+        with open(self.path, "wb"):
+            pass
+        self.assertListEqual(list(load_many(self.path, mmap=True)), [])
+
+    def test_compressed(self):
+        with gzip.open(self.path, "wb") as f:
+            f.write(json.dumps(self.DATA).encode())
+        self.assertEqual(to_standard_types(load(self.path, mmap=True, tokenizer=BlockTokenizer)), self.DATA)
+
+    def test_visit(self):
+        visited = []
+        visit(self.path, lambda v, p: visited.append((p, v)), mmap=True, tokenizer=BlockTokenizer)
+        self.assertIn((("a", 2), "é中"), visited)
+
+
+class TestRaw(TestCase):
+    DATA = '{"id": 1, "payload": {"a": [1, 2.50, "\\u00e9"]}, "items": [{"x": 1}, "y", 3, []]}'
+
+    def load(self):
+        return load(StringIO(self.DATA), tokenizer=BlockTokenizer)
+
+    def test_raw(self):
+        data = self.load()
+        self.assertEqual(data["id"], 1)
+        self.assertEqual(data["payload"].raw(), '{"a": [1, 2.50, "\\u00e9"]}')
+        # the rest of the stream can still be read
+        self.assertEqual(to_standard_types(data["items"]), [{"x": 1}, "y", 3, []])
+
+    def test_raw_whole_document(self):
+        data = self.load()
+        self.assertEqual(data.raw(), self.DATA)
+        self.assertFalse(data.streaming)
+        with self.assertRaises(TransientAccessException):
+            data.raw()
+
+    def test_iter_raw(self):
+        data = self.load()
+        self.assertEqual(list(data.iter_raw()), [
+            ("id", "1"), ("payload", '{"a": [1, 2.50, "\\u00e9"]}'), ("items", '[{"x": 1}, "y", 3, []]'),
+        ])
+        data = self.load()
+        self.assertEqual(list(data["items"].iter_raw()), ['{"x": 1}', '"y"', '3', '[]'])
+        self.assertEqual(list(load(StringIO('[]'), tokenizer=BlockTokenizer).iter_raw()), [])
+
+    def test_iter_raw_binary(self):
+        data = load([self.DATA.encode()], tokenizer=BlockTokenizer, binary=True)
+        items = list(data["items"].iter_raw())
+        self.assertIsInstance(items[0], memoryview)
+        self.assertEqual([bytes(item) for item in items], [b'{"x": 1}', b'"y"', b'3', b'[]'])
+
+    def test_raw_after_reading(self):
+        data = self.load()
+        data["id"]
+        with self.assertRaises(TransientAccessException):
+            data.raw()
+        with self.assertRaises(TransientAccessException):
+            data.iter_raw()
+
+    def test_invalid(self):
+        for document, error in (
+            ('[1,]', "Expecting value, got ]"),
+            ('[1 2]', "Expecting comma or ], got 2"),
+            ('{"a": }', "Expecting value, got }"),
+            ('[1, 2', "Unterminated list at end of file"),
+        ):
+            with self.subTest(document=document):
+                with self.assertRaisesRegex(ValueError, error):
+                    list(load(StringIO(document), tokenizer=BlockTokenizer).iter_raw())
+
+    def test_needs_tokenizer_support(self):
+        with self.assertRaisesRegex(ValueError, "requires a tokenizer"):
+            load(StringIO(self.DATA), tokenizer=tokenize).raw()
+
+
+class TestPersistentListStorage(TestCase):
+    def load(self, data):
+        for tokenizer in (tokenize, BlockTokenizer):
+            with self.subTest(tokenizer=tokenizer):
+                yield load(StringIO(data), persistent=True, tokenizer=tokenizer)
+
+    def test_ints(self):
+        for data in self.load('[1, -2, 3]'):
+            self.assertEqual(data[1], -2)
+            self.assertEqual(data.as_array(), array('q', [1, -2, 3]))
+            self.assertEqual(list(data), [1, -2, 3])
+            self.assertEqual(data[1:], [-2, 3])
+
+    def test_floats(self):
+        for data in self.load('[1.5, 2.0, -1e300]'):
+            self.assertEqual(data.as_array(), array('d', [1.5, 2.0, -1e300]))
+            self.assertEqual([type(v) for v in data], [float] * 3)
+
+    def test_ints_in_floats(self):
+        for data in self.load('[1.5, 2, -3, 4.0, 9007199254740992]'):
+            self.assertEqual(data.as_array(), array('d', [1.5, 2, -3, 4, 2 ** 53]))
+            self.assertEqual([type(v) for v in data], [float, int, int, float, int])
+            self.assertEqual([type(data[i]) for i in range(-5, 5)], [float, int, int, float, int] * 2)
+            self.assertEqual([type(v) for v in data[1:4]], [int, int, float])
+            self.assertEqual(to_standard_types(data), [1.5, 2, -3, 4.0, 2 ** 53])
+        # a list of ints becomes a list of floats at its first float
+        for data in self.load('[0, 0.5, 1, -2.5, 3]'):
+            self.assertEqual(data.as_array(), array('d', [0, 0.5, 1, -2.5, 3]))
+            self.assertEqual([type(v) for v in data], [int, float, int, float, int])
+            self.assertEqual([type(v) for v in data[:3]], [int, float, int])
+            self.assertEqual(to_standard_types(data), [0, 0.5, 1, -2.5, 3])
+        # ints that a float can't hold exactly, or after which the items stop being numbers, move them to a list
+        for json_data in ('[1.5, 2, 9007199254740993]', '[9007199254740993, 1.5]', '[1.5, 2, "a"]', '[1, 2.5, "a"]',
+                          '[1.5, 2, 1' + '0' * 400 + ']'):
+            for data in self.load(json_data):
+                self.assertIsNone(data.as_array())
+                self.assertEqual(to_standard_types(data), json.loads(json_data))
+                self.assertEqual([type(v) for v in data], [type(v) for v in json.loads(json_data)])
+
+    def test_not_numbers(self):
+        for json_data in ('[]', '[1, 2.5, true]', '[2.5, 1, true]', '[1, true]', '[true, 1]', '[1, null]', '[1, "a"]',
+                          '[1, 18446744073709551616]', '[18446744073709551616]', '[[1], 2]', '[1, [2]]'):
+            for data in self.load(json_data):
+                expected = json.loads(json_data)
+                self.assertEqual([type(v) for v in to_standard_types(data)], [type(v) for v in expected])
+                self.assertEqual(to_standard_types(data), expected)
+                self.assertIsNone(data.as_array())
+
+    def test_iterating_while_reading(self):
+        for data in self.load('[1, 2, "a", 3]'):
+            items = iter(data)
+            self.assertEqual(next(items), 1)
+            self.assertEqual(data[2], "a")  # the items are moved from an array to a list
+            self.assertEqual(list(items), [2, "a", 3])
+            self.assertEqual(list(data), [1, 2, "a", 3])
+
+    def test_bulk_decoded(self):
+        data = load(StringIO('{"a": [1, 2, 3]}'), persistent=True, tokenizer=BlockTokenizer)
+        self.assertEqual(to_standard_types(data), {"a": [1, 2, 3]})
+        self.assertEqual(data["a"].as_array(), array('q', [1, 2, 3]))
+
+    def test_as_numpy(self):
+        try:
+            import numpy
+        except ImportError:
+            with self.assertRaisesRegex(ValueError, "numpy"):
+                load(StringIO('[1]'), persistent=True).as_numpy()
+            return
+        data = load(StringIO('[1, 2]'), persistent=True)  # pragma: no cover
+        self.assertEqual(data.as_numpy().dtype, numpy.int64)  # pragma: no cover
+        self.assertEqual(data.as_numpy().tolist(), [1, 2])  # pragma: no cover
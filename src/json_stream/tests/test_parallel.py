@@ -0,0 +1,152 @@
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from json_stream import index, parallel, to_standard_types
+
+ITEMS = [{"id": i, "name": "item %d" % i, "tags": ["]"] * (i % 4)} for i in range(200)]
+
+
+def get_id(item):
+    return item["id"]
+
+
+def standard(item):
+    return to_standard_types(item)
+
+
+def fail_on_150(item):
+    i = item["id"]
+    if i == 150:
+        raise RuntimeError("bad item")
+    return i
+
+
+class TestParallelMap(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "data.json")
+        with open(self.path, "w") as f:
+            json.dump(ITEMS, f)
+
+    def map(self, fn, **kwargs):
+        executor = ThreadPoolExecutor(3)
+        self.addCleanup(executor.shutdown)
+        return list(parallel.map(fn, self.path, executor=executor, shard_size=500, **kwargs))
+
+    def test_processes(self):
+        results = list(parallel.map(standard, self.path, workers=2, shard_size=1000))
+        self.assertEqual(results, ITEMS)
+
+    def test_ordered(self):
+        self.assertEqual(self.map(get_id), list(range(200)))
+
+    def test_unordered(self):
+        self.assertEqual(sorted(self.map(get_id, ordered=False)), list(range(200)))
+
+    def test_bounded(self):
+        self.assertEqual(self.map(get_id, max_pending=1), list(range(200)))
+
+    def test_persistent(self):
+        self.assertEqual(self.map(standard, persistent=True), ITEMS)
+
+    def test_index(self):
+        for every in (1, 7):
+            with self.subTest(every=every):
+                idx = index.build(self.path, every=every)
+                self.assertEqual(self.map(get_id, index=idx), list(range(200)))
+                # the sidecar index is used by default
+                self.assertEqual(self.map(get_id), list(range(200)))
+
+    def test_stale_index(self):
+        index.build(self.path)
+        with open(self.path, "w") as f:
+            json.dump(ITEMS[:50], f)
+        self.assertEqual(self.map(get_id), list(range(50)))
+
+    def test_documents(self):
+        with open(self.path, "w") as f:
+            f.write("\n".join(json.dumps(item) for item in ITEMS))
+        self.assertEqual(self.map(get_id), list(range(200)))
+
+    def test_empty(self):
+        with open(self.path, "w") as f:
+            f.write("[]")
+        self.assertEqual(self.map(get_id), [])
+
+    def test_error(self):
+        with self.assertRaisesRegex(RuntimeError, "bad item"):
+            self.map(fail_on_150)
+
+    def test_shards(self):
+        points = [(0, 0), (1, 10), (2, 20), (3, 35), (4, 40)]
+        self.assertEqual(list(parallel._shards(points, 15)), [(0, 2), (20, 1), (35, None)])
+        self.assertEqual(list(parallel._shards([], 15)), [])
+
+
+class TestParallelNDJSON(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "data.ndjson")
+        self.write("\n".join(json.dumps(item) for item in ITEMS) + "\n")
+
+    def write(self, data):
+        with open(self.path, "w") as f:
+            f.write(data)
+
+    def map(self, fn, **kwargs):
+        executor = ThreadPoolExecutor(3)
+        self.addCleanup(executor.shutdown)
+        kwargs.setdefault("chunk_size", 500)
+        return list(parallel.map_ndjson(fn, self.path, executor=executor, **kwargs))
+
+    def test_processes(self):
+        results = list(parallel.map_ndjson(None, self.path, workers=2, chunk_size=1000))
+        self.assertEqual(results, ITEMS)
+
+    def test_ordered(self):
+        self.assertEqual(self.map(get_id), list(range(200)))
+
+    def test_unordered(self):
+        self.assertEqual(sorted(self.map(get_id, ordered=False)), list(range(200)))
+
+    def test_bounded(self):
+        self.assertEqual(self.map(get_id, max_pending=1), list(range(200)))
+
+    def test_chunk_sizes(self):
+        for chunk_size in (1, 37, 10 ** 6):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.map(get_id, chunk_size=chunk_size), list(range(200)))
+
+    def test_blank_lines_and_no_final_newline(self):
+        self.write('\n{"id": 1}\n\n  \r\n{"id": 2}\r\n{"id": 3}')
+        self.assertEqual(self.map(get_id), [1, 2, 3])
+
+    def test_empty(self):
+        self.write("")
+        self.assertEqual(self.map(get_id), [])
+
+    def test_invalid_line(self):
+        lines = [json.dumps(item) for item in ITEMS]
+        lines[150] = '{"id": 150'
+        self.write("\n".join(lines))
+        for ordered in (True, False):
+            with self.subTest(ordered=ordered):
+                with self.assertRaisesRegex(parallel.NDJSONDecodeError, "^Invalid JSON on line 151: ") as cm:
+                    self.map(get_id, ordered=ordered)
+                self.assertEqual(cm.exception.line, 151)
+
+    def test_error(self):
+        with self.assertRaisesRegex(RuntimeError, "bad item"):
+            self.map(fail_on_150)
+
+    def test_line_ranges(self):
+        self.write("aaaa\nbb\ncccccc\nd")
+        with open(self.path, "rb") as f:
+            self.assertEqual(list(parallel._line_ranges(f, 3)), [(0, 5), (5, 8), (8, 15), (15, 16)])
+            self.assertEqual(list(parallel._line_ranges(f, 6)), [(0, 8), (8, 15), (15, 16)])
+            self.assertEqual(list(parallel._line_ranges(f, 100)), [(0, 16)])
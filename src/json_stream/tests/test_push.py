@@ -0,0 +1,81 @@
+import json
+from io import StringIO
+from unittest import TestCase
+
+import json_stream
+from json_stream.push import PushParser
+
+
+class TestPushParser(TestCase):
+    DOCUMENTS = '{"a": [1, 2.5, "x\\"y\\u00c4", true, null, {}], "b": {"c": []}} [] "é中" 12 {"d": -1e5}'
+
+    def feed(self, parser, data, size):
+        results = []
+        for i in range(0, len(data), size):
+            parser.feed(data[i:i + size])
+            results.extend(parser.drain())
+        parser.close()
+        results.extend(parser.drain())
+        return results
+
+    def test_documents(self):
+        expected = [json_stream.to_standard_types(d) for d in json_stream.load_many(StringIO(self.DOCUMENTS))]
+        for data in (self.DOCUMENTS, self.DOCUMENTS.encode()):
+            for size in (1, 2, 7, 1000):
+                with self.subTest(data=type(data), size=size):
+                    self.assertEqual(self.feed(PushParser(), data, size), expected)
+
+    def test_paths(self):
+        parser = PushParser("[*].id", "count")
+        parser.feed('{"count": 2}[{"id": 1, "x": [{"id": 5}]}, ')
+        self.assertEqual(list(parser.drain()), [(("count",), 2), ((0, "id"), 1)])
+        self.assertEqual(list(parser.drain()), [])
+        parser.feed('{"id": {"nested": [')
+        self.assertEqual(list(parser.drain()), [])
+        parser.feed('1]}}]')
+        self.assertEqual(list(parser.drain()), [((1, "id"), {"nested": [1]})])
+        parser.close()
+
+    def test_items_as_they_complete(self):
+        parser = PushParser("[*]")
+        parser.feed(b'[{"a": 1}, {"b"')
+        self.assertEqual(list(parser.drain()), [((0,), {"a": 1})])
+        parser.feed(b': [2]}, 3')
+        self.assertEqual(list(parser.drain()), [((1,), {"b": [2]})])
+        parser.feed(b']')
+        self.assertEqual(list(parser.drain()), [((2,), 3)])
+
+    def test_numbers_need_a_delimiter_or_close(self):
+        parser = PushParser()
+        parser.feed('12')
+        self.assertEqual(list(parser.drain()), [])
+        parser.feed('3 ')
+        self.assertEqual(list(parser.drain()), [123])
+        parser.feed('45')
+        parser.close()
+        self.assertEqual(list(parser.drain()), [45])
+
+    def test_multibyte_characters_split_across_chunks(self):
+        data = json.dumps({"k": "é中\U0001d11e"}, ensure_ascii=False).encode()
+        self.assertEqual(self.feed(PushParser(), data, 1), [{"k": "é中\U0001d11e"}])
+
+    def test_errors(self):
+        for document, message in (
+            ('[1, 2', "Unterminated list at end of file"),
+            ('{"a": 1', "Unterminated object at end of file"),
+            ('{"a" 1}', "Expecting :"),
+            ('[1 2]', "Expecting comma or ], got 2"),
+            ('[1, ]', "Unknown operator ]"),
+            ('"a"x', "Expected whitespace or an operator after string.  Got 'x' at index 3"),
+            ('[1, @]', "Invalid JSON character: '@' at index 4"),
+        ):
+            with self.subTest(document=document):
+                with self.assertRaisesRegex(ValueError, message):
+                    self.feed(PushParser(), document, 1)
+
+    def test_closed(self):
+        parser = PushParser()
+        parser.close()
+        parser.close()
+        with self.assertRaises(ValueError):
+            parser.feed('1')
@@ -0,0 +1,128 @@
+import json
+from io import StringIO
+from unittest import TestCase
+
+import json_stream
+from json_stream.base import TransientStreamingJSONObject
+from json_stream.block_tokenizer import BlockTokenizer
+from json_stream.paths import WILDCARD, parse_path
+from json_stream.selector import Selector
+from json_stream.tokenizer import tokenize
+
+
+class RecordingTokenizer(BlockTokenizer):
+    def __init__(self, stream, **kwargs):
+        super().__init__(stream, **kwargs)
+        self.tokens = []
+        RecordingTokenizer.last = self
+
+    def __next__(self):
+        token = super().__next__()
+        self.tokens.append(token[1])
+        return token
+
+
+class TestSelector(TestCase):
+    DOCUMENT = json.dumps({
+        "count": 2,
+        "ignored": {"nested": ["with ] and } in strings", {"deep": [[1, 2], "\\\""]}], "more": 1.5},
+        "results": [{"id": 1, "junk": [["a"]]}, {"junk": "x", "id": 2}],
+        "key.with.dots": [10, 20, 30],
+    })
+
+    def select(self, *paths, tokenizer=BlockTokenizer, document=DOCUMENT):
+        return [
+            (path, json_stream.to_standard_types(value))
+            for path, value in json_stream.select(StringIO(document), *paths, tokenizer=tokenizer)
+        ]
+
+    def test_parse_path(self):
+        self.assertEqual(parse_path(''), ())
+        self.assertEqual(parse_path('results[*].id'), ('results', WILDCARD, 'id'))
+        self.assertEqual(parse_path('a.*[0]["b.c"][\'d\']'), ('a', WILDCARD, 0, 'b.c', 'd'))
+        for invalid in ('a..b', 'a[0]b', 'a[-1]', 'a[', '.'):
+            with self.subTest(path=invalid):
+                with self.assertRaisesRegex(ValueError, "Invalid path"):
+                    parse_path(invalid)
+
+    def test_select(self):
+        for tokenizer in (BlockTokenizer, tokenize):
+            with self.subTest(tokenizer=tokenizer):
+                self.assertEqual(self.select('results[*].id', tokenizer=tokenizer), [
+                    (('results', 0, 'id'), 1),
+                    (('results', 1, 'id'), 2),
+                ])
+                self.assertEqual(self.select('count', '["key.with.dots"][1]', tokenizer=tokenizer), [
+                    (('count',), 2),
+                    (('key.with.dots', 1), 20),
+                ])
+                self.assertEqual(self.select('*[0].id', 'ignored.*.*.deep[0]', tokenizer=tokenizer), [
+                    (('ignored', 'nested', 1, 'deep', 0), [1, 2]),
+                    (('results', 0, 'id'), 1),
+                ])
+                self.assertEqual(self.select('missing', 'results[5]', 'count.x', tokenizer=tokenizer), [])
+
+    def test_containers(self):
+        selected = list(json_stream.select(StringIO(self.DOCUMENT), 'results[*]', 'results[*].id'))
+        self.assertEqual([path for path, value in selected], [('results', 0), ('results', 1)])
+        self.assertIsInstance(selected[0][1], TransientStreamingJSONObject)
+
+        for path, value in json_stream.select(StringIO(self.DOCUMENT), 'results[*]', persistent=True):
+            self.assertEqual(value['id'], path[1] + 1)
+            self.assertEqual(value['junk'], value['junk'])
+
+    def test_root_and_multiple_documents(self):
+        document = '{"id": 1} [1, 2] "x" {"id": 3}'
+        self.assertEqual(self.select('id', document=document), [(('id',), 1), (('id',), 3)])
+        self.assertEqual(self.select('', document=document), [
+            ((), {'id': 1}), ((), [1, 2]), ((), 'x'), ((), {'id': 3}),
+        ])
+
+    def test_skips_unselected(self):
+        selector = Selector('results[*].id')
+        for _ in range(2):  # selectors are reusable
+            selected = list(selector.select(StringIO(self.DOCUMENT), tokenizer=RecordingTokenizer))
+            self.assertEqual(selected, [(('results', 0, 'id'), 1), (('results', 1, 'id'), 2)])
+            tokens = RecordingTokenizer.last.tokens
+            for skipped in ('nested', 'deep', 'a', 'x', 10, 1.5):
+                self.assertNotIn(skipped, tokens)
+            self.assertNotIn('key.with.dots', tokens)  # nothing after "results" can match
+        self.assertEqual(list(json_stream.select(StringIO(self.DOCUMENT), selector)), selected)
+
+    def test_errors(self):
+        for document in ('{"results": [{"id": 1}', '{"a": [1, [2', '[1, 2', '{"a": 1, 2: 3}'):
+            for tokenizer in (BlockTokenizer, tokenize):
+                with self.subTest(document=document, tokenizer=tokenizer):
+                    with self.assertRaises(ValueError):
+                        self.select('results[*].id', '[5]', tokenizer=tokenizer, document=document)
+
+    def select_raw(self, *paths, **kwargs):
+        return list(json_stream.select(StringIO(self.DOCUMENT), *paths, tokenizer=BlockTokenizer, raw=True, **kwargs))
+
+    def test_select_raw(self):
+        self.assertEqual(self.select_raw('results[*]', 'count', 'ignored.more', '["key.with.dots"][*]'), [
+            (('count',), '2'),
+            (('ignored', 'more'), '1.5'),
+            (('results', 0), '{"id": 1, "junk": [["a"]]}'),
+            (('results', 1), '{"junk": "x", "id": 2}'),
+            (('key.with.dots', 0), '10'),
+            (('key.with.dots', 1), '20'),
+            (('key.with.dots', 2), '30'),
+        ])
+        self.assertEqual(self.select_raw('ignored.nested[0]'), [
+            (('ignored', 'nested', 0), '"with ] and } in strings"'),
+        ])
+        self.assertEqual(self.select_raw(''), [((), self.DOCUMENT)])
+
+    def test_select_raw_binary(self):
+        document = b'[{"a": 1}, "\\u00e9", []] [2]'
+        chunks = [document[i:i + 3] for i in range(0, len(document), 3)]
+        selected = list(json_stream.select(chunks, '[*]', raw=True, tokenizer=BlockTokenizer, binary=True))
+        self.assertEqual([(path, bytes(value)) for path, value in selected], [
+            ((0,), b'{"a": 1}'), ((1,), b'"\\u00e9"'), ((2,), b'[]'), ((0,), b'2'),
+        ])
+        self.assertIsInstance(selected[0][1], memoryview)
+
+    def test_select_raw_needs_tokenizer_support(self):
+        with self.assertRaisesRegex(ValueError, "requires a tokenizer"):
+            list(json_stream.select(StringIO(self.DOCUMENT), 'count', tokenizer=tokenize, raw=True))
@@ -10,12 +10,15 @@ import re
 from io import StringIO
 from unittest import TestCase
 
+from json_stream.block_tokenizer import BlockTokenizer
 from json_stream.tokenizer import tokenize, TokenType
 
 
 class TestJsonTokenization(TestCase):
+    tokenizer = staticmethod(tokenize)
+
     def tokenize_sequence(self, string):
-        return [token for token in tokenize(StringIO(string))]
+        return [token for token in self.tokenizer(StringIO(string))]
 
     def assertNumberEquals(self, expected, actual):
         token_list = self.tokenize_sequence(actual)
@@ -182,48 +185,52 @@ class TestJsonTokenization(TestCase):
         self.assertRaises(ValueError, self.tokenize_sequence, "\"test\"56")
 
     def test_unicode_literal(self):
-        result = list(tokenize(StringIO(r'"\u00c4"')))
+        result = list(self.tokenizer(StringIO(r'"\u00c4"')))
         self.assertListEqual(result, [(1, 'Ä')])
 
     def test_unicode_literal_truncated(self):
         with self.assertRaisesRegex(ValueError, re.escape(r'Invalid unicode literal: \u00c" at index 6')):
-            list(tokenize(StringIO(r'"\u00c"')))
+            list(self.tokenizer(StringIO(r'"\u00c"')))
 
     def test_unicode_literal_bad_hex(self):
         with self.assertRaisesRegex(ValueError, re.escape(r"Invalid unicode literal: \u00x4 at index 6")):
-            list(tokenize(StringIO(r'"\u00x4"')))
+            list(self.tokenizer(StringIO(r'"\u00x4"')))
 
     def test_unicode_surrogate_pair_literal(self):
-        result = list(tokenize(StringIO(r'"\ud834\udd1e"')))
+        result = list(self.tokenizer(StringIO(r'"\ud834\udd1e"')))
         self.assertListEqual(result, [(1, '𝄞')])
 
     def test_unicode_surrogate_pair_unpaired(self):
         with self.assertRaisesRegex(ValueError, "Unpaired UTF-16 surrogate at index 7"):
-            list(tokenize(StringIO(r'"\ud834"')))
+            list(self.tokenizer(StringIO(r'"\ud834"')))
         with self.assertRaisesRegex(ValueError, "Unpaired UTF-16 surrogate at end of file"):
-            list(tokenize(StringIO(r'"\ud834')))
+            list(self.tokenizer(StringIO(r'"\ud834')))
         with self.assertRaisesRegex(ValueError, "Unpaired UTF-16 surrogate at index 8"):
-            list(tokenize(StringIO(r'"\ud834\x')))
+            list(self.tokenizer(StringIO(r'"\ud834\x')))
         with self.assertRaisesRegex(ValueError, "Unpaired UTF-16 surrogate at end of file"):
-            list(tokenize(StringIO(r'"\ud834' + '\\')))
+            list(self.tokenizer(StringIO(r'"\ud834' + '\\')))
 
     def test_unicode_surrogate_pair_non_surrogate(self):
         with self.assertRaisesRegex(ValueError, "Second half of UTF-16 surrogate pair is not a surrogate! at index 12"):
-            list(tokenize(StringIO(r'"\ud834\u00c4"')))
+            list(self.tokenizer(StringIO(r'"\ud834\u00c4"')))
 
     def test_unicode_surrogate_pair_literal_truncated(self):
         with self.assertRaisesRegex(ValueError, re.escape(r'Invalid unicode literal: \u00c" at index 12')):
-            list(tokenize(StringIO(r'"\ud834\u00c"')))
+            list(self.tokenizer(StringIO(r'"\ud834\u00c"')))
 
     def test_unicode_surrogate_pair_literal_bad_hex(self):
         with self.assertRaisesRegex(ValueError, re.escape(r"Invalid unicode literal: \u00x4 at index 12")):
-            list(tokenize(StringIO(r'"\ud834\u00x4"')))
+            list(self.tokenizer(StringIO(r'"\ud834\u00x4"')))
 
     def test_unicode_surrogate_pair_literal_invalid(self):
         message = re.escape(r"Error decoding UTF-16 surrogate pair \ud834\ud834 at index 12")
         with self.assertRaisesRegex(ValueError, message):
-            list(tokenize(StringIO(r'"\ud834\ud834"')))
+            list(self.tokenizer(StringIO(r'"\ud834\ud834"')))
 
     def test_unicode_surrogate_pair_literal_unterminated(self):
         with self.assertRaisesRegex(ValueError, r"Unterminated unicode literal at end of file"):
-            list(tokenize(StringIO(r'"\ud834\ud83')))
+            list(self.tokenizer(StringIO(r'"\ud834\ud83')))
+
+
+class TestBlockTokenization(TestJsonTokenization):
+    tokenizer = staticmethod(BlockTokenizer)
@@ -0,0 +1,137 @@
+import io
+import json
+import tracemalloc
+from io import BytesIO, StringIO
+from unittest import TestCase
+
+import json_stream
+from json_stream.tokenizer import tokenize
+from json_stream.transformer import DROP, Rename, Replace
+
+
+class TestTransform(TestCase):
+    DOCUMENT = (
+        '{"user": {"name": "ann", "password": "hunter2", "tags": ["a", "é"]}, '
+        '"items": [{"id": 1, "secret": {"k": [1]}, "price": 1.50}, {"id": 2, "secret": null, "price": 2e3}], '
+        '"count": 2}'
+    )
+    RULES = {
+        "user.password": DROP,
+        "items[*].secret": Replace("***"),
+        "user.name": str.upper,
+        "count": Rename("total"),
+    }
+    EXPECTED = (
+        '{"user": {"name": "ANN", "tags": ["a", "é"]}, '
+        '"items": [{"id": 1, "secret": "***", "price": 1.50}, {"id": 2, "secret": "***", "price": 2e3}], '
+        '"total": 2}\n'
+    )
+
+    def transform(self, src, rules, dst=None, **kwargs):
+        dst = StringIO() if dst is None else dst
+        json_stream.transform(src, dst, rules, **kwargs)
+        return dst.getvalue()
+
+    def test_transform(self):
+        self.assertEqual(self.transform(StringIO(self.DOCUMENT), self.RULES), self.EXPECTED)
+
+    def test_binary(self):
+        output = self.transform(BytesIO(self.DOCUMENT.encode()), self.RULES, BytesIO())
+        self.assertEqual(output, self.EXPECTED.encode())
+        chunks = [self.DOCUMENT.encode()[i:i + 5] for i in range(0, len(self.DOCUMENT.encode()), 5)]
+        self.assertEqual(self.transform(chunks, self.RULES, buffer_size=7), self.EXPECTED)
+
+    def test_untouched_values_copied_as_they_are(self):
+        document = '{"a": [1.50, {"b" :  "\\u00e9"}], "c": 1}'
+        self.assertEqual(self.transform(StringIO(document), {"c": DROP}), '{"a": [1.50, {"b" :  "\\u00e9"}]}\n')
+
+    def test_tokenizer_without_raw_values(self):
+        output = self.transform(StringIO(self.DOCUMENT), self.RULES, tokenizer=tokenize)
+        self.assertEqual(json.loads(output), json.loads(self.EXPECTED))
+
+    def test_map(self):
+        rules = {
+            "items[*]": lambda item: DROP if item["id"] == 1 else dict(item, seen=True),
+            "user.tags[1]": lambda tag: tag * 2,
+        }
+        output = json.loads(self.transform(StringIO(self.DOCUMENT), rules))
+        self.assertEqual(output["items"], [{"id": 2, "secret": None, "price": 2000.0, "seen": True}])
+        self.assertEqual(output["user"]["tags"], ["a", "éé"])
+
+    def test_first_rule_applies(self):
+        rules = {"items[0]": DROP, "items[*]": Replace(0), "items[*].id": DROP}
+        self.assertEqual(json.loads(self.transform(StringIO(self.DOCUMENT), rules))["items"], [0])
+
+    def test_rename_transforms_value(self):
+        rules = {"user": Rename("person"), "user.password": DROP}
+        output = json.loads(self.transform(StringIO(self.DOCUMENT), rules))
+        self.assertEqual(output["person"], {"name": "ann", "tags": ["a", "é"]})
+
+    def test_rename_list_item(self):
+        with self.assertRaisesRegex(ValueError, "Cannot rename an item of a list"):
+            self.transform(StringIO(self.DOCUMENT), {"items[0]": Rename("x")})
+
+    def test_drop_everything(self):
+        for document, expected in (('[1, 2]', '[]\n'), ('{"a": 1, "b": 2}', '{}\n'), ('[]', '[]\n'), ('{}', '{}\n')):
+            with self.subTest(document=document):
+                self.assertEqual(self.transform(StringIO(document), {"*": DROP}), expected)
+
+    def test_many_documents(self):
+        documents = '{"a": 1} [2] 3 "x" {"a": 4}'
+        self.assertEqual(self.transform(StringIO(documents), {"a": DROP}), '{}\n[2]\n3\n"x"\n{}\n')
+        self.assertEqual(self.transform(StringIO(documents), {"": lambda v: DROP if v == 3 else v}), (
+            '{"a": 1}\n[2]\n"x"\n{"a": 4}\n'
+        ))
+
+    def test_buffered_writes(self):
+        writes = []
+
+        class Output(StringIO):
+            def write(self, s):
+                writes.append(s)
+                return super().write(s)
+
+        document = json.dumps({"items": [{"id": i, "secret": i} for i in range(1000)]})
+        output = self.transform(StringIO(document), {"items[*].secret": DROP}, Output(), write_size=1000)
+        self.assertEqual(output, json.dumps({"items": [{"id": i} for i in range(1000)]}) + "\n")
+        self.assertLess(len(writes), len(output) // 1000 + 2)
+        self.assertTrue(all(len(s) >= 1000 for s in writes[:-1]))
+
+    def test_invalid(self):
+        for document, error in (
+            ('{"a": [1, 2}', "Expecting comma or ], got }"),
+            ('{"a": 1', "Unterminated object at end of file"),
+            ('[1, 2', "Unterminated list at end of file"),
+            ('{"a" 1}', "Expecting :"),
+            ('{"a": 1 "b": 2}', "Expecting comma or }, got b"),
+        ):
+            with self.subTest(document=document):
+                with self.assertRaisesRegex(ValueError, error):
+                    self.transform(StringIO(document), {"a[0]": DROP, "b": DROP})
+
+    def test_large_untouched_value(self):
+        # untouched values are copied a block at a time, rather than read into memory as a whole
+        class Output:
+            def __init__(self):
+                self.size = 0
+
+            def write(self, data):
+                self.size += len(data)
+
+        class TextOutput(Output, io.TextIOBase):
+            pass
+
+        big = json.dumps([{"id": i, "name": "é" * 10} for i in range(60000)], ensure_ascii=False)
+        document = f'{{"big": {big}, "secret": 1}}'
+        for dst, expected in ((Output(), f'{{"big": {big}}}\n'.encode()), (TextOutput(), f'{{"big": {big}}}\n')):
+            with self.subTest(dst=type(dst).__name__):
+                data = document.encode()
+                src = BytesIO(data)
+                tracemalloc.start()
+                try:
+                    json_stream.transform(src, dst, {"secret": DROP})
+                    peak = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+                self.assertEqual(dst.size, len(expected))
+                self.assertLess(peak, len(data) / 3)
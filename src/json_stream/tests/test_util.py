@@ -1,8 +1,10 @@
-from io import StringIO
+from io import BytesIO, StringIO
 import json
 from unittest import TestCase
 
 import json_stream
+from json_stream.base import PersistentStreamingJSONList, PersistentStreamingJSONObject
+from json_stream.block_tokenizer import BlockTokenizer
 
 
 class TestToStandardTypes(TestCase):
@@ -13,3 +15,68 @@ class TestToStandardTypes(TestCase):
         converted = json_stream.to_standard_types(js)
         comparison = json.load(StringIO(self.JSON))
         self.assertEqual(converted, comparison)
+
+
+class TestBulkDecode(TestCase):
+    BIG = ', '.join(['"%d"' % i for i in range(100)])
+    JSON = '{"x": 1, "y": {}, "xxxx": [1, 2, {"yyyy": 1}, "z", 1, []], "big": [' + BIG + ']}'
+
+    def load(self, persistent=False, **kwargs):
+        return json_stream.load(StringIO(self.JSON), persistent=persistent, tokenizer=BlockTokenizer, **kwargs)
+
+    def test_same_result(self):
+        for bulk_size in (0, 1, 20, 100, 10000):
+            for persistent in (False, True):
+                with self.subTest(bulk_size=bulk_size, persistent=persistent):
+                    converted = json_stream.to_standard_types(self.load(persistent), bulk_size)
+                    self.assertEqual(converted, json.loads(self.JSON))
+
+    def test_small_values_decoded_in_one_go(self):
+        tokens = []
+
+        class CountingTokenizer(BlockTokenizer):
+            def __next__(self):
+                token = super().__next__()
+                tokens.append(token)
+                return token
+
+        data = json_stream.load(StringIO(self.JSON), tokenizer=CountingTokenizer)
+        self.assertEqual(json_stream.to_standard_types(data, 100), json.loads(self.JSON))
+        # "big" is streamed, but "y" and "xxxx" are not
+        self.assertIn((1, "99"), tokens)
+        self.assertNotIn((1, "z"), tokens)
+
+    def test_whole_document(self):
+        data = self.load()
+        self.assertEqual(json_stream.to_standard_types(data), json.loads(self.JSON))
+        self.assertFalse(data.streaming)
+
+    def test_persistent_keeps_streaming_children(self):
+        data = self.load(persistent=True)
+        self.assertEqual(json_stream.to_standard_types(data), json.loads(self.JSON))
+        # leaf lists and objects are filled in as they would have been, nested ones are streamed
+        self.assertIsInstance(data["xxxx"], PersistentStreamingJSONList)
+        self.assertIsInstance(data["xxxx"][2], PersistentStreamingJSONObject)
+        self.assertEqual(list(data["big"]), [str(i) for i in range(100)])
+
+    def test_invalid_values_streamed(self):
+        data = json_stream.load(StringIO('[1, [2, 03]]'), tokenizer=BlockTokenizer)
+        # the tokenizer's error, at its position in the document
+        with self.assertRaisesRegex(ValueError, "Got '3' at index 9"):
+            json_stream.to_standard_types(data)
+
+    def test_lone_surrogates_streamed(self):
+        # json.loads accepts escaped UTF-16 surrogates that aren't paired, which the tokenizer rejects
+        for document in (r'["\ud834"]', r'["\udd1e"]', r'["\ud834\u00e9"]', r'["\udd1e\ud834"]'):
+            for data in (document, document.encode()):
+                with self.subTest(document=document, binary=isinstance(data, bytes)):
+                    stream = BytesIO(data) if isinstance(data, bytes) else StringIO(data)
+                    with self.assertRaisesRegex(ValueError, "UTF-16 surrogate"):
+                        json_stream.to_standard_types(json_stream.load(stream, tokenizer=BlockTokenizer))
+        data = json_stream.load(StringIO(r'["\ud834\udd1e", "\\ud834"]'), tokenizer=BlockTokenizer)
+        self.assertEqual(json_stream.to_standard_types(data), ["\U0001d11e", "\\ud834"])
+
+    def test_partially_read_value(self):
+        data = self.load(persistent=True)
+        self.assertEqual(data["x"], 1)
+        self.assertEqual(json_stream.to_standard_types(data), json.loads(self.JSON))
@@ -40,3 +40,36 @@ class TestVisitMany(TestCase):
         self.assertEqual(visited_batches[5][0], ("x", ()))           # "x"
         self.assertEqual(visited_batches[6][0], ({}, ()))             # {}
         self.assertEqual(visited_batches[7][0], ([], ()))             # []
+
+
+class TestVisitBatched(TestCase):
+    def visit(self, data, batch_size):
+        batches = []
+        json_stream.visit_batched(StringIO(data), lambda paths, values: batches.append(list(zip(paths, values))),
+                                  batch_size=batch_size)
+        return batches
+
+    def test_batches(self):
+        batches = self.visit('{"a": [1, 2, {}], "b": "x"}', batch_size=2)
+        self.assertEqual(batches, [
+            [(('a', 0), 1), (('a', 1), 2)],
+            [(('a', 2), {}), (('b',), "x")],
+        ])
+
+    def test_across_documents(self):
+        batches = self.visit('{"a": 1}\n[2, 3]\n4\n[]\n', batch_size=3)
+        self.assertEqual(batches, [
+            [(('a',), 1), ((0,), 2), ((1,), 3)],
+            [((), 4), ((), [])],
+        ])
+
+    def test_buffers_reused(self):
+        calls = []
+        json_stream.visit_batched(StringIO('[1, 2, 3]'), lambda paths, values: calls.append((paths, values)),
+                                  batch_size=2)
+        self.assertEqual(len(calls), 2)
+        self.assertIs(calls[0][0], calls[1][0])
+        self.assertIs(calls[0][1], calls[1][1])
+
+    def test_empty(self):
+        self.assertEqual(self.visit('', batch_size=2), [])
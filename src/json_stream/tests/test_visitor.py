@@ -1,7 +1,11 @@
+import re
 from io import StringIO, BytesIO
 from unittest import TestCase
 
 import json_stream
+from json_stream.block_tokenizer import BlockTokenizer
+from json_stream.tokenizer import tokenize
+from json_stream.util import to_standard_types
 
 
 class TestVisitor(TestCase):
@@ -17,6 +21,11 @@ class TestVisitor(TestCase):
         json_stream.visit(BytesIO(self.JSON.encode()), lambda a, b: visited.append((a, b)))
         self._assert_data_okay(visited)
 
+    def test_visitor_prefetch(self):
+        visited = []
+        json_stream.visit(StringIO(self.JSON), lambda a, b: visited.append((a, b)), prefetch=2)
+        self._assert_data_okay(visited)
+
     def test_visitor_primitive(self):
         visited = []
         json_stream.visit(StringIO("1"), lambda a, b: visited.append((a, b)))
@@ -33,3 +42,170 @@ class TestVisitor(TestCase):
             (1, ('xxxx', 4)),
             ([], ('xxxx', 5)),
         ], visited)
+
+
+class TestIterativeVisitor(TestCase):
+    JSON = '{"a": {"b": [1, 2, 3], "c": 4}, "d": [[], {"e": [5, 6]}, 7], "f": 8}'
+
+    def visit(self, data, visitor, **kwargs):
+        for tokenizer in (tokenize, BlockTokenizer):
+            with self.subTest(tokenizer=tokenizer):
+                visitor.visited = []
+                json_stream.visit(StringIO(data), visitor, tokenizer=tokenizer, **kwargs)
+                yield visitor.visited
+
+    def test_deep(self):
+        depth = 5000
+        data = '{"a": ' * depth + '[' * depth + '1, []' + ']' * depth + '}' * depth
+
+        def visitor(value, path):
+            visitor.visited.append((value, path))
+
+        for visited in self.visit(data, visitor):
+            self.assertEqual(visited, [
+                (1, ('a',) * depth + (0,) * depth),
+                ([], ('a',) * depth + (0,) * (depth - 1) + (1,)),
+            ])
+
+    def test_skip(self):
+        def visitor(value, path):
+            visitor.visited.append((value, path))
+            if value in (1, 5) or value == []:
+                return json_stream.SKIP
+
+        for visited in self.visit(self.JSON, visitor):
+            self.assertEqual(visited, [
+                (1, ('a', 'b', 0)),
+                (4, ('a', 'c')),
+                ([], ('d', 0)),
+                (8, ('f',)),
+            ])
+
+    def test_skip_top_level(self):
+        def visitor(value, path):
+            visitor.visited.append((value, path))
+            return json_stream.SKIP
+
+        for data, expected in (('1', [(1, ())]), ('[]', [([], ())]), ('[1, 2]', [(1, (0,))])):
+            for visited in self.visit(data, visitor):
+                self.assertEqual(visited, expected)
+
+    def test_shared_path(self):
+        def visitor(value, path):
+            self.assertIsInstance(path, list)
+            visitor.visited.append((value, tuple(path)))
+
+        expected = [(1, ('a', 'b', 0)), (2, ('a', 'b', 1)), (3, ('a', 'b', 2)), (4, ('a', 'c')), ([], ('d', 0)),
+                    (5, ('d', 1, 'e', 0)), (6, ('d', 1, 'e', 1)), (7, ('d', 2)), (8, ('f',))]
+        for visited in self.visit(self.JSON, visitor, shared_path=True):
+            self.assertEqual(visited, expected)
+
+    def test_invalid(self):
+        for data, error in (
+            ('[1 2]', "Expecting comma or ], got 2"),
+            ('{"a": 1 "b": 2}', "Expecting comma or }, got b"),
+            ('{"a" 1}', "Expecting :"),
+            ('{1: 1}', "Expecting string, comma or }, got 1"),
+            ('[1, }', "Unknown operator }"),
+            ('[1, [2', "Unterminated list at end of file"),
+            ('{"a": [1], "b": {', "Unterminated object at end of file"),
+        ):
+            with self.subTest(data=data):
+                with self.assertRaisesRegex(ValueError, re.escape(error)):
+                    json_stream.visit(StringIO(data), lambda value, path: None, tokenizer=tokenize)
+
+
+class TestVisitorDispatch(TestCase):
+    JSON = (
+        '{"meta": {"count": 2, "extra": {"a": [1, 2]}}, '
+        '"users": [{"name": "a", "email": "a@x"}, {"email": "b@x", "name": "b", "tags": []}], '
+        '"rest": [1, 2, 3]}'
+    )
+
+    def visit(self, data, visitors, **kwargs):
+        for tokenizer in (tokenize, BlockTokenizer):
+            with self.subTest(tokenizer=tokenizer):
+                self.visited = []
+                json_stream.visit(StringIO(data), visitors, tokenizer=tokenizer, **kwargs)
+                yield self.visited
+
+    def record(self, value, path):
+        self.visited.append((to_standard_types(value), path))
+
+    def test_dispatch(self):
+        for visited in self.visit(self.JSON, {"users.*.email": self.record, "meta.count": self.record}):
+            self.assertEqual(visited, [
+                (2, ('meta', 'count')), ("a@x", ('users', 0, 'email')), ("b@x", ('users', 1, 'email')),
+            ])
+
+    def test_containers(self):
+        visitors = {"meta.extra": self.record, "users[1].tags": self.record, "rest": self.record}
+        for visited in self.visit(self.JSON, visitors):
+            self.assertEqual(visited, [
+                ({"a": [1, 2]}, ('meta', 'extra')), ([], ('users', 1, 'tags')), ([1, 2, 3], ('rest',)),
+            ])
+
+    def test_unread_container(self):
+        for visited in self.visit(self.JSON, {"meta": lambda value, path: None, "rest[1]": self.record}):
+            self.assertEqual(visited, [(2, ('rest', 1))])
+
+    def test_first_match(self):
+        # only the first path's visitor sees a value, as a transient object or list can only be read once
+        def second(value, path):
+            self.fail("second visitor called")  # pragma: no cover
+
+        visitors = {"users[0].*": self.record, "*[0].name": second}
+        for visited in self.visit(self.JSON, visitors):
+            self.assertEqual(visited, [("a", ('users', 0, 'name')), ("a@x", ('users', 0, 'email'))])
+        for visited in self.visit(self.JSON, {"users": self.record, "*": self.record}):
+            self.assertEqual(visited, [
+                ({"count": 2, "extra": {"a": [1, 2]}}, ('meta',)),
+                ([{"name": "a", "email": "a@x"}, {"email": "b@x", "name": "b", "tags": []}], ('users',)),
+                ([1, 2, 3], ('rest',)),
+            ])
+
+    def test_skip(self):
+        def first(value, path):
+            self.record(value, path)
+            return json_stream.SKIP
+
+        for visited in self.visit(self.JSON, {"users.*.*": first, "rest[*]": first}):
+            self.assertEqual(visited, [
+                ("a", ('users', 0, 'name')), ("b@x", ('users', 1, 'email')), (1, ('rest', 0)),
+            ])
+
+    def test_document(self):
+        for visited in self.visit('[1, 2]', {"": self.record, "[0]": self.record}):
+            self.assertEqual(visited, [([1, 2], ())])
+        for visited in self.visit('3', {"": self.record}):
+            self.assertEqual(visited, [(3, ())])
+        for visited in self.visit('3', {"a": self.record}):
+            self.assertEqual(visited, [])
+
+    def test_shared_path(self):
+        def record(value, path):
+            self.assertIsInstance(path, list)
+            self.record(value, tuple(path))
+
+        for visited in self.visit(self.JSON, {"users.*.name": record}, shared_path=True):
+            self.assertEqual(visited, [("a", ('users', 0, 'name')), ("b", ('users', 1, 'name'))])
+
+    def test_visit_many(self):
+        visited = []
+        data = StringIO('{"a": 1, "b": 2} {"b": 3} [{"b": 4}]')
+        for _ in json_stream.visit_many(data, {"b": lambda value, path: visited.append(value)}):
+            visited.append(None)
+        self.assertEqual(visited, [2, None, 3, None, None])
+
+    def test_invalid(self):
+        for data, error in (
+            ('{"users": [1 2]}', "Expecting comma or ], got 2"),
+            ('{"users": {"a": 1 "b": 2}}', "Expecting comma or }, got b"),
+            ('{"users" 1}', "Expecting :"),
+            ('{"users": [1, }', "Unknown operator }"),
+            ('{"users": [1, [2', "Unterminated list at end of file"),
+            ('{"users": [1], "b": {', "Unterminated object at end of file"),
+        ):
+            with self.subTest(data=data):
+                with self.assertRaisesRegex(ValueError, re.escape(error)):
+                    json_stream.visit(StringIO(data), {"users.*.*": lambda value, path: None}, tokenizer=tokenize)
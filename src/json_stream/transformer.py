@@ -0,0 +1,255 @@
+"""
+Transform a JSON stream into another in a single pass
+
+:func:`transform` reads a stream and writes it back out, applying rules to the
+values at the paths they are given for (see :mod:`json_stream.paths`): values
+can be dropped, replaced, mapped through a function, or have their keys
+renamed. Only the parts of the document on the way to a rule's paths are
+tokenized. Everything else is copied to the output as raw JSON text a block at
+a time, without being decoded and encoded again, when the tokenizer supports it
+(as :class:`~json_stream.block_tokenizer.BlockTokenizer` does).
+"""
+import codecs
+import io
+import json
+
+from json_stream.base import StreamingJSONBase, StreamingJSONList, StreamingJSONObject
+from json_stream.block_tokenizer import BlockTokenizer
+from json_stream.iterators import ensure_file
+from json_stream.paths import compile_paths
+from json_stream.tokenizer import TokenType
+from json_stream.util import to_standard_types
+
+DEFAULT_WRITE_SIZE = 256 * 1024
+
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+class _Drop:
+    def __repr__(self):
+        return 'DROP'
+
+
+DROP = _Drop()
+
+
+class Replace:
+    """Replace the value with ``value``, without reading the original"""
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):  # pragma: no cover
+        return f"Replace({self.value!r})"
+
+
+class Rename:
+    """Rename the key of the value to ``key``, which is still transformed by the rules below it"""
+    def __init__(self, key):
+        self.key = key
+
+    def __repr__(self):  # pragma: no cover
+        return f"Rename({self.key!r})"
+
+
+class _Output:
+    """Buffers the output, writing it to ``dst`` about ``write_size`` characters (or bytes) at a time"""
+    def __init__(self, dst, write_size):
+        self._write = dst.write
+        self._binary = not isinstance(dst, io.TextIOBase)
+        self._empty = b'' if self._binary else ''
+        # raw values are copied a block at a time, so a block can end part way through a character
+        self._decode = codecs.getincrementaldecoder('utf-8')().decode
+        self._write_size = write_size
+        self._parts = []
+        self._size = 0
+
+    def text(self, text):
+        self.raw(text.encode() if self._binary else text)
+
+    def raw(self, raw):
+        if isinstance(raw, str):
+            if self._binary:
+                raw = raw.encode()
+        elif not self._binary:
+            raw = self._decode(raw)
+        self._parts.append(raw)
+        self._size += len(raw)
+        if self._size >= self._write_size:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self._write(self._empty.join(self._parts))
+            self._parts = []
+            self._size = 0
+
+
+class _Transformer:
+    def __init__(self, token_stream, actions, out):
+        self._tokens = token_stream
+        self._actions = actions
+        self._copy_value = getattr(token_stream, 'copy_value', None)
+        self._skip_value = getattr(token_stream, 'skip_value', None)
+        self._out = out
+
+    def _action(self, state):
+        if state is None or not state.matches:
+            return None
+        return self._actions[state.matches[0]]
+
+    def document(self, token, state):
+        """Write the document whose first token has been read, and return whether it was written"""
+        action = self._action(state)
+        if action is None or isinstance(action, Rename):
+            self._value(token, state)
+            return True
+        value = self._apply(action, token)
+        if value is DROP:
+            return False
+        self._out.text(value)
+        return True
+
+    def _apply(self, action, token=None):
+        """Read the next value (or the rest of it) and return its replacement as JSON text, or DROP"""
+        if action is DROP or isinstance(action, Replace):
+            if token is None:
+                self._skip()
+            else:
+                self._skip_rest(token)
+            return DROP if action is DROP else _encode(action.value)
+        token_type, value = token or next(self._tokens)
+        if token_type == TokenType.OPERATOR:
+            if value not in '{[':
+                raise ValueError(f"Unknown operator {value}")
+            value = to_standard_types(StreamingJSONBase.factory(value, self._tokens, persistent=False))
+        value = action(value)
+        return DROP if value is DROP else _encode(value)
+
+    def _skip(self):
+        if self._skip_value is None or not self._skip_value():
+            self._skip_rest(next(self._tokens))
+
+    def _skip_rest(self, token):
+        token_type, value = token
+        if token_type == TokenType.OPERATOR:
+            StreamingJSONBase.factory(value, self._tokens, persistent=False)._discard()
+
+    def _value(self, token, state):
+        token_type, value = token
+        if token_type != TokenType.OPERATOR:
+            self._out.text(_encode(value))
+        elif value == '{':
+            self._object(state)
+        elif value == '[':
+            self._list(state)
+        else:
+            raise ValueError(f"Unknown operator {value}")
+
+    def _member(self, key, state, written, token=None):
+        """
+        Write the next value (whose first ``token`` may have been read) of an
+        object, with its key, or of a list, with a key of None, transformed by
+        the rules in ``state``, after a comma if anything has been ``written``
+        before it. Returns whether anything has been written.
+        """
+        action = self._action(state)
+        if isinstance(action, Rename):
+            if key is None:
+                raise ValueError("Cannot rename an item of a list")
+            key = action.key
+            action = None
+        prefix = ', ' if written else ''
+        if key is not None:
+            prefix += _encode(key) + ': '
+        if action is not None:
+            value = self._apply(action, token)
+            if value is DROP:
+                return written
+            self._out.text(prefix + value)
+            return True
+        self._out.text(prefix)
+        if token is None and state is None and self._copy_value is not None:
+            # nothing below here can match, so the value is copied as it is, a block at a time
+            if self._copy_value(self._out.raw):
+                return True
+        self._value(token or next(self._tokens), state)
+        return True
+
+    def _object(self, state):
+        tokens = self._tokens
+        self._out.text('{')
+        written = False
+        try:
+            token_type, k = next(tokens)
+            if token_type != TokenType.OPERATOR or k != '}':
+                while True:
+                    if token_type != TokenType.STRING:
+                        raise ValueError(f"Expecting string, comma or }}, got {k} ({token_type})")
+                    token_type, token = next(tokens)
+                    if token_type != TokenType.OPERATOR or token != ':':
+                        raise ValueError("Expecting :")
+                    written = self._member(k, None if state is None else state.next(k), written)
+                    token_type, token = next(tokens)
+                    if token_type == TokenType.OPERATOR and token == '}':
+                        break
+                    if token_type != TokenType.OPERATOR or token != ',':
+                        raise ValueError(f"Expecting comma or }}, got {token}")
+                    token_type, k = next(tokens)
+        except StopIteration:
+            raise ValueError(StreamingJSONObject.INCOMPLETE_ERROR) from None
+        self._out.text('}')
+
+    def _list(self, state):
+        tokens = self._tokens
+        self._out.text('[')
+        written = False
+        try:
+            token = next(tokens)
+            if token != (TokenType.OPERATOR, ']'):
+                # the first item's first token has been read, to tell if the list is empty
+                written = self._member(None, None if state is None else state.next(0), written, token)
+                index = 1
+                while True:
+                    token_type, token = next(tokens)
+                    if token_type == TokenType.OPERATOR and token == ']':
+                        break
+                    if token_type != TokenType.OPERATOR or token != ',':
+                        raise ValueError(f"Expecting comma or ], got {token}")
+                    written = self._member(None, None if state is None else state.next(index), written)
+                    index += 1
+        except StopIteration:
+            raise ValueError(StreamingJSONList.INCOMPLETE_ERROR) from None
+        self._out.text(']')
+
+
+def transform(src, dst, rules, tokenizer=BlockTokenizer, write_size=DEFAULT_WRITE_SIZE, **tokenizer_kwargs):
+    """
+    Read the JSON documents in ``src`` (a file or an iterable, as for
+    :func:`json_stream.load_many`) and write them to the file ``dst``,
+    transformed by ``rules``, a mapping of paths (as for
+    :func:`json_stream.select`) to what to do with the values at them:
+
+    - :data:`DROP` removes the value (and its key);
+    - :class:`Replace` replaces it with another value;
+    - :class:`Rename` changes its key;
+    - a function is called with the value, converted to standard python types,
+      and returns its replacement (or :data:`DROP`).
+
+    The first rule for a path is applied, and values that are dropped, replaced
+    or passed to a function aren't transformed any further. Values that no rule
+    can apply to are copied as they are. Everything else is written as
+    :func:`json.dumps` would write it, with a newline after each document.
+    Output is written ``write_size`` characters (or bytes, to a binary file) at
+    a time.
+    """
+    if tokenizer is BlockTokenizer:
+        tokenizer_kwargs.setdefault('binary', True)
+    root = compile_paths(list(rules))
+    fp = ensure_file(src)
+    token_stream = tokenizer(fp, **tokenizer_kwargs)
+    out = _Output(dst, write_size)
+    transformer = _Transformer(token_stream, list(rules.values()), out)
+    for token in token_stream:
+        if transformer.document(token, root):
+            out.text('\n')
+    out.flush()
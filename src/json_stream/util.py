@@ -2,52 +2,65 @@ from collections import deque
 
 from json_stream.base import StreamingJSONList, StreamingJSONObject
 
+# objects and lists up to this size are decoded by json.loads in one go, where the tokenizer supports it
+BULK_DECODE_SIZE = 16 * 1024
+
 
 class Context:
     LIST = 1
     DICT = 2
 
 
-def to_standard_types(x):
-    in_stack, out_stack = deque(), deque()
+def _open(x, bulk_size):
+    """The standard python value for ``x``, and the context and items to fill it from, if it isn't complete"""
+    if bulk_size:
+        decoded, value = x._decode_whole(bulk_size)
+        if decoded:
+            return value, None
     if isinstance(x, StreamingJSONList):
-        in_stack.append((Context.LIST, iter(x)))
-        output = []
-    elif isinstance(x, StreamingJSONObject):
-        in_stack.append((Context.DICT, iter(x.items())))
-        output = {}
-    else:
+        return [], (Context.LIST, iter(x))
+    return {}, (Context.DICT, iter(x.items()))
+
+
+def to_standard_types(x, bulk_size=BULK_DECODE_SIZE):
+    """
+    Convert a json-stream object or list, and everything in it, to standard
+    python dicts and lists.
+
+    Objects and lists no longer than ``bulk_size`` that haven't been read from
+    yet are decoded with :func:`json.loads` in one go when the tokenizer can
+    find where they end (as :class:`~json_stream.block_tokenizer.BlockTokenizer`
+    can). Pass ``bulk_size=0`` to convert everything a token at a time.
+    """
+    in_stack, out_stack = deque(), deque()
+    if not isinstance(x, (StreamingJSONList, StreamingJSONObject)):
         return x
+    output, context = _open(x, bulk_size)
+    if context is None:
+        return output
+    in_stack.append(context)
     out_stack.append(output)
     while len(in_stack) > 0:
         try:
             in_context, in_iter = in_stack[-1]
             in_elem = next(in_iter)
             if in_context == Context.LIST:
-                if isinstance(in_elem, StreamingJSONList):
-                    out_list = []
-                    out_stack[-1].append(out_list)
-                    out_stack.append(out_list)
-                    in_stack.append((Context.LIST, iter(in_elem)))
-                elif isinstance(in_elem, StreamingJSONObject):
-                    out_dict = {}
-                    out_stack[-1].append(out_dict)
-                    out_stack.append(out_dict)
-                    in_stack.append((Context.DICT, iter(in_elem.items())))
+                if isinstance(in_elem, (StreamingJSONList, StreamingJSONObject)):
+                    out_value, context = _open(in_elem, bulk_size)
+                    out_stack[-1].append(out_value)
+                    if context is not None:
+                        out_stack.append(out_value)
+                        in_stack.append(context)
                 else:
                     out_stack[-1].append(in_elem)
             elif in_context == Context.DICT:
                 in_key, in_value = in_elem
-                if isinstance(in_value, StreamingJSONList):
-                    out_list = []
-                    out_stack[-1][in_key] = out_list
-                    out_stack.append(out_list)
-                    in_stack.append((Context.LIST, iter(in_value)))
-                elif isinstance(in_value, StreamingJSONObject):
-                    out_dict = {}
-                    out_stack[-1][in_key] = out_dict
-                    out_stack.append(out_dict)
-                    in_stack.append((Context.DICT, iter(in_value.items())))
+                if isinstance(in_value, (StreamingJSONList, StreamingJSONObject)):
+                    out_value, context = _open(in_value, bulk_size)
+                    out_stack[-1][in_key] = out_value
+                    if context is not None:
+                        out_stack.append(out_value)
+                        in_stack.append(context)
                 else:
                     out_stack[-1][in_key] = in_value
         except StopIteration:
@@ -1,37 +1,271 @@
 from json_stream.base import StreamingJSONObject, StreamingJSONList, StreamingJSONBase
-from json_stream.iterators import ensure_file
+from json_stream.iterators import ensure_file, map_file
+from json_stream.paths import compile_paths
 from json_stream.select_tokenizer import default_tokenizer
+from json_stream.selector import _skip_rest, _skip_to_end
 from json_stream.tokenizer import TokenType
 
+DEFAULT_BATCH_SIZE = 1024
+
+
+class _Skip:
+    def __repr__(self):
+        return 'SKIP'
+
+
+SKIP = _Skip()
+
+
+def _visit(token_stream, token_type, token, visitor, shared_path):
+    """
+    Visit the document whose first token has been read, directly from the
+    token stream, with a stack of the objects and lists it is in rather than
+    recursion, so documents of any depth can be visited.
+    """
+    path = []
+    if token_type != TokenType.OPERATOR:
+        visitor(token, path if shared_path else ())
+        return
+    # for every object or list the current value is in, from the outermost, whether it's an object
+    objects = []
+    first = True  # whether nothing has been read yet from the innermost object or list
+    try:
+        while True:
+            # token opens an object or list
+            if token == '{':
+                objects.append(True)
+                path.append(None)
+            elif token == '[':
+                objects.append(False)
+                path.append(-1)
+            else:
+                raise ValueError(f"Unknown operator {token}")
+            first = True
+            while objects:
+                in_object = objects[-1]
+                end = '}' if in_object else ']'
+                token_type, token = next(token_stream)
+                if token_type == TokenType.OPERATOR and token == end:
+                    objects.pop()
+                    path.pop()
+                    if first and visitor({} if in_object else [], path if shared_path else tuple(path)) is SKIP:
+                        if objects:
+                            # the rest of the object or list the empty one is in
+                            _skip_to_end(token_stream)
+                            objects.pop()
+                            path.pop()
+                    first = False
+                    continue
+                if not first:
+                    if token_type != TokenType.OPERATOR or token != ',':
+                        raise ValueError(f"Expecting comma or {end}, got {token}")
+                    token_type, token = next(token_stream)
+                if in_object:
+                    if token_type != TokenType.STRING:
+                        raise ValueError(f"Expecting string, comma or }}, got {token} ({token_type})")
+                    path[-1] = token
+                    token_type, token = next(token_stream)
+                    if token_type != TokenType.OPERATOR or token != ':':
+                        raise ValueError("Expecting :")
+                    token_type, token = next(token_stream)
+                else:
+                    path[-1] += 1
+                first = False
+                if token_type == TokenType.OPERATOR:
+                    break
+                if visitor(token, path if shared_path else tuple(path)) is SKIP:
+                    _skip_to_end(token_stream)
+                    objects.pop()
+                    path.pop()
+            else:
+                return
+    except StopIteration:
+        error = StreamingJSONObject.INCOMPLETE_ERROR if objects[-1] else StreamingJSONList.INCOMPLETE_ERROR
+        raise ValueError(error) from None
+
+
+def _call(callback, token_stream, token_type, token, path):
+    """Call the callback for the value whose first token has been read, and return what it returns"""
+    if token_type != TokenType.OPERATOR:
+        return callback(token, path)
+    if token not in '{[':
+        raise ValueError(f"Unknown operator {token}")
+    value = StreamingJSONBase.factory(token, token_stream, persistent=False)
+    result = callback(value, path)
+    value._discard()
+    return result
+
+
+def _dispatch(token_stream, token_type, token, root, callbacks, shared_path):
+    """
+    As :func:`_visit`, but only calling the callbacks for the values the paths
+    compiled into ``root`` match, and skipping everything no path can match.
+    """
+    path = []
+    if root.matches:
+        _call(callbacks[root.matches[0]], token_stream, token_type, token, path if shared_path else ())
+        return
+    if token_type != TokenType.OPERATOR:
+        return
+    skip_value = getattr(token_stream, 'skip_value', None)
+    # for every object or list the current value is in, from the outermost: whether it's an object, the state
+    # the paths are in there, and for an object, the keys that can still match (or None if any key can)
+    objects, states, pending = [], [], []
+    state = root
+    first = True
+    try:
+        while True:
+            # token opens an object or list, in which values are matched by state
+            if token == '{':
+                objects.append(True)
+                path.append(None)
+                pending.append(None if state.keys is None else set(state.keys))
+            elif token == '[':
+                objects.append(False)
+                path.append(-1)
+                pending.append(None)
+            else:
+                raise ValueError(f"Unknown operator {token}")
+            states.append(state)
+            first = True
+            while objects:
+                in_object, state, keys = objects[-1], states[-1], pending[-1]
+                if keys is not None and not keys or (
+                        not in_object and state.last_index is not None and path[-1] >= state.last_index):
+                    # nothing else in the object or list can match
+                    _skip_to_end(token_stream)
+                    skip = True
+                else:
+                    end = '}' if in_object else ']'
+                    token_type, token = next(token_stream)
+                    skip = token_type == TokenType.OPERATOR and token == end
+                if skip:
+                    objects.pop()
+                    path.pop()
+                    states.pop()
+                    pending.pop()
+                    first = False
+                    continue
+                value = None
+                if not first:
+                    if token_type != TokenType.OPERATOR or token != ',':
+                        raise ValueError(f"Expecting comma or {end}, got {token}")
+                    if in_object:
+                        token_type, token = next(token_stream)
+                if in_object:
+                    if token_type != TokenType.STRING:
+                        raise ValueError(f"Expecting string, comma or }}, got {token} ({token_type})")
+                    path[-1] = token
+                    if keys is not None:
+                        keys.discard(token)
+                    token_type, token = next(token_stream)
+                    if token_type != TokenType.OPERATOR or token != ':':
+                        raise ValueError("Expecting :")
+                else:
+                    path[-1] += 1
+                    if first:
+                        # the first item's first token has been read, to tell if the list is empty
+                        value = token_type, token
+                first = False
+                child = state.next(path[-1])
+                if child is None:
+                    if value is not None:
+                        _skip_rest(token_stream, *value)
+                    elif skip_value is None or not skip_value():
+                        _skip_rest(token_stream, *next(token_stream))
+                    continue
+                token_type, token = value or next(token_stream)
+                if child.matches:
+                    callback = callbacks[child.matches[0]]  # the first path that matches
+                    if _call(callback, token_stream, token_type, token, path if shared_path else tuple(path)) is SKIP:
+                        _skip_to_end(token_stream)
+                        objects.pop()
+                        path.pop()
+                        states.pop()
+                        pending.pop()
+                    continue
+                if token_type == TokenType.OPERATOR:
+                    state = child
+                    break
+            else:
+                return
+    except StopIteration:
+        error = StreamingJSONObject.INCOMPLETE_ERROR if objects[-1] else StreamingJSONList.INCOMPLETE_ERROR
+        raise ValueError(error) from None
 
-def _visit(obj, visitor, path):
-    k = None
-    if isinstance(obj, StreamingJSONObject):
-        for k, v in obj.items():
-            _visit(v, visitor, path + (k,))
-        if k is None:
-            visitor({}, path)
-    elif isinstance(obj, StreamingJSONList):
-        for k, v in enumerate(obj):
-            _visit(v, visitor, path + (k,))
-        if k is None:
-            visitor([], path)
-    else:
-        visitor(obj, path)
 
+def visit_many(fp_or_iterator, visitor, tokenizer=default_tokenizer, prefetch=0, mmap=False, shared_path=False,
+               **tokenizer_kwargs):
+    """
+    Call ``visitor(value, path)`` for every value in each JSON document in the
+    stream that isn't an object or list, and for every empty object and list,
+    with ``path`` being a tuple of the keys and indices leading to it, yielding
+    after each document.
 
-def visit_many(fp_or_iterator, visitor, tokenizer=default_tokenizer, **tokenizer_kwargs):
-    fp = ensure_file(fp_or_iterator)
+    If the visitor returns :data:`SKIP`, the rest of the object or list the
+    value is in is skipped, without being parsed when the tokenizer supports
+    it (as :class:`~json_stream.block_tokenizer.BlockTokenizer` does).
+
+    With ``shared_path=True``, ``path`` is instead a list that is updated in
+    place as the documents are read, so no tuple is built for each value. It
+    must not be changed by the visitor, or kept after it returns (keep
+    ``tuple(path)`` instead).
+
+    ``visitor`` can also be a mapping of paths (as for :func:`json_stream.select`)
+    to visitors, which are called only for the values at those paths, including
+    objects and lists, which are passed as transient streaming objects, as
+    :func:`json_stream.select` yields them, and aren't searched any further.
+    Only the visitor for the first of the paths that match a value is called
+    for it (a transient object or list can only be read once). Everything no
+    path can match is skipped.
+    """
+    if mmap:
+        fp_or_iterator = map_file(fp_or_iterator)
+    fp = ensure_file(fp_or_iterator, prefetch)
     token_stream = tokenizer(fp, **tokenizer_kwargs)
-    for token_type, token in token_stream:
-        if token_type == TokenType.OPERATOR:
-            obj = StreamingJSONBase.factory(token, token_stream, persistent=False)
-            _visit(obj, visitor, ())
-            obj.read_all()
-        else:
-            _visit(token, visitor, ())
-        yield
-
-
-def visit(fp_or_iterator, visitor, tokenizer=default_tokenizer, **tokenizer_kwargs):
-    next(visit_many(fp_or_iterator, visitor, tokenizer, **tokenizer_kwargs))
+    if callable(visitor):
+        for token_type, token in token_stream:
+            _visit(token_stream, token_type, token, visitor, shared_path)
+            yield
+    else:
+        # the paths are compiled into a single state machine once, and stepped through a key or index at a time
+        root = compile_paths(list(visitor))
+        callbacks = list(visitor.values())
+        for token_type, token in token_stream:
+            _dispatch(token_stream, token_type, token, root, callbacks, shared_path)
+            yield
+
+
+def visit(fp_or_iterator, visitor, tokenizer=default_tokenizer, prefetch=0, mmap=False, shared_path=False,
+          **tokenizer_kwargs):
+    """Visit the first JSON document in the stream, as :func:`visit_many` does"""
+    next(visit_many(fp_or_iterator, visitor, tokenizer, prefetch, mmap, shared_path, **tokenizer_kwargs))
+
+
+def visit_batched(fp_or_iterator, handler, batch_size=DEFAULT_BATCH_SIZE, tokenizer=default_tokenizer, prefetch=0,
+                  mmap=False, **tokenizer_kwargs):
+    """
+    Visit every JSON document in the stream, as :func:`visit_many` does, but
+    call ``handler(paths, values)`` once for every ``batch_size`` values, with
+    lists of their paths and the values themselves, rather than once per value.
+    Batches run across documents, so values from many small documents (as in
+    NDJSON) are handled together, and the last batch may be smaller.
+
+    The same two lists are passed to every call, and are cleared once the
+    handler returns, so it must copy anything it wants to keep.
+    """
+    paths, values = [], []
+    add_path, add_value = paths.append, values.append
+
+    def visitor(value, path):
+        add_path(path)
+        add_value(value)
+        if len(values) >= batch_size:
+            handler(paths, values)
+            paths.clear()
+            values.clear()
+
+    for _ in visit_many(fp_or_iterator, visitor, tokenizer, prefetch, mmap, **tokenizer_kwargs):
+        pass
+    if values:
+        handler(paths, values)